@@ -0,0 +1,38 @@
+﻿"""Add indexes for hot lookup columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-09-20 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_addresses_customer_id", "addresses", ["customer_id"])
+    op.create_index("ix_orders_created_at_id", "orders", ["created_at", "id"])
+    op.create_index("ix_orders_customer_id_created_at_id", "orders", ["customer_id", "created_at", "id"])
+    op.create_index("ix_orders_status_created_at_id", "orders", ["status", "created_at", "id"])
+    op.create_index("ix_orders_shipment_id", "orders", ["shipment_id"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_shipment_id", table_name="orders")
+    op.drop_index("ix_orders_status_created_at_id", table_name="orders")
+    op.drop_index("ix_orders_customer_id_created_at_id", table_name="orders")
+    op.drop_index("ix_orders_created_at_id", table_name="orders")
+    op.drop_index("ix_addresses_customer_id", table_name="addresses")
@@ -0,0 +1,33 @@
+﻿"""Add version columns for optimistic concurrency
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows start at version 1, like newly inserted ones.
+    for table in ("orders", "addresses"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("addresses", "orders"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("version")
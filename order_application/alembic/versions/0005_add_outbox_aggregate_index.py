@@ -0,0 +1,30 @@
+﻿"""Index outbox messages by aggregate for in-order claiming
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_outbox_messages_aggregate_id_created_at", "outbox_messages", ["aggregate_id", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_outbox_messages_aggregate_id_created_at", table_name="outbox_messages")
@@ -1,71 +1,192 @@
 ﻿import os
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 from fastapi import FastAPI, Request, Depends
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
 
-from data import initialize_database
-from models.entities import Order, Address, Base
-from repositories import OrderRepository, AddressRepository
+from data import seed_database_if_empty, upgrade_database
+from repositories import OrderRepository, AddressRepository, OutboxRepository
 from services import OrderService, AddressService
-from clients import ProductServiceClient, LogisticsServiceClient
-from config import DATABASE_URL, HOST, PORT, DEBUG, PRODUCT_SERVICE_URL, LOGISTICS_SERVICE_URL
+from services.order_side_effects import OrderSideEffects
+from services.outbox_dispatcher import OutboxDispatcher
+from clients import ProductServiceClient, LogisticsServiceClient, ResilienceLayer, RetryPolicy
+from clients.http_session import HttpClientSettings
+from core.cache import AsyncTTLCache
+from core.database import DatabaseRegistry, slow_query_logger
+from core.serialization import ORJSONResponse
+from core.metrics import DB_POOL_CONNECTION_HOLD_DURATION, MetricsMiddleware
+from core.tracing import FileSpanExporter, OtlpHttpSpanExporter, TracingMiddleware, tracer
+from core.startup import StartupTimer
+from config import DATABASE_URL, HOST, PORT, DEBUG, PRODUCT_SERVICE_URL, LOGISTICS_SERVICE_URL, ORDER_FANOUT_CONCURRENCY
+from config import PRODUCT_CACHE_TTL_SECONDS, PRODUCT_CACHE_MAX_ENTRIES, METRICS_ENABLED
+from config import AVAILABILITY_CACHE_TTL_SECONDS, AVAILABILITY_CACHE_NEGATIVE_TTL_SECONDS, AVAILABILITY_CACHE_MAX_ENTRIES
+from config import PRODUCT_SERVICE_BATCH_STOCK, PRODUCT_SERVICE_BATCH_PROBE_INTERVAL, PRODUCT_SERVICE_MAX_CONCURRENCY
+from config import HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL, HTTP_CONNECT_TIMEOUT
+from config import PRODUCT_SERVICE_READ_TIMEOUT, PRODUCT_SERVICE_WRITE_TIMEOUT
+from config import LOGISTICS_SERVICE_READ_TIMEOUT, LOGISTICS_SERVICE_WRITE_TIMEOUT
+from config import UPSTREAM_RETRY_MAX_ATTEMPTS, UPSTREAM_RETRY_BASE_DELAY, UPSTREAM_RETRY_MAX_DELAY
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+from config import OUTBOX_ENABLED, OUTBOX_BATCH_SIZE, OUTBOX_DISPATCH_CONCURRENCY, OUTBOX_POLL_INTERVAL, OUTBOX_MAX_ATTEMPTS
+from config import OUTBOX_RETRY_BASE_DELAY, OUTBOX_RETRY_MAX_DELAY
+from config import TRACING_EXPORTER, TRACING_FILE_PATH, TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME
+from config import TRACING_SAMPLE_RATIO, TRACING_EXPORT_INTERVAL, TRACING_MAX_QUEUE_SIZE
+
+# --- HTTP client setup ---
+def build_http_settings(read_timeout: float, write_timeout: float) -> HttpClientSettings:
+    return HttpClientSettings(
+        pool_limit=HTTP_POOL_LIMIT,
+        pool_limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl=HTTP_DNS_CACHE_TTL,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+    )
 
-# --- Database setup ---
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
-async_session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+def build_resilience_layer() -> ResilienceLayer:
+    return ResilienceLayer(
+        retry_policy=RetryPolicy(
+            max_attempts=UPSTREAM_RETRY_MAX_ATTEMPTS,
+            base_delay=UPSTREAM_RETRY_BASE_DELAY,
+            max_delay=UPSTREAM_RETRY_MAX_DELAY,
+        ),
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+    )
 
-async def get_session() -> AsyncSession:
-    async with async_session_factory() as session:
-        yield session
+def build_span_exporter():
+    if TRACING_EXPORTER == "file":
+        return FileSpanExporter(TRACING_FILE_PATH)
+    if TRACING_EXPORTER == "otlp":
+        return OtlpHttpSpanExporter(TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME)
+    if TRACING_EXPORTER != "none":
+        raise ValueError(f"Unknown TRACING_EXPORTER '{TRACING_EXPORTER}'; use none, file or otlp.")
+    return None
+
+def build_availability_cache() -> Optional[AsyncTTLCache]:
+    if AVAILABILITY_CACHE_TTL_SECONDS <= 0:
+        return None
+    # Unserviceable destinations are cached too, for a shorter time.
+    return AsyncTTLCache(
+        AVAILABILITY_CACHE_TTL_SECONDS,
+        AVAILABILITY_CACHE_MAX_ENTRIES,
+        ttl_for=lambda result: (
+            AVAILABILITY_CACHE_TTL_SECONDS if result and result.get("valid", False)
+            else AVAILABILITY_CACHE_NEGATIVE_TTL_SECONDS
+        ),
+    )
 
 # --- Lifespan manager ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    async with ProductServiceClient(PRODUCT_SERVICE_URL) as product_client, \
-               LogisticsServiceClient(LOGISTICS_SERVICE_URL) as logistics_client:
-
-        # Initialize repositories
-        address_repository = AddressRepository(session_factory=async_session_factory)
-        order_repository = OrderRepository(session_factory=async_session_factory)
-
-        # Initialize services
-        address_service = AddressService(repository=address_repository)
-        order_service = OrderService(
-            repository=order_repository,
-            address_repository=address_repository,
-            product_client=product_client,
-            logistics_client=logistics_client,
-        )
-
-        # Store shared state
-        app.state.engine = engine
-        app.state.session_factory = async_session_factory
-        app.state.address_repository = address_repository
-        app.state.order_repository = order_repository
-        app.state.product_client = product_client
-        app.state.logistics_client = logistics_client
-        app.state.address_service = address_service
-        app.state.order_service = order_service
-
-        # Run DB init
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-
-        async with async_session_factory() as session:
-            address_exists = (await session.execute(select(Address))).scalars().first() is not None
-            order_exists = (await session.execute(select(Order))).scalars().first() is not None
-            if not address_exists and not order_exists:
-                await initialize_database(DATABASE_URL)
-
-        # Yield control back to FastAPI
-        yield
-
-    # Shutdown is automatic: product_client and logistics_client exit here
+    startup = StartupTimer()
+    tracer.configure(
+        build_span_exporter(),
+        sample_ratio=TRACING_SAMPLE_RATIO,
+        max_queue_size=TRACING_MAX_QUEUE_SIZE,
+        export_interval=TRACING_EXPORT_INTERVAL,
+    )
+    with startup.phase("engine"):
+        database = DatabaseRegistry(
+            DATABASE_URL,
+            query_logger=slow_query_logger,
+            connection_hold_histogram=DB_POOL_CONNECTION_HOLD_DURATION if METRICS_ENABLED else None,
+        ).start()
+
+    product_cache = (
+        AsyncTTLCache(PRODUCT_CACHE_TTL_SECONDS, PRODUCT_CACHE_MAX_ENTRIES)
+        if PRODUCT_CACHE_TTL_SECONDS > 0 else None
+    )
+
+    product_client = ProductServiceClient(
+        PRODUCT_SERVICE_URL,
+        cache=product_cache,
+        batch_stock={"true": True, "false": False}.get(PRODUCT_SERVICE_BATCH_STOCK),
+        batch_probe_interval=PRODUCT_SERVICE_BATCH_PROBE_INTERVAL,
+        max_concurrency=PRODUCT_SERVICE_MAX_CONCURRENCY,
+        settings=build_http_settings(PRODUCT_SERVICE_READ_TIMEOUT, PRODUCT_SERVICE_WRITE_TIMEOUT),
+        resilience=build_resilience_layer(),
+    )
+    logistics_client = LogisticsServiceClient(
+        LOGISTICS_SERVICE_URL,
+        settings=build_http_settings(LOGISTICS_SERVICE_READ_TIMEOUT, LOGISTICS_SERVICE_WRITE_TIMEOUT),
+        resilience=build_resilience_layer(),
+        availability_cache=build_availability_cache(),
+    )
+
+    try:
+        async with product_client, logistics_client:
+
+            # Initialize repositories
+            address_repository = AddressRepository(session_factory=database.session_factory)
+            order_repository = OrderRepository(session_factory=database.session_factory)
+            outbox_repository = OutboxRepository(session_factory=database.session_factory)
+
+            # Initialize services
+            address_service = AddressService(repository=address_repository)
+            order_service = OrderService(
+                repository=order_repository,
+                address_repository=address_repository,
+                product_client=product_client,
+                logistics_client=logistics_client,
+                max_concurrency=ORDER_FANOUT_CONCURRENCY,
+                outbox_repository=outbox_repository if OUTBOX_ENABLED else None,
+            )
+            outbox_dispatcher = OutboxDispatcher(
+                database.session_factory,
+                outbox_repository=outbox_repository,
+                order_repository=order_repository,
+                side_effects=OrderSideEffects(product_client, logistics_client),
+                batch_size=OUTBOX_BATCH_SIZE,
+                max_concurrency=OUTBOX_DISPATCH_CONCURRENCY,
+                poll_interval=OUTBOX_POLL_INTERVAL,
+                max_attempts=OUTBOX_MAX_ATTEMPTS,
+                retry_policy=RetryPolicy(base_delay=OUTBOX_RETRY_BASE_DELAY, max_delay=OUTBOX_RETRY_MAX_DELAY),
+            )
+
+            # Store shared state
+            app.state.database = database
+            app.state.engine = database.engine
+            app.state.session_factory = database.session_factory
+            app.state.address_repository = address_repository
+            app.state.order_repository = order_repository
+            app.state.outbox_repository = outbox_repository
+            app.state.outbox_dispatcher = outbox_dispatcher
+            app.state.product_client = product_client
+            app.state.logistics_client = logistics_client
+            app.state.query_logger = slow_query_logger
+            app.state.address_service = address_service
+            app.state.order_service = order_service
+            app.state.startup = startup
+
+            # Run DB migrations (a no-op when the schema is already at head)
+            with startup.phase("migrations"):
+                await upgrade_database(database.engine)
+
+            # Seed sample data into an empty database
+            with startup.phase("seed"):
+                await seed_database_if_empty(database)
+
+            startup.finish()
+
+            # Drain side effects left by earlier runs even if the outbox is now disabled
+            outbox_dispatcher.start()
+            tracer.start()
+
+            # Yield control back to FastAPI
+            try:
+                yield
+            finally:
+                await outbox_dispatcher.stop()
+                # Export the spans still queued
+                await tracer.stop()
+
+        # product_client and logistics_client exit here
+    finally:
+        # Shutdown: close every pooled database connection
+        await database.dispose()
 
 # --- App factory ---
 def create_app() -> FastAPI:
@@ -75,11 +196,20 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json",
         docs_url="/swagger-ui",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
-    from controllers import order_router, address_router
+    from controllers import order_router, address_router, admin_router, metrics_router
     app.include_router(order_router, tags=["orders"])
     app.include_router(address_router, tags=["addresses"])
+    app.include_router(admin_router, tags=["admin"])
+
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+
+    # Does nothing unless the lifespan configured an exporter.
+    app.add_middleware(TracingMiddleware)
 
     return app
 
@@ -0,0 +1,283 @@
+﻿"""Latency and throughput of the order API under concurrent load.
+
+Boots `create_app` in-process against a temporary SQLite database and a local
+stand-in for the product and logistics services, then drives each workload at
+each concurrency level and writes the results as JSON. Run from order_application:
+
+    python -m benchmarks.order_api --concurrency 1,8,32 --requests 500 --upstream-latency-ms 5
+    python -m benchmarks.order_api --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from benchmarks.upstream_stub import UpstreamStub
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+WORKLOADS = ("create", "get", "list", "patch")
+
+# A workload sends one request and returns the response.
+Workload = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarise(workload: str, concurrency: int, latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    milliseconds = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "workload": workload,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": milliseconds(percentile(latencies, 0.50)),
+            "p95": milliseconds(percentile(latencies, 0.95)),
+            "p99": milliseconds(percentile(latencies, 0.99)),
+            "mean": milliseconds(sum(latencies) / len(latencies)) if latencies else 0.0,
+            "max": milliseconds(latencies[-1]) if latencies else 0.0,
+        },
+    }
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, concurrency: int, requests: int):
+    """Closed loop: `concurrency` workers send `requests` requests in total, each waiting for its last response."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(remaining) < requests:
+            started = time.perf_counter()
+            try:
+                response = await workload(client)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+class OrderApiWorkloads:
+    """The requests each workload sends, over customers and orders created before timing starts."""
+
+    def __init__(self, customers: int, products: int, items_per_order: int):
+        self.customer_ids = [str(uuid.uuid4()) for _ in range(customers)]
+        self.product_ids = [str(uuid.uuid4()) for _ in range(products)]
+        self.items_per_order = items_per_order
+        self.order_ids: List[str] = []
+        self.pending_ids: List[str] = []
+
+    def order_payload(self) -> Dict[str, Any]:
+        return {
+            "customer_id": random.choice(self.customer_ids),
+            "items": [
+                {"product_id": product_id, "quantity": random.randint(1, 3)}
+                for product_id in random.sample(self.product_ids, self.items_per_order)
+            ],
+        }
+
+    async def seed(self, client: httpx.AsyncClient, orders: int) -> None:
+        for index, customer_id in enumerate(self.customer_ids):
+            response = await client.post("/api/addresses/", json={
+                "customer_id": customer_id,
+                "street": f"{index} Benchmark Street",
+                "city": "Springfield",
+                "state": "IL",
+                "postal_code": "62701",
+                "country": "US",
+            })
+            response.raise_for_status()
+        self.order_ids.extend(await self.create_orders(client, orders))
+
+    async def create_orders(self, client: httpx.AsyncClient, count: int) -> List[str]:
+        ids = []
+        for _ in range(count):
+            response = await client.post("/api/orders/", json=self.order_payload())
+            response.raise_for_status()
+            ids.append(response.json()["id"])
+        return ids
+
+    async def prepare(self, workload: str, client: httpx.AsyncClient, requests: int) -> None:
+        # Every patch moves a fresh order out of Pending, so each run needs its own.
+        if workload == "patch":
+            self.pending_ids = await self.create_orders(client, requests)
+
+    def workload(self, name: str) -> Workload:
+        return getattr(self, name)
+
+    async def create(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post("/api/orders/", json=self.order_payload())
+
+    async def get(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get(f"/api/orders/{random.choice(self.order_ids)}")
+
+    async def list(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get("/api/orders/", params={"limit": 50})
+
+    async def patch(self, client: httpx.AsyncClient) -> httpx.Response:
+        return await client.patch(f"/api/orders/{self.pending_ids.pop()}/status", json={"status": "Processing"})
+
+
+@asynccontextmanager
+async def running_app(database_url: str, upstream_url: str):
+    """Start the application lifespan with the upstream clients pointed at the stub."""
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "PRODUCT_SERVICE_URL": upstream_url,
+        "LOGISTICS_SERVICE_URL": upstream_url,
+    })
+    # config reads the environment on import, so the app is imported only now.
+    from app import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+            yield client
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> Dict[str, Any]:
+    upstream = UpstreamStub(latency=args.upstream_latency_ms / 1000)
+    upstream_url = await upstream.start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            database_url = f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+            async with running_app(database_url, upstream_url) as client:
+                workloads = OrderApiWorkloads(args.customers, args.products, args.items_per_order)
+                await workloads.seed(client, args.seed_orders)
+
+                for name, concurrency in itertools.product(args.workloads, args.concurrency):
+                    workload = workloads.workload(name)
+                    await workloads.prepare(name, client, args.warmup + args.requests)
+                    await drive(client, workload, concurrency, args.warmup)
+                    latencies, errors, elapsed = await drive(client, workload, concurrency, args.requests)
+                    result = summarise(name, concurrency, latencies, errors, elapsed)
+                    results.append(result)
+                    print_result(result)
+    finally:
+        await upstream.stop()
+
+    return {
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "customers": args.customers,
+            "products": args.products,
+            "items_per_order": args.items_per_order,
+            "seed_orders": args.seed_orders,
+        },
+        "results": results,
+    }
+
+
+def print_header() -> None:
+    print(f"{'workload':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+
+def print_result(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    latency = result["latency_ms"]
+    line = (
+        f"{result['workload']:<10}{result['concurrency']:>6}{result['requests_per_second']:>10.1f}"
+        f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}{result['errors']:>8}"
+    )
+    if baseline is not None:
+        line += (
+            f"   req/s {change(baseline['requests_per_second'], result['requests_per_second'])}"
+            f"  p95 {change(baseline['latency_ms']['p95'], latency['p95'])}"
+        )
+    print(line)
+
+
+def change(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.1%}" if before else "n/a"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the current results next to their change from a stored run."""
+    previous = {(r["workload"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('recorded_at', 'unknown date')}):")
+    print_header()
+    for result in current["results"]:
+        print_result(result, previous.get((result["workload"], result["concurrency"])))
+
+
+def parse_list(value: str, cast=str) -> List[Any]:
+    return [cast(item) for item in value.split(",") if item]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workloads", type=parse_list, default=list(WORKLOADS), help="comma-separated: " + ",".join(WORKLOADS))
+    parser.add_argument("--concurrency", type=lambda value: parse_list(value, int), default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=300, help="timed requests per workload and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--upstream-latency-ms", type=float, default=5)
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--seed-orders", type=int, default=200)
+    parser.add_argument("--output", type=Path, help="default: benchmarks/results/<timestamp>-<commit>.json")
+    parser.add_argument("--compare", type=Path, help="an earlier results file to compare against")
+    args = parser.parse_args()
+
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    print_header()
+    report = await run(args)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
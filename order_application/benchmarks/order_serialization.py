@@ -0,0 +1,101 @@
+﻿"""Time to build the JSON body of one order, before and after the orjson read path.
+
+"pydantic" is the former path: an OrderReadDTO validated field by field, then
+FastAPI's response_model handling (dump, validate against OrderReadSchema, dump
+again) and the stdlib encoder. "orjson" is the current one: a DTO constructed
+without validation and written by order_read_payload and orjson. Run from
+order_application:
+
+    python -m benchmarks.order_serialization --items 1,10,100
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from core.serialization import dumps
+from models.dtos.order import OrderReadDTO
+from models.dtos.order_item import OrderItemReadDTO
+from models.entities import OrderItem
+from models.entities.order import Order
+from models.enums import OrderStatus
+from models.schemas.order import OrderReadSchema, order_read_payload
+from services.order_service_impl import OrderService
+
+
+def make_order(items: int) -> Order:
+    return Order(
+        id="6f1c2b1e-0d5a-4c37-9a51-2d0f3c4b5a69",
+        customer_id="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+        created_at=datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc),
+        updated_at=datetime(2025, 3, 2, 8, 0, tzinfo=timezone.utc),
+        version=2,
+        shipment_id=None,
+        status=OrderStatus.PROCESSING,
+        total_amount=Decimal("19.99") * 2 * items,
+        items=[
+            OrderItem(id=f"item-{n}", product_id=f"product-{n}", quantity=2, unit_price=Decimal("19.99"))
+            for n in range(items)
+        ],
+    )
+
+
+def pydantic_body(order: Order) -> bytes:
+    dto = OrderReadDTO(
+        id=order.id,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+        version=order.version,
+        customer_id=order.customer_id,
+        shipment_id=order.shipment_id,
+        total_amount=order.total_amount,
+        status=order.status,
+        items=[
+            OrderItemReadDTO(
+                id=item.id,
+                product_id=item.product_id,
+                product_variant_id=item.product_variant_id,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                total_price=item.unit_price * item.quantity,
+            )
+            for item in order.items
+        ],
+    )
+    # What FastAPI does with a response_model before handing the result to JSONResponse.
+    content = OrderReadSchema.model_validate(dto.model_dump(by_alias=True)).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_body(order: Order) -> bytes:
+    return dumps(order_read_payload(OrderService._to_read_dto(order)))
+
+
+def microseconds_per_call(function, order: Order, seconds: float) -> float:
+    timer = timeit.Timer(lambda: function(order))
+    calls, _ = timer.autorange()
+    repeats = max(1, int(seconds / max(timer.timeit(calls), 1e-9)))
+    best = min(timer.repeat(repeat=max(3, repeats), number=calls))
+    return best / calls * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=lambda value: [int(n) for n in value.split(",")], default=[1, 10, 100])
+    parser.add_argument("--seconds", type=float, default=1, help="rough time spent per measurement")
+    args = parser.parse_args()
+
+    print(f"{'items':>6}{'pydantic us':>14}{'orjson us':>12}{'speedup':>10}")
+    for items in args.items:
+        order = make_order(items)
+        # Both paths must produce the same body for the comparison to mean anything.
+        assert json.loads(pydantic_body(order)) == json.loads(orjson_body(order))
+
+        before = microseconds_per_call(pydantic_body, order, args.seconds)
+        after = microseconds_per_call(orjson_body, order, args.seconds)
+        print(f"{items:>6}{before:>14.1f}{after:>12.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
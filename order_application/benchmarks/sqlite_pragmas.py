@@ -0,0 +1,93 @@
+﻿"""Concurrent read/write throughput of SQLite with and without the performance pragmas.
+
+Run from order_application:
+
+    python -m benchmarks.sqlite_pragmas --writers 4 --readers 16 --seconds 5
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.database import DEFAULT_SQLITE_PRAGMAS, SqlitePragmas, create_database_engine
+from models.entities import Base, Order
+from models.enums import OrderStatus
+
+# What SQLite does with no pragmas, apart from a busy timeout so the baseline
+# measures lock waits instead of failing outright.
+BASELINE_PRAGMAS = SqlitePragmas(
+    journal_mode="DELETE", synchronous="FULL", mmap_size=0, cache_size=-2000, temp_store="DEFAULT"
+)
+
+
+async def writer(engine: AsyncEngine, deadline: float, counts: dict) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            async with AsyncSession(engine) as session:
+                session.add(Order(
+                    id=str(uuid.uuid4()),
+                    customer_id=str(uuid.uuid4()),
+                    created_at=datetime.now(timezone.utc),
+                    status=OrderStatus.PENDING,
+                    total_amount=Decimal("10.00"),
+                ))
+                await session.commit()
+            counts["writes"] += 1
+        except OperationalError:
+            counts["errors"] += 1
+
+
+async def reader(engine: AsyncEngine, deadline: float, counts: dict) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            async with AsyncSession(engine) as session:
+                await session.execute(select(Order).order_by(Order.created_at.desc()).limit(20))
+            counts["reads"] += 1
+        except OperationalError:
+            counts["errors"] += 1
+
+
+async def run(pragmas: SqlitePragmas, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}"
+        engine = create_database_engine(url, echo=False, sqlite_pragmas=pragmas)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        counts = {"writes": 0, "reads": 0, "errors": 0}
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(writer(engine, deadline, counts) for _ in range(writers)),
+            *(reader(engine, deadline, counts) for _ in range(readers)),
+        )
+        await engine.dispose()
+
+    return counts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>8}")
+    for name, pragmas in (("baseline", BASELINE_PRAGMAS), ("tuned", DEFAULT_SQLITE_PRAGMAS)):
+        counts = await run(pragmas, args.writers, args.readers, args.seconds)
+        print(
+            f"{name:<10}{counts['writes'] / args.seconds:>12.1f}"
+            f"{counts['reads'] / args.seconds:>12.1f}{counts['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
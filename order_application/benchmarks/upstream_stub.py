@@ -0,0 +1,70 @@
+﻿"""In-process stand-ins for the product and logistics services, with a configurable response delay."""
+import asyncio
+import uuid
+
+from aiohttp import web
+
+
+class UpstreamStub:
+    """Serves the product and logistics endpoints the order service calls, on one local port.
+
+    Every product costs `price`, every destination is serviceable and every stock
+    change succeeds; each response is held back by `latency` seconds to stand in
+    for the network and the upstream's own work.
+    """
+
+    def __init__(self, latency: float = 0.0, price: str = "10.00"):
+        self.latency = latency
+        self.price = price
+        self.requests = 0
+        self._runner = None
+        self.base_url = None
+
+        app = web.Application(middlewares=[self._delay])
+        app.router.add_get("/api/products/{id}", self._get_product)
+        app.router.add_get("/api/product-variants/{id}", self._get_product)
+        app.router.add_patch("/api/stock/{action}", self._ok)
+        app.router.add_patch("/api/products/{id}/{action}", self._ok)
+        app.router.add_patch("/api/product-variants/{id}/{action}", self._ok)
+        app.router.add_post("/api/shipping/availability", self._availability)
+        app.router.add_post("/api/shipments", self._create_shipment)
+        app.router.add_get("/api/shipments/{id}", self._get_shipment)
+        app.router.add_patch("/api/shipments/{id}/status", self._ok)
+        self._app = app
+
+    @web.middleware
+    async def _delay(self, request, handler):
+        self.requests += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    async def _get_product(self, request):
+        return web.json_response({"id": request.match_info["id"], "price": self.price})
+
+    async def _ok(self, request):
+        return web.json_response({})
+
+    async def _availability(self, request):
+        return web.json_response({"valid": True})
+
+    async def _create_shipment(self, request):
+        return web.json_response({"id": str(uuid.uuid4())}, status=201)
+
+    async def _get_shipment(self, request):
+        return web.json_response({"id": request.match_info["id"], "status": "Pending"})
+
+    async def start(self) -> str:
+        """Listen on a free local port; returns the base URL both clients should use."""
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/api/"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
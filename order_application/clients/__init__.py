@@ -1,4 +1,14 @@
-﻿from .logistics_service_client import LogisticsServiceClient
-from .product_service_client import ProductServiceClient
+﻿from .logistics_service_client import LogisticsServiceClient, destination_key
+from .product_service_client import ProductServiceClient, StockChange
+from .resilience import CircuitOpenError, ResilienceLayer, RetryPolicy, UpstreamServiceError
 
-__all__ = ["LogisticsServiceClient", "ProductServiceClient"]
+__all__ = [
+    "LogisticsServiceClient",
+    "destination_key",
+    "ProductServiceClient",
+    "StockChange",
+    "CircuitOpenError",
+    "ResilienceLayer",
+    "RetryPolicy",
+    "UpstreamServiceError",
+]
@@ -0,0 +1,64 @@
+﻿from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from core.tracing import client_trace_config
+
+
+@dataclass(frozen=True)
+class HttpClientSettings:
+    pool_limit: int = 100
+    pool_limit_per_host: int = 50
+    keepalive_timeout: float = 30
+    dns_cache_ttl: int = 300
+    connect_timeout: float = 5
+    read_timeout: float = 10
+    write_timeout: float = 30
+
+    def timeout_for(self, total: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=total, connect=self.connect_timeout)
+
+
+def create_client_session(settings: HttpClientSettings) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=settings.pool_limit,
+        limit_per_host=settings.pool_limit_per_host,
+        keepalive_timeout=settings.keepalive_timeout,
+        use_dns_cache=settings.dns_cache_ttl > 0,
+        ttl_dns_cache=settings.dns_cache_ttl or None,
+    )
+    return aiohttp.ClientSession(connector=connector, trace_configs=[client_trace_config()])
+
+
+def pool_stats(session: Optional[aiohttp.ClientSession]) -> Dict[str, Any]:
+    """Report how much of a session's connection pool is in use."""
+    if session is None or session.closed:
+        return {"open": False}
+
+    connector = session.connector
+    in_use, idle = _connector_counts(connector)
+    return {
+        "open": True,
+        "limit": connector.limit,
+        "limit_per_host": connector.limit_per_host,
+        "in_use": in_use,
+        "idle": idle,
+        "utilization": in_use / connector.limit if in_use is not None and connector.limit else None,
+    }
+
+
+def _connector_counts(connector: aiohttp.BaseConnector) -> Tuple[Optional[int], Optional[int]]:
+    # aiohttp exposes no public counters; these are the connector's own books, which an
+    # aiohttp upgrade may rename or reshape. Report None then rather than failing the endpoint.
+    acquired = getattr(connector, "_acquired", None)
+    conns = getattr(connector, "_conns", None)
+    try:
+        in_use = len(acquired) if acquired is not None else None
+    except TypeError:
+        in_use = None
+    try:
+        idle = sum(len(pooled) for pooled in conns.values()) if conns is not None else None
+    except (AttributeError, TypeError):
+        idle = None
+    return in_use, idle
@@ -1,14 +1,37 @@
 ﻿import aiohttp
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+from core.cache import AsyncTTLCache
+from clients.http_session import HttpClientSettings, create_client_session, pool_stats
+from clients.resilience import ResilienceLayer, UpstreamServiceError, resilient
+
+
+def destination_key(street: str, city: str, state: str, postalCode: str, country: str) -> Tuple[str, ...]:
+    """Normalised form of a shipping address: case, padding and repeated spaces do not matter."""
+    return tuple(" ".join(str(part or "").split()).casefold() for part in (street, city, state, postalCode, country))
+
 
 class LogisticsServiceClient:
-    def __init__(self, base_url: str):
+    SERVICE_NAME = "logistics"
+
+    def __init__(
+        self,
+        base_url: str,
+        settings: HttpClientSettings = HttpClientSettings(),
+        resilience: Optional[ResilienceLayer] = None,
+        availability_cache: Optional[AsyncTTLCache] = None,
+    ):
         self._base_url = base_url.rstrip("/")
-        self._session: None
+        self._resilience = resilience or ResilienceLayer()
+        self._availability_cache = availability_cache
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._settings = settings
+        self._read_timeout = settings.timeout_for(settings.read_timeout)
+        self._write_timeout = settings.timeout_for(settings.write_timeout)
 
     async def __aenter__(self) -> "LogisticsServiceClient":
-        self._session = aiohttp.ClientSession()
+        self._session = create_client_session(self._settings)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
@@ -17,13 +40,26 @@ class LogisticsServiceClient:
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            self._session = create_client_session(self._settings)
         return self._session
 
+    def pool_stats(self) -> Dict[str, Any]:
+        return pool_stats(self._session)
+
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        return self._resilience.breaker_states()
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self._availability_cache.stats() if self._availability_cache is not None else None
+
+    def clear_cache(self) -> Optional[int]:
+        return self._availability_cache.clear() if self._availability_cache is not None else None
+
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
 
+    @resilient("create_shipment", idempotent=False)
     async def create_shipment(
         self,
         order_id: str,
@@ -52,35 +88,37 @@ class LogisticsServiceClient:
             "country": country,
         }
 
-        async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        async with session.post(url, json=payload, timeout=self._write_timeout) as resp:
             text_body = await resp.text()
             if resp.status != 201:
-                raise RuntimeError(f"Error creating shipment: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error creating shipment: {resp.status} - {text_body}", resp.status)
             if text_body and resp.headers.get("Content-Type", "").startswith("application/json"):
                 return json.loads(text_body)
             return {}
 
+    @resilient("get_shipment", idempotent=True)
     async def get_shipment(self, shipment_id: str) -> Dict[str, Any]:
         session = await self._get_session()
         url = f"{self._base_url}/shipments/{shipment_id}"
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        async with session.get(url, timeout=self._read_timeout) as resp:
             text_body = await resp.text()
             if resp.status == 404:
                 raise ValueError(f"Shipment {shipment_id} not found.")
             elif resp.status != 200:
-                raise RuntimeError(f"Error fetching shipment: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error fetching shipment: {resp.status} - {text_body}", resp.status)
             return await resp.json()
 
+    @resilient("update_shipment", idempotent=True)
     async def update_shipment(self, shipment_id: str, status: str) -> None:
         session = await self._get_session()
         url = f"{self._base_url}/shipments/{shipment_id}/status"
         payload = {"status": status}
-        async with session.patch(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        async with session.patch(url, json=payload, timeout=self._write_timeout) as resp:
             text_body = await resp.text()
             if resp.status == 404:
                 raise ValueError(f"Shipment {shipment_id} not found.")
             elif resp.status != 200:
-                raise RuntimeError(f"Error updating shipment: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error updating shipment: {resp.status} - {text_body}", resp.status)
 
     async def check_availability(
         self,
@@ -89,6 +127,22 @@ class LogisticsServiceClient:
         state: str,
         postalCode: str,
         country: str,
+    ) -> Dict[str, Any]:
+        if self._availability_cache is None:
+            return await self._fetch_availability(street, city, state, postalCode, country)
+        return await self._availability_cache.get_or_load(
+            destination_key(street, city, state, postalCode, country),
+            lambda: self._fetch_availability(street, city, state, postalCode, country),
+        )
+
+    @resilient("check_availability", idempotent=True)
+    async def _fetch_availability(
+        self,
+        street: str,
+        city: str,
+        state: str,
+        postalCode: str,
+        country: str,
     ) -> Dict[str, Any]:
         session = await self._get_session()
         url = f"{self._base_url}/shipping/availability"
@@ -99,14 +153,14 @@ class LogisticsServiceClient:
             "postalCode": postalCode,
             "country": country,
         }
-        async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        async with session.post(url, json=payload, timeout=self._read_timeout) as resp:
             text_body = await resp.text()
             if resp.status == 400:
                 raise ValueError(f"Bad request: {text_body}")
             elif resp.status == 500:
-                raise RuntimeError(f"Server error: {text_body}")
+                raise UpstreamServiceError(f"Server error: {text_body}", resp.status)
             elif resp.status not in (200, 201):
-                raise RuntimeError(f"Unexpected status {resp.status}: {text_body}")
+                raise UpstreamServiceError(f"Unexpected status {resp.status}: {text_body}", resp.status)
             if text_body and resp.headers.get("Content-Type", "").startswith("application/json"):
                 return json.loads(text_body)
             return {}
@@ -1,31 +1,93 @@
-﻿import aiohttp
-from typing import Any, Dict
+﻿import asyncio
+import logging
+import time
+import aiohttp
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from clients.http_session import HttpClientSettings, create_client_session, pool_stats
+from clients.resilience import ResilienceLayer, UpstreamServiceError, resilient
+from core.cache import AsyncTTLCache
+
+
+logger = logging.getLogger("order_service.product_client")
+
+STOCK_ACTIONS = ("reserve", "release", "reduce")
+
+# Statuses with which an upstream without the batch endpoint answers a batch request.
+# A 404 can also be a passing routing error, so the answer is only trusted for a while.
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class StockChange(NamedTuple):
+    product_id: str
+    product_variant_id: Optional[str]
+    quantity: int
 
 
 class ProductServiceClient:
-    def __init__(self, base_url: str):
+    SERVICE_NAME = "product"
+
+    def __init__(
+        self,
+        base_url: str,
+        cache: Optional[AsyncTTLCache] = None,
+        batch_stock: Optional[bool] = None,
+        max_concurrency: int = 10,
+        settings: HttpClientSettings = HttpClientSettings(),
+        resilience: Optional[ResilienceLayer] = None,
+        batch_probe_interval: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._base_url = base_url.rstrip("/")
-        self._session: None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache = cache
+        self._settings = settings
+        self._read_timeout = settings.timeout_for(settings.read_timeout)
+        self._write_timeout = settings.timeout_for(settings.write_timeout)
+        # None means unknown: the first batch request finds out. When it finds
+        # the endpoint missing, it is asked again after batch_probe_interval.
+        self._batch_stock = batch_stock
+        self._batch_supported = batch_stock
+        self._batch_probe_interval = batch_probe_interval
+        self._batch_probe_at: Optional[float] = None
+        self._clock = clock
+        self._max_concurrency = max_concurrency
+        self._resilience = resilience or ResilienceLayer()
 
     async def __aenter__(self) -> "ProductServiceClient":
-        self._session = aiohttp.ClientSession()
+        self._session = create_client_session(self._settings)
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         if self._session and not self._session.closed:
             await self._session.close()
 
+    def pool_stats(self) -> Dict[str, Any]:
+        return pool_stats(self._session)
+
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        return self._resilience.breaker_states()
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self._cache.stats() if self._cache is not None else None
+
     # ---------------- Product Endpoints ----------------
 
     async def get_product(self, product_id: str) -> Dict[str, Any]:
+        if self._cache is None:
+            return await self._fetch_product(product_id)
+        return await self._cache.get_or_load(("product", product_id), lambda: self._fetch_product(product_id))
+
+    @resilient("get_product", idempotent=True)
+    async def _fetch_product(self, product_id: str) -> Dict[str, Any]:
         assert self._session is not None, "Client must be used inside an async context manager"
         url = f"{self._base_url}/products/{product_id}"
-        async with self._session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        async with self._session.get(url, timeout=self._read_timeout) as resp:
             text_body = await resp.text()
             if resp.status == 404:
                 raise ValueError(f"Product {product_id} not found.")
             elif resp.status != 200:
-                raise RuntimeError(f"Error fetching product: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error fetching product: {resp.status} - {text_body}", resp.status)
             try:
                 return await resp.json()
             except Exception as e:
@@ -43,14 +105,20 @@ class ProductServiceClient:
     # ---------------- Variant Endpoints ----------------
 
     async def get_variant(self, variant_id: str) -> Dict[str, Any]:
+        if self._cache is None:
+            return await self._fetch_variant(variant_id)
+        return await self._cache.get_or_load(("variant", variant_id), lambda: self._fetch_variant(variant_id))
+
+    @resilient("get_variant", idempotent=True)
+    async def _fetch_variant(self, variant_id: str) -> Dict[str, Any]:
         assert self._session is not None, "Client must be used inside an async context manager"
         url = f"{self._base_url}/product-variants/{variant_id}"
-        async with self._session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        async with self._session.get(url, timeout=self._read_timeout) as resp:
             text_body = await resp.text()
             if resp.status == 404:
                 raise ValueError(f"Product Variant {variant_id} not found.")
             elif resp.status != 200:
-                raise RuntimeError(f"Error fetching product variant: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error fetching product variant: {resp.status} - {text_body}", resp.status)
             return await resp.json()
 
     async def reserve_variant_stock(self, variant_id: str, quantity: int) -> None:
@@ -62,11 +130,102 @@ class ProductServiceClient:
     async def reduce_variant_stock(self, variant_id: str, quantity: int) -> None:
         await self._modify_stock(f"{self._base_url}/product-variants/{variant_id}/reduce", quantity)
 
+    # ---------------- Batch Stock Endpoints ----------------
+
+    async def modify_stock_many(self, action: str, changes: Iterable[StockChange]) -> None:
+        """Apply one stock action to many products and variants.
+
+        Uses the upstream batch endpoint when it is available, and otherwise
+        issues the single-item calls concurrently. Either way a failed
+        "reserve" leaves nothing reserved.
+        """
+        if action not in STOCK_ACTIONS:
+            raise ValueError(f"Unknown stock action: {action}")
+
+        changes = [change for change in changes if change.quantity > 0]
+        if not changes:
+            return
+
+        if self._batch_enabled() and await self._modify_stock_batch(action, changes):
+            return
+
+        await self._modify_stock_pipelined(action, changes)
+
     # ---------------- Private helper ----------------
 
+    def _batch_enabled(self) -> bool:
+        if self._batch_supported is not False:
+            return True
+        return self._batch_probe_at is not None and self._clock() >= self._batch_probe_at
+
+    def _stock_url(self, change: StockChange, action: str) -> str:
+        if change.product_variant_id:
+            return f"{self._base_url}/product-variants/{change.product_variant_id}/{action}"
+        return f"{self._base_url}/products/{change.product_id}/{action}"
+
+    @resilient("modify_stock_batch", idempotent=False)
+    async def _modify_stock_batch(self, action: str, changes: List[StockChange]) -> bool:
+        assert self._session is not None, "Client must be used inside an async context manager"
+        url = f"{self._base_url}/stock/{action}"
+        payload = {
+            "items": [
+                {
+                    "productId": change.product_id,
+                    "productVariantId": change.product_variant_id,
+                    "quantity": change.quantity,
+                }
+                for change in changes
+            ]
+        }
+        async with self._session.patch(url, json=payload, timeout=self._write_timeout) as resp:
+            text_body = await resp.text()
+            # Once the endpoint has answered, or when it is configured on, these are plain errors.
+            if resp.status in BATCH_UNSUPPORTED_STATUSES and self._batch_stock is None and not self._batch_supported:
+                self._batch_supported = False
+                self._batch_probe_at = self._clock() + self._batch_probe_interval
+                return False
+            if resp.status != 200:
+                raise UpstreamServiceError(f"Error modifying stock at {url}: {resp.status} - {text_body}", resp.status)
+            self._batch_supported = True
+            self._batch_probe_at = None
+            return True
+
+    async def _modify_stock_pipelined(self, action: str, changes: List[StockChange]) -> None:
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def apply(change: StockChange, change_action: str) -> None:
+            async with semaphore:
+                await self._modify_stock(self._stock_url(change, change_action), change.quantity)
+
+        results = await asyncio.gather(
+            *(apply(change, action) for change in changes), return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if not failures:
+            return
+
+        if action == "reserve":
+            # Best effort: a failed release must not mask the reservation error, but it
+            # leaves stock reserved for nothing, so it is logged.
+            applied = [change for change, result in zip(changes, results) if not isinstance(result, BaseException)]
+            releases = await asyncio.gather(*(apply(change, "release") for change in applied), return_exceptions=True)
+            for change, release in zip(applied, releases):
+                if isinstance(release, BaseException):
+                    product_id = change.product_variant_id or change.product_id
+                    logger.error(
+                        "Could not release %s reserved units of product %s after a failed reservation",
+                        change.quantity,
+                        product_id,
+                        exc_info=release,
+                        extra={"product_id": product_id, "quantity": change.quantity},
+                    )
+
+        raise failures[0]
+
+    @resilient("modify_stock", idempotent=False)
     async def _modify_stock(self, url: str, quantity: int) -> None:
         assert self._session is not None, "Client must be used inside an async context manager"
-        async with self._session.patch(url, json={"quantity": quantity}, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        async with self._session.patch(url, json={"quantity": quantity}, timeout=self._write_timeout) as resp:
             text_body = await resp.text()
             if resp.status != 200:
-                raise RuntimeError(f"Error modifying stock at {url}: {resp.status} - {text_body}")
+                raise UpstreamServiceError(f"Error modifying stock at {url}: {resp.status} - {text_body}", resp.status)
@@ -0,0 +1,204 @@
+﻿import asyncio
+import functools
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+from core.metrics import UPSTREAM_REQUEST_DURATION, UPSTREAM_REQUEST_ERRORS
+from core.tracing import tracer
+
+
+# Upstream statuses that signal a temporary condition rather than a bad request.
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class UpstreamServiceError(RuntimeError):
+    """An upstream service answered with an unexpected status."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling upstream while an endpoint's circuit is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, UpstreamServiceError):
+        return error.status in TRANSIENT_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def is_retryable(error: BaseException, idempotent: bool) -> bool:
+    if not is_transient(error):
+        return False
+    # A request that never reached the upstream can be replayed whatever it does.
+    return idempotent or isinstance(error, aiohttp.ClientConnectorError)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def abandon_probe(self) -> None:
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "rejected": self.rejected,
+        }
+
+
+class ResilienceLayer:
+    """Retries and per-endpoint circuit breakers shared by the service clients."""
+
+    def __init__(
+        self,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self._retry_policy = retry_policy
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(self._failure_threshold, self._reset_timeout, self._clock)
+            self._breakers[endpoint] = breaker
+        return breaker
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint: breaker.stats() for endpoint, breaker in self._breakers.items()}
+
+    async def call(self, endpoint: str, operation: Callable[[], Awaitable[Any]], idempotent: bool) -> Any:
+        breaker = self.breaker(endpoint)
+        attempt = 1
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit for {endpoint} is open; upstream calls are suspended.")
+
+            try:
+                result = await operation()
+            except asyncio.CancelledError:
+                breaker.abandon_probe()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # The upstream answered, so it is healthy even if the request was not.
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt >= self._retry_policy.max_attempts or not is_retryable(e, idempotent):
+                    raise
+            else:
+                breaker.record_success()
+                return result
+
+            await self._sleep(self._retry_policy.backoff(attempt))
+            attempt += 1
+
+
+async def _metered_call(client, endpoint: str, operation: Callable[[], Awaitable[Any]], idempotent: bool) -> Any:
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        result = await client._resilience.call(f"{client.SERVICE_NAME}.{endpoint}", operation, idempotent)
+        outcome = "success"
+        return result
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        UPSTREAM_REQUEST_ERRORS.inc(service=client.SERVICE_NAME, method=endpoint, error=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_REQUEST_DURATION.observe(
+            time.perf_counter() - started, service=client.SERVICE_NAME, method=endpoint, outcome=outcome
+        )
+
+
+def resilient(endpoint: str, idempotent: bool):
+    """Route a client method through the client's ResilienceLayer (`self._resilience`).
+
+    Each call, retries included, is timed and failures are counted by error type;
+    inside a trace it also gets a span grouping its attempts.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            operation = lambda: method(self, *args, **kwargs)
+            if tracer.current_span() is None:
+                return await _metered_call(self, endpoint, operation, idempotent)
+            with tracer.span(f"{self.SERVICE_NAME}.{endpoint}"):
+                return await _metered_call(self, endpoint, operation, idempotent)
+        return wrapper
+    return decorator
@@ -1,9 +1,44 @@
 ﻿import os
 
-# Database configuration
+# Database configuration ("sqlite" or "postgresql"; DATABASE_URL overrides both)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "sqlite").lower()
 DATABASE_NAME = os.getenv("DATABASE_NAME", "database.db")
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "storage", DATABASE_NAME)
-DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
+POSTGRES_PORT = int(os.getenv("POSTGRES_PORT", 5432))
+POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+POSTGRES_DB = os.getenv("POSTGRES_DB", "orders")
+
+DATABASE_URLS = {
+    "sqlite": f"sqlite+aiosqlite:///{DATABASE_PATH}",
+    "postgresql": f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+}
+if DATABASE_BACKEND not in DATABASE_URLS:
+    raise ValueError(f"Unsupported DATABASE_BACKEND '{DATABASE_BACKEND}'; expected one of {sorted(DATABASE_URLS)}.")
+DATABASE_URL = os.getenv("DATABASE_URL") or DATABASE_URLS[DATABASE_BACKEND]
+
+# SQL logging: echo prints every statement (development only); slower statements are
+# logged with their fingerprint, and a negative threshold disables that log
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+
+# SQLite pragmas applied to every new connection (WAL lets readers run alongside a writer)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -65536))  # negative values are KiB
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+# Connection pool (server backends only; SQLite keeps SQLAlchemy's defaults)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 20))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", 30))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 1800))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+# Prepared statements cached per asyncpg connection (0 disables, e.g. behind PgBouncer)
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", 100))
 
 # App configuration
 HOST = os.getenv("ORDER_SERVICE_HOST", "0.0.0.0")
@@ -13,3 +48,71 @@ DEBUG = os.getenv("ORDER_SERVICE_DEBUG", "true").lower() == "true"
 # Service URLs
 PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://localhost:5000/api/")
 LOGISTICS_SERVICE_URL = os.getenv("LOGISTICS_SERVICE_URL", "http://localhost:8000/api/")
+
+# Outbound HTTP connection pool (shared settings for the service clients)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 50))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+
+# Per-operation timeouts in seconds (reads are lookups, writes change upstream state)
+PRODUCT_SERVICE_READ_TIMEOUT = float(os.getenv("PRODUCT_SERVICE_READ_TIMEOUT", 10))
+PRODUCT_SERVICE_WRITE_TIMEOUT = float(os.getenv("PRODUCT_SERVICE_WRITE_TIMEOUT", 30))
+LOGISTICS_SERVICE_READ_TIMEOUT = float(os.getenv("LOGISTICS_SERVICE_READ_TIMEOUT", 10))
+LOGISTICS_SERVICE_WRITE_TIMEOUT = float(os.getenv("LOGISTICS_SERVICE_WRITE_TIMEOUT", 10))
+
+# Upstream retries (full-jitter exponential backoff) and per-endpoint circuit breakers
+UPSTREAM_RETRY_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_MAX_ATTEMPTS", 3))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", 0.1))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", 2))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+
+# Product stock updates: "auto" detects the upstream batch endpoint on first use, and
+# looks for it again after the probe interval (seconds) when it was missing
+PRODUCT_SERVICE_BATCH_STOCK = os.getenv("PRODUCT_SERVICE_BATCH_STOCK", "auto").lower()
+PRODUCT_SERVICE_BATCH_PROBE_INTERVAL = float(os.getenv("PRODUCT_SERVICE_BATCH_PROBE_INTERVAL", 300))
+PRODUCT_SERVICE_MAX_CONCURRENCY = int(os.getenv("PRODUCT_SERVICE_MAX_CONCURRENCY", 10))
+
+# Product price cache (a TTL of 0 disables it)
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", 5))
+PRODUCT_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", 10000))
+
+# Shipping serviceability cache, keyed by normalised address (a TTL of 0 disables it)
+AVAILABILITY_CACHE_TTL_SECONDS = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", 3600))
+AVAILABILITY_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("AVAILABILITY_CACHE_NEGATIVE_TTL_SECONDS", 300))
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", 50000))
+
+# Prometheus metrics at /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Tracing: spans of each request, exported as OTLP/JSON to a file or a local collector
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()  # none | file | otlp
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", os.path.join(os.path.dirname(__file__), "storage", "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "order-service")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", 1))
+TRACING_EXPORT_INTERVAL = float(os.getenv("TRACING_EXPORT_INTERVAL", 5))
+TRACING_MAX_QUEUE_SIZE = int(os.getenv("TRACING_MAX_QUEUE_SIZE", 2048))
+
+# Cache-Control sent with ETag'd reads; "no-cache" lets clients keep a copy but revalidate it each time
+READ_CACHE_CONTROL = os.getenv("READ_CACHE_CONTROL", "private, no-cache")
+
+# Order processing
+ORDER_FANOUT_CONCURRENCY = int(os.getenv("ORDER_FANOUT_CONCURRENCY", 10))
+ORDER_PAGE_DEFAULT_LIMIT = int(os.getenv("ORDER_PAGE_DEFAULT_LIMIT", 50))
+ORDER_PAGE_MAX_LIMIT = int(os.getenv("ORDER_PAGE_MAX_LIMIT", 500))
+ORDER_STREAM_CHUNK_SIZE = int(os.getenv("ORDER_STREAM_CHUNK_SIZE", 500))
+ORDER_IMPORT_CHUNK_SIZE = int(os.getenv("ORDER_IMPORT_CHUNK_SIZE", 1000))
+ORDER_STATUS_BATCH_MAX_SIZE = int(os.getenv("ORDER_STATUS_BATCH_MAX_SIZE", 1000))
+
+# Transactional outbox: status-change side effects are committed with the order and
+# applied upstream by a background dispatcher (disabled, they run inside the request)
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_DISPATCH_CONCURRENCY = int(os.getenv("OUTBOX_DISPATCH_CONCURRENCY", 10))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 1))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", 1))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", 300))
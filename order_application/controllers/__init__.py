@@ -1,6 +1,8 @@
 ﻿# controllers/__init__.py
 from .order_controller import order_router
 from .address_controller import address_router
+from .admin_controller import admin_router
+from .metrics_controller import metrics_router
 
 
-__all__ = ["order_router", "address_router"]
+__all__ = ["order_router", "address_router", "admin_router", "metrics_router"]
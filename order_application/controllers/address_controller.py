@@ -1,12 +1,15 @@
 ﻿
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.schemas.address import AddressCreateSchema
 from models.schemas.address import AddressUpdateSchema
 from models.schemas.address import AddressReadSchema
 
+from config import READ_CACHE_CONTROL
+from core.concurrency import ConcurrencyConflictError, PreconditionFailedError
 from core.dependencies import get_database, get_address_service
+from core.etag import cache_headers, entity_tag, etag_matches, not_modified, parse_if_match, version_tag
 from services import AddressService
 
 address_router = APIRouter(
@@ -35,11 +38,21 @@ async def create_address(
 
 @address_router.get("/", response_model=list[AddressReadSchema])
 async def get_all_addresses(
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_database),
     service: AddressService = Depends(get_address_service),
 ):
     try:
-        return await service.GetAllAsync(session=session)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            etag = entity_tag(await service.GetAllVersionsAsync(session=session))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, READ_CACHE_CONTROL)
+
+        addresses = await service.GetAllAsync(session=session)
+        response.headers.update(cache_headers(entity_tag(addresses), READ_CACHE_CONTROL))
+        return addresses
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -51,13 +64,24 @@ async def get_all_addresses(
 @address_router.get("/{id}", response_model=AddressReadSchema)
 async def get_address_by_id(
     id: str,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_database),
     service: AddressService = Depends(get_address_service),
 ):
     try:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            version = await service.GetVersionAsync(id, session=session)
+            if version is not None:
+                etag = version_tag(version.version)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag, READ_CACHE_CONTROL)
+
         dto = await service.GetByIdAsync(id, session=session)
         if dto is None:
             raise HTTPException(status_code=404, detail="Address not found")
+        response.headers.update(cache_headers(version_tag(dto.version), READ_CACHE_CONTROL))
         return dto
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -67,17 +91,26 @@ async def get_address_by_id(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@address_router.put("/{id}", status_code=status.HTTP_200_OK)
+@address_router.put("/{id}", response_model=AddressReadSchema, status_code=status.HTTP_200_OK)
 async def update_address(
     id: str,
     address_data: AddressUpdateSchema,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_database),
     service: AddressService = Depends(get_address_service),
 ):
     try:
-        success = await service.UpdateAsync(id, address_data, session=session)
-        if not success:
+        expected_version = parse_if_match(request.headers.get("if-match"))
+        updated = await service.UpdateAsync(id, address_data, session=session, expected_version=expected_version)
+        if not updated:
             raise HTTPException(status_code=404, detail="Address not found")
+        response.headers["ETag"] = version_tag(updated.version)
+        return updated
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ConcurrencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -91,13 +124,19 @@ async def update_address(
 @address_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_address(
     id: str,
+    request: Request,
     session: AsyncSession = Depends(get_database),
     service: AddressService = Depends(get_address_service),
 ):
     try:
-        deleted = await service.DeleteAsync(id, session=session)
+        expected_version = parse_if_match(request.headers.get("if-match"))
+        deleted = await service.DeleteAsync(id, session=session, expected_version=expected_version)
         if not deleted:
             raise HTTPException(status_code=404, detail="Address not found")
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ConcurrencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
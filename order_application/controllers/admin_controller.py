@@ -0,0 +1,96 @@
+﻿from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import DatabaseRegistry
+from core.dependencies import get_product_client, get_logistics_client, get_query_logger, get_database_registry
+from core.dependencies import get_startup_timer, get_database, get_outbox_repository
+from core.query_log import SlowQueryLogger
+from core.startup import StartupTimer
+from core.tracing import tracer
+from clients import ProductServiceClient, LogisticsServiceClient
+from repositories import OutboxRepository
+
+admin_router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+)
+
+
+@admin_router.get("/caches")
+async def get_cache_stats(
+    product_client: ProductServiceClient = Depends(get_product_client),
+    logistics_client: LogisticsServiceClient = Depends(get_logistics_client),
+):
+    return {
+        "product": product_client.cache_stats(),
+        "logistics": logistics_client.cache_stats(),
+    }
+
+
+@admin_router.delete("/caches/logistics")
+async def clear_availability_cache(
+    logistics_client: LogisticsServiceClient = Depends(get_logistics_client),
+):
+    cleared = logistics_client.clear_cache()
+    if cleared is None:
+        raise HTTPException(status_code=404, detail="Serviceability cache is disabled")
+    return {"cleared": cleared}
+
+
+@admin_router.get("/http-pools")
+async def get_http_pool_stats(
+    product_client: ProductServiceClient = Depends(get_product_client),
+    logistics_client: LogisticsServiceClient = Depends(get_logistics_client),
+):
+    return {
+        "product": product_client.pool_stats(),
+        "logistics": logistics_client.pool_stats(),
+    }
+
+
+@admin_router.get("/circuits")
+async def get_circuit_states(
+    product_client: ProductServiceClient = Depends(get_product_client),
+    logistics_client: LogisticsServiceClient = Depends(get_logistics_client),
+):
+    return {
+        "product": product_client.circuit_states(),
+        "logistics": logistics_client.circuit_states(),
+    }
+
+
+@admin_router.get("/db-pool")
+async def get_database_pool_stats(
+    database: DatabaseRegistry = Depends(get_database_registry),
+):
+    return database.pool_stats()
+
+
+@admin_router.get("/queries")
+async def get_query_stats(
+    query_logger: SlowQueryLogger = Depends(get_query_logger),
+):
+    return {
+        "slow_query_threshold_ms": query_logger.threshold_ms,
+        "statements": query_logger.stats(),
+    }
+
+
+@admin_router.get("/startup")
+async def get_startup_timings(
+    startup: StartupTimer = Depends(get_startup_timer),
+):
+    return startup.report()
+
+
+@admin_router.get("/tracing")
+async def get_tracing_stats():
+    return tracer.stats()
+
+
+@admin_router.get("/outbox")
+async def get_outbox_stats(
+    session: AsyncSession = Depends(get_database),
+    outbox_repository: OutboxRepository = Depends(get_outbox_repository),
+):
+    return await outbox_repository.CountByStatusAsync(session=session)
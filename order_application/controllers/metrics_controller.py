@@ -0,0 +1,10 @@
+﻿from fastapi import APIRouter, Response
+
+from core.metrics import CONTENT_TYPE, registry
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
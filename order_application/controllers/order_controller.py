@@ -1,11 +1,28 @@
-﻿
-from fastapi import APIRouter, Depends, HTTPException, status
+﻿from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import ORDER_PAGE_DEFAULT_LIMIT, ORDER_PAGE_MAX_LIMIT, ORDER_STREAM_CHUNK_SIZE, ORDER_IMPORT_CHUNK_SIZE
+from config import ORDER_STATUS_BATCH_MAX_SIZE, READ_CACHE_CONTROL
+from core.bulk_import import parse_csv, parse_ndjson
+from core.concurrency import ConcurrencyConflictError, PreconditionFailedError
+from core.etag import cache_headers, entity_tag, etag_matches, not_modified, parse_if_match, version_tag
+from core.pagination import InvalidCursorError
+from core.serialization import ORJSONResponse, dumps
+from models.dtos.order import OrderFilterDTO
+from models.enums import OrderStatus
+
 from models.schemas.order import OrderCreateSchema
 from models.schemas.order import OrderUpdateSchema
 from models.schemas.order import OrderReadSchema
 from models.schemas.order import OrderPatchSchema
+from models.schemas.order import OrderImportResultSchema
+from models.schemas.order import OrderBatchPatchSchema
+from models.schemas.order import OrderBatchPatchResultSchema
+from models.schemas.order import order_read_payload
 
 from core.dependencies import get_database, get_order_service
 from services.order_service_impl import OrderService
@@ -24,7 +41,8 @@ async def create_order(
     service: OrderService = Depends(get_order_service),
 ):
     try:
-        return await service.CreateAsync(data, session=session)
+        created = await service.CreateAsync(data, session=session)
+        return ORJSONResponse(order_read_payload(created), status_code=status.HTTP_201_CREATED)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -33,13 +51,54 @@ async def create_order(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@order_router.get("/", response_model=list[OrderReadSchema])
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@order_router.get(
+    "/",
+    response_model=list[OrderReadSchema],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
 async def get_all_orders(
+    request: Request,
+    limit: int = Query(ORDER_PAGE_DEFAULT_LIMIT, ge=1, le=ORDER_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="Opaque cursor taken from the X-Next-Cursor header"),
+    customer_id: Optional[str] = Query(None),
+    order_status: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
     session: AsyncSession = Depends(get_database),
     service: OrderService = Depends(get_order_service),
 ):
+    filters = OrderFilterDTO(
+        customer_id=customer_id,
+        status=order_status,
+        created_from=created_from,
+        created_to=created_to,
+    )
     try:
-        return await service.GetAllAsync(session=session)
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            records = service.StreamAsync(ORDER_STREAM_CHUNK_SIZE, cursor=cursor, filters=filters)
+            return StreamingResponse(
+                (dumps(order_read_payload(dto)) + b"\n" async for dto in records),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+
+        # A revalidating client is answered from the ids and timestamps of the page alone.
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            versions, has_more = await service.GetPageVersionsAsync(limit, session=session, cursor=cursor, filters=filters)
+            etag = entity_tag(versions, has_more)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, READ_CACHE_CONTROL)
+
+        page, next_cursor = await service.GetPageAsync(limit, session=session, cursor=cursor, filters=filters)
+        headers = cache_headers(entity_tag(page, next_cursor is not None), READ_CACHE_CONTROL)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return ORJSONResponse([order_read_payload(dto) for dto in page], headers=headers)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -48,18 +107,80 @@ async def get_all_orders(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+IMPORT_PARSERS = {
+    NDJSON_MEDIA_TYPE: parse_ndjson,
+    "text/csv": parse_csv,
+}
+
+
+@order_router.post(
+    "/import",
+    response_model=OrderImportResultSchema,
+    openapi_extra={"requestBody": {"content": {media_type: {} for media_type in IMPORT_PARSERS}, "required": True}},
+)
+async def import_orders(
+    request: Request,
+    session: AsyncSession = Depends(get_database),
+    service: OrderService = Depends(get_order_service),
+):
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = IMPORT_PARSERS.get(media_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type; use one of {', '.join(IMPORT_PARSERS)}.",
+        )
+
+    try:
+        return await service.ImportAsync(parser(request.stream()), session=session, chunk_size=ORDER_IMPORT_CHUNK_SIZE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@order_router.post("/status:batch", response_model=OrderBatchPatchResultSchema)
+async def patch_order_status_batch(
+    data: OrderBatchPatchSchema,
+    session: AsyncSession = Depends(get_database),
+    service: OrderService = Depends(get_order_service),
+):
+    if len(data.order_ids) > ORDER_STATUS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {ORDER_STATUS_BATCH_MAX_SIZE} orders can be moved per request.",
+        )
+
+    try:
+        return await service.BatchPatchAsync(data, session=session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @order_router.get("/{id}", response_model=OrderReadSchema)
 async def get_order_by_id(
     id: str,
+    request: Request,
     session: AsyncSession = Depends(get_database),
     service: OrderService = Depends(get_order_service),
 ):
     try:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            version = await service.GetVersionAsync(id, session=session)
+            if version is not None:
+                etag = version_tag(version.version)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag, READ_CACHE_CONTROL)
+
         dto = await service.GetByIdAsync(id, session=session)
         if dto is None:
             raise HTTPException(status_code=404, detail="Record not found")
-        return dto
+        return ORJSONResponse(order_read_payload(dto), headers=cache_headers(version_tag(dto.version), READ_CACHE_CONTROL))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -68,20 +189,26 @@ async def get_order_by_id(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-
-
 @order_router.put("/{id}", status_code=status.HTTP_200_OK)
 async def update_order(
     id: str,
     data: OrderUpdateSchema,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_database),
     service: OrderService = Depends(get_order_service),
 ):
     try:
-        entity = await service.UpdateAsync(id, data, session=session)
+        expected_version = parse_if_match(request.headers.get("if-match"))
+        entity = await service.UpdateAsync(id, data, session=session, expected_version=expected_version)
         if not entity:
             raise HTTPException(status_code=404, detail="Record not found")
+        response.headers["ETag"] = version_tag(entity.version)
         return entity
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ConcurrencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -90,19 +217,22 @@ async def update_order(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-
-
-
 @order_router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_order(
     id: str,
+    request: Request,
     session: AsyncSession = Depends(get_database),
     service: OrderService = Depends(get_order_service),
 ):
     try:
-        deleted = await service.DeleteAsync(id, session=session)
+        expected_version = parse_if_match(request.headers.get("if-match"))
+        deleted = await service.DeleteAsync(id, session=session, expected_version=expected_version)
         if not deleted:
             raise HTTPException(status_code=404, detail="Record not found")
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ConcurrencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -111,20 +241,25 @@ async def delete_order(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-
-
 @order_router.patch("/{id}/status", response_model=OrderReadSchema)
 async def patch_order_status(
     id: str,
     data: OrderPatchSchema,
+    request: Request,
     session: AsyncSession = Depends(get_database),
     service: OrderService = Depends(get_order_service),
 ):
     try:
-        updated = await service.PatchAsync(id, data, session=session)
+        # Without If-Match the change still fails with 409 if the order moved on while it was being applied.
+        expected_version = parse_if_match(request.headers.get("if-match"))
+        updated = await service.PatchAsync(id, data, session=session, expected_version=expected_version)
         if not updated:
             raise HTTPException(status_code=404, detail="Record not found")
-        return await service.GetByIdAsync(id, session=session)
+        return ORJSONResponse(order_read_payload(updated), headers={"ETag": version_tag(updated.version)})
+    except PreconditionFailedError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    except ConcurrencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -1,3 +1,3 @@
-﻿from .database import async_engine, async_session_factory
+﻿from .database import DatabaseRegistry, create_database_engine, DatabaseSettings, SqlitePragmas
 
-__all__ = ["async_engine", "async_session_factory"]
+__all__ = ["DatabaseRegistry", "create_database_engine", "DatabaseSettings", "SqlitePragmas"]
@@ -0,0 +1,89 @@
+﻿import codecs
+import csv
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, NamedTuple, Optional
+
+
+class ImportRecord(NamedTuple):
+    """One order read from an upload: its parsed fields, or why it could not be parsed."""
+    row: int
+    data: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+# CSV uploads carry one line per order item; the order columns repeat on each of its lines.
+CSV_ORDER_COLUMNS = ("order_id", "customer_id", "created_at", "updated_at", "status", "shipment_id", "total_amount")
+CSV_ITEM_COLUMNS = ("item_id", "product_id", "product_variant_id", "quantity", "unit_price")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines without holding more than one line in memory."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[ImportRecord]:
+    row = 0
+    async for line in iter_lines(chunks):
+        row += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield ImportRecord(row, None, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield ImportRecord(row, None, "Expected a JSON object per line.")
+            continue
+        yield ImportRecord(row, data)
+
+
+async def parse_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[ImportRecord]:
+    """Group consecutive lines sharing an order_id into one order record.
+
+    Fields may be quoted but must not span lines. Empty fields are read as missing.
+    Raises ValueError when the header lacks a required column, as no row could be read.
+    """
+    header: Optional[List[str]] = None
+    current: Optional[ImportRecord] = None
+    row = 0
+
+    async for line in iter_lines(chunks):
+        row += 1
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            missing = {"order_id", "customer_id", "product_id", "quantity", "unit_price"} - set(header)
+            if missing:
+                raise ValueError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            continue
+
+        fields = {name: value for name, value in zip(header, values) if value != ""}
+        if len(values) != len(header):
+            yield ImportRecord(row, None, f"Expected {len(header)} columns, found {len(values)}.")
+            continue
+
+        item = {column.replace("item_id", "id"): fields[column] for column in CSV_ITEM_COLUMNS if column in fields}
+        order_id = fields.get("order_id")
+        if current is not None and order_id is not None and current.data.get("id") == order_id:
+            current.data["items"].append(item)
+            continue
+
+        if current is not None:
+            yield current
+        order = {column.replace("order_id", "id"): fields[column] for column in CSV_ORDER_COLUMNS if column in fields}
+        current = ImportRecord(row, {**order, "items": [item]})
+
+    if current is not None:
+        yield current
@@ -0,0 +1,118 @@
+﻿import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class AsyncTTLCache:
+    """In-process read-through cache with a TTL, an LRU size bound and
+    single-flight loading: concurrent misses on the same key share one load.
+
+    Failed loads are not cached. `ttl_for` may give some values a different
+    TTL than `ttl_seconds`, e.g. a shorter one for negative results.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+        ttl_for: Optional[Callable[[Any], float]] = None,
+    ):
+        if ttl_seconds <= 0:
+            raise ValueError("Cache TTL must be greater than zero.")
+        if max_entries < 1:
+            raise ValueError("Cache size must be at least one entry.")
+
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._ttl_for = ttl_for
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # The loading caller was cancelled, not us: try again.
+                if in_flight.cancelled():
+                    continue
+                raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        self.set(key, value)
+        future.set_result(value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        ttl_seconds = self._ttl_for(value) if self._ttl_for is not None else self._ttl_seconds
+        if ttl_seconds <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (self._clock() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> int:
+        cleared = len(self._entries)
+        self._entries.clear()
+        return cleared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "ttl_seconds": self._ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
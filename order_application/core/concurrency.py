@@ -0,0 +1,14 @@
+﻿class ConcurrencyConflictError(Exception):
+    """Raised when a record changed between being read and being written back."""
+
+
+class PreconditionFailedError(Exception):
+    """Raised when a write names a version (If-Match) that is not the record's current one."""
+
+
+def check_version(record, expected_version) -> None:
+    """Fail unless the loaded record is at the version the caller last saw; None skips the check."""
+    if expected_version is not None and record.version != expected_version:
+        raise PreconditionFailedError(
+            f"Record {record.id} is at version {record.version}, not {expected_version}."
+        )
@@ -1,18 +1,200 @@
-﻿from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+﻿from dataclasses import dataclass
 from pathlib import Path
-from config import DATABASE_URL
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from config import DATABASE_URL, DATABASE_ECHO, SLOW_QUERY_THRESHOLD_MS
+from config import DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT, DATABASE_POOL_RECYCLE
+from config import DATABASE_POOL_PRE_PING, DATABASE_STATEMENT_CACHE_SIZE
+from config import SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE
+from config import SQLITE_TEMP_STORE, SQLITE_BUSY_TIMEOUT_MS
+from core.metrics import Histogram, install_pool_timing
+from core.query_log import SlowQueryLogger
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+
+
+DEFAULT_DATABASE_SETTINGS = DatabaseSettings(
+    pool_size=DATABASE_POOL_SIZE,
+    max_overflow=DATABASE_MAX_OVERFLOW,
+    pool_timeout=DATABASE_POOL_TIMEOUT,
+    pool_recycle=DATABASE_POOL_RECYCLE,
+    pool_pre_ping=DATABASE_POOL_PRE_PING,
+    statement_cache_size=DATABASE_STATEMENT_CACHE_SIZE,
+)
+
 
-# --- Ensure storage directory exists ---
-db_path = Path(DATABASE_URL.replace("sqlite+aiosqlite:///", ""))
-db_path.parent.mkdir(parents=True, exist_ok=True)
+@dataclass(frozen=True)
+class SqlitePragmas:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 268435456
+    cache_size: int = -65536
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
 
-# --- Create async engine ---
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+    def statements(self):
+        # busy_timeout first, so switching the journal mode waits out other connections.
+        return [
+            f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}",
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={int(self.mmap_size)}",
+            f"PRAGMA cache_size={int(self.cache_size)}",
+            f"PRAGMA temp_store={self.temp_store}",
+        ]
 
-# --- Create async session factory ---
-async_session_factory = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False
+
+DEFAULT_SQLITE_PRAGMAS = SqlitePragmas(
+    journal_mode=SQLITE_JOURNAL_MODE,
+    synchronous=SQLITE_SYNCHRONOUS,
+    mmap_size=SQLITE_MMAP_SIZE,
+    cache_size=SQLITE_CACHE_SIZE,
+    temp_store=SQLITE_TEMP_STORE,
+    busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS,
 )
+
+
+# Shared by the application's engines so their statement histograms add up.
+slow_query_logger = SlowQueryLogger(SLOW_QUERY_THRESHOLD_MS)
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, pragmas: SqlitePragmas = DEFAULT_SQLITE_PRAGMAS) -> None:
+    """Apply `pragmas` to every connection the engine opens."""
+    statements = pragmas.statements()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def engine_options(database_url: str, settings: DatabaseSettings = DEFAULT_DATABASE_SETTINGS) -> Dict[str, Any]:
+    """Keyword arguments for `create_async_engine` suited to the URL's backend."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite serialises access through one thread per connection, so
+        # pool sizing buys nothing; SQLAlchemy picks the right pool class.
+        return {}
+
+    options: Dict[str, Any] = {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"prepared_statement_cache_size": settings.statement_cache_size}
+    return options
+
+
+def ensure_storage(database_url: str) -> None:
+    """Create the directory of a file-backed SQLite database."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+
+
+def create_database_engine(
+    database_url: str = DATABASE_URL,
+    settings: DatabaseSettings = DEFAULT_DATABASE_SETTINGS,
+    echo: bool = DATABASE_ECHO,
+    sqlite_pragmas: Optional[SqlitePragmas] = DEFAULT_SQLITE_PRAGMAS,
+    query_logger: Optional[SlowQueryLogger] = None,
+) -> AsyncEngine:
+    """Create the async engine; pass `sqlite_pragmas=None` to keep SQLite's own defaults."""
+    ensure_storage(database_url)
+    engine = create_async_engine(database_url, echo=echo, future=True, **engine_options(database_url, settings))
+    if sqlite_pragmas is not None and engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(engine, sqlite_pragmas)
+    if query_logger is not None:
+        query_logger.install(engine)
+    return engine
+
+
+class DatabaseRegistry:
+    """Owns the application's single engine and session factory.
+
+    The lifespan starts it and disposes it; repositories, request sessions and
+    seeding all draw from the same connection pool.
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        settings: DatabaseSettings = DEFAULT_DATABASE_SETTINGS,
+        query_logger: Optional[SlowQueryLogger] = slow_query_logger,
+        connection_hold_histogram: Optional[Histogram] = None,
+        **engine_kwargs: Any,
+    ):
+        self.database_url = database_url
+        self._settings = settings
+        self._query_logger = query_logger
+        self._connection_hold_histogram = connection_hold_histogram
+        self._engine_kwargs = engine_kwargs
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[sessionmaker] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            raise RuntimeError("Database registry has not been started.")
+        return self._engine
+
+    @property
+    def session_factory(self) -> sessionmaker:
+        if self._session_factory is None:
+            raise RuntimeError("Database registry has not been started.")
+        return self._session_factory
+
+    def start(self) -> "DatabaseRegistry":
+        if self._engine is None:
+            self._engine = create_database_engine(
+                self.database_url, self._settings, query_logger=self._query_logger, **self._engine_kwargs
+            )
+            if self._connection_hold_histogram is not None:
+                install_pool_timing(self._engine, self._connection_hold_histogram)
+            self._session_factory = sessionmaker(bind=self._engine, class_=AsyncSession, expire_on_commit=False)
+        return self
+
+    async def dispose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+        self._engine = None
+        self._session_factory = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        # Only queue pools keep a bounded set of connections to report on.
+        if hasattr(pool, "checkedout"):
+            size, checked_out = pool.size(), pool.checkedout()
+            # The pool keeps its overflow limit private, so report the configured one;
+            # None when the backend sizes its own pool (SQLite).
+            max_overflow = engine_options(self.database_url, self._settings).get("max_overflow")
+            stats.update({
+                "size": size,
+                "max_overflow": max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": checked_out,
+                "overflow": max(pool.overflow(), 0),
+                "utilization": round(checked_out / (size + max(max_overflow or 0, 0)), 3) if size else None,
+            })
+        return stats
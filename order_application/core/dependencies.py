@@ -1,14 +1,19 @@
 ﻿from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core import async_session_factory
-from repositories import OrderRepository, AddressRepository
+from repositories import OrderRepository, AddressRepository, OutboxRepository
 from services import OrderService, AddressService
 from clients import ProductServiceClient, LogisticsServiceClient
+from core.database import DatabaseRegistry
+from core.query_log import SlowQueryLogger
+from core.startup import StartupTimer
 
-# --- Database Session Dependency ---
-async def get_database() -> AsyncSession:
-    async with async_session_factory() as session:
+# --- Database Dependencies ---
+def get_database_registry(request: Request) -> DatabaseRegistry:
+    return request.app.state.database
+
+async def get_database(request: Request) -> AsyncSession:
+    async with request.app.state.database.session_factory() as session:
         yield session
 
 # --- Repository Dependencies ---
@@ -18,6 +23,9 @@ def get_order_repository(request: Request) -> OrderRepository:
 def get_address_repository(request: Request) -> AddressRepository:
     return request.app.state.address_repository
 
+def get_outbox_repository(request: Request) -> OutboxRepository:
+    return request.app.state.outbox_repository
+
 # --- Client Dependencies ---
 def get_product_client(request: Request) -> ProductServiceClient:
     return request.app.state.product_client
@@ -25,6 +33,13 @@ def get_product_client(request: Request) -> ProductServiceClient:
 def get_logistics_client(request: Request) -> LogisticsServiceClient:
     return request.app.state.logistics_client
 
+# --- Diagnostics Dependencies ---
+def get_query_logger(request: Request) -> SlowQueryLogger:
+    return request.app.state.query_logger
+
+def get_startup_timer(request: Request) -> StartupTimer:
+    return request.app.state.startup
+
 # --- Service Dependencies ---
 def get_order_service(request: Request) -> OrderService:
     return request.app.state.order_service
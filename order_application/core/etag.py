@@ -0,0 +1,53 @@
+﻿import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response, status
+
+from core.concurrency import PreconditionFailedError
+
+
+def version_tag(version: int) -> str:
+    """Strong ETag of a single record: its version, which is what If-Match hands back on writes."""
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """The record version named by an If-Match header; None when absent or `*` (any version)."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise PreconditionFailedError(f"If-Match must be a version ETag such as '\"1\"', got '{if_match}'.")
+
+
+def entity_tag(records: Iterable[Any], *extra: Any) -> str:
+    """Weak ETag over the id and version of each record (entities, read DTOs or version rows alike).
+
+    Records are hashed in id order, so a list read in an unspecified order
+    gets the same tag as long as the same records are in it.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for record in sorted(records, key=lambda record: record.id):
+        digest.update(f"{record.id}@{record.version};".encode("utf-8"))
+    for value in extra:
+        digest.update(f"{value};".encode("utf-8"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, cache_control))
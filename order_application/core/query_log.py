@@ -0,0 +1,133 @@
+﻿import bisect
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+logger = logging.getLogger("order_service.slow_query")
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket is open-ended.
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Distinct fingerprints tracked before new ones are folded into OTHER_FINGERPRINT.
+MAX_FINGERPRINTS = 1000
+OTHER_FINGERPRINT = "<other>"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAMETER = re.compile(r"\?|%\(\w+\)s|%s|:\w+|\$\d+|__\[POSTCOMPILE_\w+\]")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalise a statement so that executions differing only in values share one key."""
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _BIND_PARAMETER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class LatencyHistogram:
+    """Bucketed durations in the unit of the bounds; the slow query log observes milliseconds."""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self._bounds = tuple(sorted(buckets_ms))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, duration: float) -> None:
+        self._counts[bisect.bisect_left(self._bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """Each upper bound, +Inf last, with the observations at or below it."""
+        running = 0
+        for bound, observed in zip(self._bounds + (float("inf"),), self._counts):
+            running += observed
+            yield bound, running
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self._bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+class SlowQueryLogger:
+    """Times every statement of the engines it is installed on.
+
+    Each statement feeds a per-fingerprint latency histogram; statements slower than
+    `threshold_ms` are also logged with their duration, fingerprint and row count.
+    A negative threshold keeps the histograms but never logs.
+    """
+
+    def __init__(self, threshold_ms: float = 100, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.threshold_ms = threshold_ms
+        self._buckets_ms = tuple(buckets_ms)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def install(self, engine: AsyncEngine) -> None:
+        target = engine.sync_engine
+        event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(target, "handle_error", self._handle_error)
+
+    def observe(self, statement: str, duration_ms: float, rowcount: int) -> None:
+        key = fingerprint(statement)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            if len(self._histograms) >= MAX_FINGERPRINTS:
+                key = OTHER_FINGERPRINT
+                histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self._buckets_ms)
+        histogram.observe(duration_ms)
+
+        if 0 <= self.threshold_ms <= duration_ms:
+            logger.warning(
+                "Slow query: %.1f ms, %s rows: %s",
+                duration_ms,
+                rowcount,
+                key,
+                extra={"duration_ms": round(duration_ms, 3), "fingerprint": key, "rowcount": rowcount},
+            )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Histogram snapshots, most expensive fingerprint first."""
+        ranked = sorted(self._histograms.items(), key=lambda item: item[1].total, reverse=True)
+        return {key: histogram.snapshot() for key, histogram in ranked}
+
+    def reset(self) -> None:
+        self._histograms.clear()
+
+    # ---------------- Event handlers ----------------
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start_times"].pop()
+        self.observe(statement, (time.perf_counter() - started) * 1000, cursor.rowcount)
+
+    @staticmethod
+    def _handle_error(exception_context):
+        start_times = exception_context.connection.info.get("query_start_times") if exception_context.connection else None
+        if start_times:
+            start_times.pop()
@@ -0,0 +1,31 @@
+﻿from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    # Decimals are written as strings, as pydantic does, so amounts keep their exact digits.
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise to compact JSON; UTC datetimes end in `Z` like pydantic's."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Returned from an endpoint, it skips FastAPI's response_model validation and
+    jsonable_encoder, so the content must already have the documented shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,34 @@
+﻿import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+
+logger = logging.getLogger("order_service.startup")
+
+
+class StartupTimer:
+    """Records how long each named startup phase takes, in milliseconds."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._started = clock()
+        self.phases: Dict[str, float] = {}
+        self.total_ms: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((self._clock() - started) * 1000, 3)
+            logger.info("Startup phase %s took %.1f ms", name, self.phases[name],
+                        extra={"phase": name, "duration_ms": self.phases[name]})
+
+    def finish(self) -> None:
+        self.total_ms = round((self._clock() - self._started) * 1000, 3)
+        logger.info("Startup finished in %.1f ms", self.total_ms, extra={"duration_ms": self.total_ms})
+
+    def report(self) -> Dict[str, object]:
+        return {"phases_ms": dict(self.phases), "total_ms": self.total_ms}
@@ -0,0 +1,424 @@
+﻿import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import random
+import re
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiohttp
+
+
+logger = logging.getLogger("order_service.tracing")
+
+# W3C Trace Context header, understood by OpenTelemetry SDKs and collectors.
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds.
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# OTLP status codes.
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Read a `traceparent` header; malformed or all-zero ids are ignored as the spec requires."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_span_id: Optional[str] = None,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = str(error)[:500]
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = self.status_message
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span in OTLP/JSON form, as both exporters write it."""
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status_message else {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON span per line to a file."""
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(span, separators=(",", ":")) + "\n" for span in spans)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("a", encoding="utf-8") as file:
+            file.write(lines)
+
+    async def close(self) -> None:
+        pass
+
+
+class OtlpHttpSpanExporter:
+    """Posts spans to an OpenTelemetry collector's OTLP/HTTP JSON endpoint (e.g. http://localhost:4318/v1/traces)."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5):
+        self._endpoint = endpoint
+        self._service_name = service_name
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        # A plain session of its own: exporting must not produce spans of its own.
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def export(self, spans: List[Dict[str, Any]]) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self._service_name}}]},
+                "scopeSpans": [{"scope": {"name": "order_service"}, "spans": spans}],
+            }]
+        }
+        async with self._session.post(self._endpoint, json=payload) as resp:
+            if resp.status >= 300:
+                raise RuntimeError(f"Collector rejected {len(spans)} spans: {resp.status} - {await resp.text()}")
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Records spans for the current request and hands finished ones to an exporter.
+
+    Disabled until configured with an exporter; a disabled tracer neither records
+    spans nor propagates trace context. Finished spans wait in a bounded queue
+    (the oldest are dropped when it is full) and are exported in batches by a
+    background task.
+    """
+
+    def __init__(self):
+        self._exporter = None
+        self._sample_ratio = 1.0
+        self._export_interval = 5.0
+        self._queue: deque = deque(maxlen=2048)
+        self._task: Optional[asyncio.Task] = None
+        self.exported = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._exporter is not None
+
+    def configure(self, exporter, sample_ratio: float = 1.0, max_queue_size: int = 2048, export_interval: float = 5) -> None:
+        if not 0 <= sample_ratio <= 1:
+            raise ValueError("Sample ratio must be between 0 and 1.")
+        self._exporter = exporter
+        self._sample_ratio = sample_ratio
+        self._export_interval = export_interval
+        self._queue = deque(maxlen=max_queue_size)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> Optional[Span]:
+        """Start a span under `parent` (default: the current span) without making it current."""
+        if not self.enabled:
+            return None
+
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+
+        if parent is None:
+            trace_id, sampled = secrets.token_hex(16), random.random() < self._sample_ratio
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+
+        context = SpanContext(trace_id, secrets.token_hex(8), sampled)
+        return Span(name, context, parent.span_id if parent else None, kind, attributes)
+
+    def end_span(self, span: Optional[Span], error: Optional[BaseException] = None) -> None:
+        if span is None:
+            return
+        if error is not None:
+            span.record_exception(error)
+        span.end()
+        if span.context.sampled:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(span)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> Iterator[Optional[Span]]:
+        """Run the block inside a new span, which is current until the block ends."""
+        span = self.start_span(name, kind, attributes, parent)
+        if span is None:
+            yield None
+            return
+
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Ended in another context (an async generator resumed elsewhere).
+                _current_span.set(None)
+            self.end_span(span, error)
+
+    def inject(self, headers, span: Optional[Span] = None) -> None:
+        """Add the `traceparent` header for `span` (default: the current span) to outgoing headers."""
+        span = span or _current_span.get()
+        if span is not None:
+            headers[TRACEPARENT_HEADER] = span.context.traceparent()
+
+    async def flush(self) -> int:
+        """Export every queued span; returns how many were exported."""
+        if self._exporter is None or not self._queue:
+            return 0
+
+        spans = [self._queue.popleft().to_otlp() for _ in range(len(self._queue))]
+        try:
+            await self._exporter.export(spans)
+        except Exception as e:
+            self.dropped += len(spans)
+            logger.warning("Dropped %d spans: %s", len(spans), e)
+            return 0
+
+        self.exported += len(spans)
+        return len(spans)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._export_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the export task, export what is left and switch tracing off."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        if self._exporter is not None:
+            await self._exporter.close()
+        self._exporter = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "queued": len(self._queue), "exported": self.exported, "dropped": self.dropped}
+
+
+# Process-wide tracer, configured by the application lifespan.
+tracer = Tracer()
+
+
+def traced(name: str, kind: int = INTERNAL):
+    """Wrap an async function or async generator in a span called `name`.
+
+    Spans are only recorded inside an existing trace, so background polling
+    does not start a trace of its own on every call.
+    """
+    def decorator(function):
+        if inspect.isasyncgenfunction(function):
+            @functools.wraps(function)
+            async def generator_wrapper(*args, **kwargs):
+                if tracer.current_span() is None:
+                    async for item in function(*args, **kwargs):
+                        yield item
+                    return
+                with tracer.span(name, kind):
+                    async for item in function(*args, **kwargs):
+                        yield item
+            return generator_wrapper
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if tracer.current_span() is None:
+                return await function(*args, **kwargs)
+            with tracer.span(name, kind):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(cls):
+    """Class decorator: wrap each public async method in a span named `Class.Method`."""
+    for attribute, value in list(vars(cls).items()):
+        if attribute.startswith("_"):
+            continue
+        if inspect.iscoroutinefunction(value) or inspect.isasyncgenfunction(value):
+            setattr(cls, attribute, traced(f"{cls.__name__}.{attribute}")(value))
+    return cls
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the server span of each request, continuing the caller's trace if it sent one."""
+
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self._tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        method = scope["method"]
+        attributes = {"http.request.method": method, "url.path": scope["path"]}
+        with self._tracer.span(f"{method} {scope['path']}", SERVER, attributes, parent) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = STATUS_ERROR
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # Named after the route template once the router has matched one.
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{method} {route}"
+                    span.set_attribute("http.route", route)
+
+
+def client_trace_config(tracer: Tracer = tracer) -> aiohttp.TraceConfig:
+    """aiohttp hooks giving each outgoing request made inside a trace a client span and a `traceparent` header."""
+    config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, context, params):
+        if tracer.current_span() is None:
+            context.span = None
+            return
+        context.span = tracer.start_span(
+            f"HTTP {params.method}",
+            CLIENT,
+            {"http.request.method": params.method, "url.full": str(params.url)},
+        )
+        tracer.inject(params.headers, context.span)
+
+    async def on_request_end(session, context, params):
+        span = getattr(context, "span", None)
+        if span is not None:
+            span.set_attribute("http.response.status_code", params.response.status)
+            if params.response.status >= 500:
+                span.status = STATUS_ERROR
+        tracer.end_span(span)
+
+    async def on_request_exception(session, context, params):
+        tracer.end_span(getattr(context, "span", None), params.exception)
+
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config
@@ -1,3 +1,4 @@
-﻿from .database_initializer import initialize_database
+﻿from .database_initializer import initialize_database, is_database_seeded, seed_database_if_empty
+from .migrations import upgrade_database
 
-__all__ = ["initialize_database"]
+__all__ = ["initialize_database", "is_database_seeded", "seed_database_if_empty", "upgrade_database"]
@@ -3,26 +3,37 @@ import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
 from config import DATABASE_URL
-from pathlib import Path
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import DatabaseRegistry
+from data.migrations import upgrade_database
 
-from models.entities import Base
 from models.entities import Address
 from models.entities import Order
 from models.entities import OrderItem
 from models.enums import OrderStatus
 
 
-async def initialize_database(database_url: str):
-    engine = create_async_engine(database_url, echo=True, future=True)
-    async_session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+async def is_database_seeded(session: AsyncSession) -> bool:
+    # EXISTS stops at the first row of either table instead of loading entities.
+    query = select(exists(select(Address.id)) | exists(select(Order.id)))
+    return bool((await session.execute(query)).scalar())
+
+
+async def seed_database_if_empty(database: DatabaseRegistry) -> bool:
+    """Seed the sample data unless the database already holds addresses or orders."""
+    async with database.session_factory() as session:
+        if await is_database_seeded(session):
+            return False
+    await initialize_database(database)
+    return True
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
 
-    async with async_session_factory() as session:
+async def initialize_database(database: DatabaseRegistry):
+    """Insert the sample data; the schema must already be migrated."""
+    async with database.session_factory() as session:
 
         # Seed Addresses inline
         session.add_all([
@@ -40,13 +51,16 @@ async def initialize_database(database_url: str):
         ])
         await session.commit()
 
-    await engine.dispose()
 
+async def main():
+    database = DatabaseRegistry(DATABASE_URL).start()
+    try:
+        await upgrade_database(database.engine)
+        await seed_database_if_empty(database)
+    finally:
+        await database.dispose()
 
-if __name__ == "__main__":
-    # Ensure storage directory exists
-    db_file = Path(DATABASE_URL.replace("sqlite+aiosqlite:///", ""))
-    db_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # Initialize the database
-    asyncio.run(initialize_database(DATABASE_URL))
+if __name__ == "__main__":
+    # Initialize the database (the registry creates the storage directory)
+    asyncio.run(main())
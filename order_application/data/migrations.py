@@ -0,0 +1,53 @@
+﻿from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI_PATH = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Databases created before migrations were introduced match this revision.
+BASELINE_REVISION = "0001"
+
+
+def build_alembic_config(connection: Connection = None) -> Config:
+    config = Config(str(ALEMBIC_INI_PATH))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def is_schema_current(connection: Connection, config: Config = None) -> bool:
+    """True when the database is already stamped with the head revision."""
+    config = config or build_alembic_config()
+    current = MigrationContext.configure(connection).get_current_revision()
+    return current is not None and current == ScriptDirectory.from_config(config).get_current_head()
+
+
+def upgrade_schema(connection: Connection) -> bool:
+    """Bring the schema behind `connection` up to the latest revision.
+
+    Returns False without touching the schema when it is already current.
+    """
+    config = build_alembic_config(connection)
+    if is_schema_current(connection, config):
+        return False
+
+    tables = inspect(connection).get_table_names()
+
+    # Schemas built by Base.metadata.create_all carry no version table; adopt
+    # them at the baseline so only the later revisions are applied.
+    if "alembic_version" not in tables and "orders" in tables:
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+    return True
+
+
+async def upgrade_database(engine: AsyncEngine) -> bool:
+    async with engine.begin() as conn:
+        return await conn.run_sync(upgrade_schema)
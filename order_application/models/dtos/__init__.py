@@ -6,14 +6,19 @@ from .order.order_create_dto import OrderCreateDTO
 from .order.order_read_dto import OrderReadDTO
 from .order.order_update_dto import OrderUpdateDTO
 from .order.order_patch_dto import OrderPatchDTO
+from .order.order_filter_dto import OrderFilterDTO
+from .order.order_import_dto import OrderImportDTO
+from .order.order_import_result_dto import OrderImportErrorDTO, OrderImportResultDTO
 
 from .order_item.order_item_create_dto import OrderItemCreateDTO
 from .order_item.order_item_read_dto import OrderItemReadDTO
 from .order_item.order_item_update_dto import OrderItemUpdateDTO
+from .order_item.order_item_import_dto import OrderItemImportDTO
 
 
 __all__ = [
-    "OrderCreateDTO", "OrderReadDTO", "OrderUpdateDTO", "OrderPatchDTO",
+    "OrderCreateDTO", "OrderReadDTO", "OrderUpdateDTO", "OrderPatchDTO", "OrderFilterDTO",
+    "OrderImportDTO", "OrderImportErrorDTO", "OrderImportResultDTO",
     "AddressCreateDTO", "AddressReadDTO", "AddressUpdateDTO",
-    "OrderItemCreateDTO", "OrderItemReadDTO", "OrderItemUpdateDTO"
+    "OrderItemCreateDTO", "OrderItemReadDTO", "OrderItemUpdateDTO", "OrderItemImportDTO"
 ]
@@ -14,6 +14,7 @@ class AddressReadDTO(BaseModel):
     country: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int
 
     class Config:
         from_attributes = True 
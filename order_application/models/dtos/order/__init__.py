@@ -2,5 +2,12 @@ from .order_create_dto import OrderCreateDTO
 from .order_read_dto import OrderReadDTO
 from .order_update_dto import OrderUpdateDTO
 from .order_patch_dto import OrderPatchDTO
+from .order_filter_dto import OrderFilterDTO
+from .order_import_dto import OrderImportDTO
+from .order_import_result_dto import OrderImportErrorDTO, OrderImportResultDTO
+from .order_batch_patch_dto import OrderBatchPatchDTO
+from .order_batch_patch_result_dto import OrderBatchPatchErrorDTO, OrderBatchPatchResultDTO
 
-__all__ = ["OrderCreateDTO", "OrderReadDTO", "OrderUpdateDTO", "OrderPatchDTO"]
+__all__ = ["OrderCreateDTO", "OrderReadDTO", "OrderUpdateDTO", "OrderPatchDTO", "OrderFilterDTO",
+           "OrderImportDTO", "OrderImportErrorDTO", "OrderImportResultDTO",
+           "OrderBatchPatchDTO", "OrderBatchPatchErrorDTO", "OrderBatchPatchResultDTO"]
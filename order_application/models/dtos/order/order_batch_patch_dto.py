@@ -0,0 +1,8 @@
+﻿from pydantic import BaseModel, conlist
+from models.enums import OrderStatus
+
+
+class OrderBatchPatchDTO(BaseModel):
+    """Moves every listed order to the same status."""
+    order_ids: conlist(str, min_length=1)
+    status: OrderStatus
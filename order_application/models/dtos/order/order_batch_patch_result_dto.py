@@ -0,0 +1,18 @@
+﻿from typing import List
+from pydantic import BaseModel, Field
+from models.dtos.order.order_read_dto import OrderReadDTO
+
+
+class OrderBatchPatchErrorDTO(BaseModel):
+    order_id: str
+    error: str
+
+
+class OrderBatchPatchResultDTO(BaseModel):
+    received: int = 0
+    updated: List[OrderReadDTO] = Field(default_factory=list)
+    failed: int = 0
+    errors: List[OrderBatchPatchErrorDTO] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,14 @@
+﻿from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from models.enums import OrderStatus
+
+
+class OrderFilterDTO(BaseModel):
+    customer_id: Optional[str] = None
+    status: Optional[OrderStatus] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
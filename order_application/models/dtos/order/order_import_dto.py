@@ -0,0 +1,27 @@
+﻿from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from pydantic import BaseModel, condecimal, conlist, model_validator
+from models.enums import OrderStatus
+from models.dtos.order_item.order_item_import_dto import OrderItemImportDTO
+
+
+class OrderImportDTO(BaseModel):
+    """A historical order as exported by the legacy system, prices included."""
+    id: Optional[str] = None
+    customer_id: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    status: OrderStatus = OrderStatus.PENDING
+    shipment_id: Optional[str] = None
+    total_amount: Optional[condecimal(max_digits=18, decimal_places=2)] = None
+    items: conlist(OrderItemImportDTO, min_length=1)
+
+    class Config:
+        from_attributes = True
+
+    @model_validator(mode="after")
+    def fill_total_amount(self) -> "OrderImportDTO":
+        if self.total_amount is None:
+            self.total_amount = sum((Decimal(item.unit_price) * item.quantity for item in self.items), Decimal("0"))
+        return self
@@ -0,0 +1,18 @@
+﻿from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class OrderImportErrorDTO(BaseModel):
+    row: int
+    order_id: Optional[str] = None
+    error: str
+
+
+class OrderImportResultDTO(BaseModel):
+    received: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[OrderImportErrorDTO] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
@@ -11,6 +11,7 @@ class OrderReadDTO(BaseModel):
     id: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int
     customer_id: str
     shipment_id: Optional[str] = None
     total_amount: Decimal
@@ -1,5 +1,6 @@
 from .order_item_create_dto import OrderItemCreateDTO
 from .order_item_read_dto import OrderItemReadDTO
 from .order_item_update_dto import OrderItemUpdateDTO
+from .order_item_import_dto import OrderItemImportDTO
 
-__all__ = ["OrderItemCreateDTO", "OrderItemReadDTO", "OrderItemUpdateDTO"]
+__all__ = ["OrderItemCreateDTO", "OrderItemReadDTO", "OrderItemUpdateDTO", "OrderItemImportDTO"]
@@ -0,0 +1,13 @@
+﻿from typing import Optional
+from pydantic import BaseModel, condecimal, conint
+
+
+class OrderItemImportDTO(BaseModel):
+    id: Optional[str] = None
+    product_id: str
+    product_variant_id: Optional[str] = None
+    quantity: conint(gt=0)
+    unit_price: condecimal(max_digits=18, decimal_places=2, ge=0)
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,7 @@
 ﻿from .order import Order
 from .order_item import OrderItem
 from .address import Address
+from .outbox_message import OutboxMessage
 from .base import Base
 
-__all__ = ["Order", "OrderItem", "Address", "Base"]
+__all__ = ["Order", "OrderItem", "Address", "OutboxMessage", "Base"]
@@ -1,13 +1,16 @@
 ﻿import uuid
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 from models.entities.base import Base
 
 
 class Address(Base):
     __tablename__ = "addresses"
+    __table_args__ = (
+        Index("ix_addresses_customer_id", "customer_id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -29,6 +32,11 @@ class Address(Base):
         DateTime(timezone=True), nullable=True, onupdate=datetime.utcnow
     )
 
+    # Optimistic concurrency, as for Order.version.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self) -> str:
         return (
             f"<Address id={self.id} {self.street}, {self.city}, "
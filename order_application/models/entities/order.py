@@ -1,13 +1,20 @@
 ﻿import uuid
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import DateTime, ForeignKey, Numeric, Enum, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, Enum, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from models.entities.base import Base
 from models.enums import OrderStatus
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id), optionally narrowed by customer or status.
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_orders_shipment_id", "shipment_id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -35,6 +42,9 @@ class Order(Base):
         Enum(OrderStatus, name="order_status"), nullable=False, default=OrderStatus.PENDING
     )
 
+    # Bumped by every UPDATE, which only matches the row at the version it was read at.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
     items: Mapped[List["OrderItem"]] = relationship(
         "OrderItem",
         back_populates="order",
@@ -42,5 +52,7 @@ class Order(Base):
         lazy="selectin"
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self) -> str:
         return f"<Order id={self.id} customer_id={self.customer_id} status={self.status}>"
@@ -1,12 +1,15 @@
 ﻿import uuid
 from typing import Optional
-from sqlalchemy import ForeignKey, Integer, Float, String
+from sqlalchemy import ForeignKey, Index, Integer, Float, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from models.entities.base import Base
 from models.entities import Order
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -0,0 +1,43 @@
+﻿import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import JSON, DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from models.entities.base import Base
+from models.enums import OutboxStatus
+
+
+class OutboxMessage(Base):
+    """An upstream side effect recorded in the same transaction as the change that caused it."""
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # The dispatcher polls pending messages that are due, oldest first.
+        Index("ix_outbox_messages_status_available_at", "status", "available_at"),
+        # ...skipping those queued behind an older message of their aggregate that is backing off.
+        Index("ix_outbox_messages_aggregate_id_created_at", "aggregate_id", "created_at"),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+
+    aggregate_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=OutboxStatus.PENDING.value)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=datetime.utcnow
+    )
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=datetime.utcnow
+    )
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<OutboxMessage id={self.id} event_type={self.event_type} status={self.status}>"
@@ -1,3 +1,4 @@
 from .order_status import OrderStatus
+from .outbox_status import OutboxStatus
 
-__all__ = ["OrderStatus"]
+__all__ = ["OrderStatus", "OutboxStatus"]
@@ -0,0 +1,9 @@
+﻿from enum import Enum
+
+class OutboxStatus(str, Enum):
+    PENDING = "Pending"        # Waiting to be dispatched, possibly after failed attempts
+    PROCESSED = "Processed"    # Side effect applied upstream
+    FAILED = "Failed"          # Gave up after the maximum number of attempts
+
+    def __str__(self) -> str:
+        return self.value
@@ -13,3 +13,4 @@ class AddressReadSchema(BaseModel):
     country: constr(max_length=50) = Field(..., description="Country")
     created_at: datetime = Field(..., description="Timestamp when the address was created")
     updated_at: Optional[datetime] = Field(None, description="Timestamp when the address was last updated")
+    version: int = Field(..., description="Version of the address, sent back in If-Match to update it")
@@ -1,6 +1,11 @@
 ﻿from .order_create_schema import OrderCreateSchema
-from .order_read_schema import OrderReadSchema
+from .order_read_schema import OrderReadSchema, order_read_payload
 from .order_update_schema import OrderUpdateSchema
 from .order_patch_schema import OrderPatchSchema
+from .order_import_result_schema import OrderImportErrorSchema, OrderImportResultSchema
+from .order_batch_patch_schema import OrderBatchPatchSchema
+from .order_batch_patch_result_schema import OrderBatchPatchErrorSchema, OrderBatchPatchResultSchema
 
-__all__ = ["OrderCreateSchema", "OrderReadSchema", "OrderUpdateSchema", "OrderPatchSchema"]
+__all__ = ["OrderCreateSchema", "OrderReadSchema", "order_read_payload", "OrderUpdateSchema", "OrderPatchSchema",
+           "OrderImportErrorSchema", "OrderImportResultSchema",
+           "OrderBatchPatchSchema", "OrderBatchPatchErrorSchema", "OrderBatchPatchResultSchema"]
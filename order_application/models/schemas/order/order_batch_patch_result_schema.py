@@ -0,0 +1,15 @@
+﻿from typing import List
+from pydantic import BaseModel, Field
+from models.schemas.order.order_read_schema import OrderReadSchema
+
+
+class OrderBatchPatchErrorSchema(BaseModel):
+    order_id: str = Field(..., description="Identifier of the order that was left unchanged")
+    error: str = Field(..., description="Why the transition was refused or failed")
+
+
+class OrderBatchPatchResultSchema(BaseModel):
+    received: int = Field(..., description="Number of distinct orders in the request")
+    updated: List[OrderReadSchema] = Field(..., description="Orders moved to the new status")
+    failed: int = Field(..., description="Number of orders left unchanged")
+    errors: List[OrderBatchPatchErrorSchema] = Field(..., description="One entry per order left unchanged")
@@ -0,0 +1,8 @@
+﻿from typing import List
+from pydantic import BaseModel, Field
+from models.enums import OrderStatus
+
+
+class OrderBatchPatchSchema(BaseModel):
+    order_ids: List[str] = Field(..., min_length=1, description="Identifiers of the orders to move")
+    status: OrderStatus = Field(..., description="Status every listed order moves to")
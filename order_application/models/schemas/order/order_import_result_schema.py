@@ -0,0 +1,15 @@
+﻿from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class OrderImportErrorSchema(BaseModel):
+    row: int = Field(..., description="Line of the record in the uploaded file")
+    order_id: Optional[str] = Field(None, description="Identifier of the rejected order, when it had one")
+    error: str = Field(..., description="Why the record was rejected")
+
+
+class OrderImportResultSchema(BaseModel):
+    received: int = Field(..., description="Number of order records read from the upload")
+    imported: int = Field(..., description="Number of orders stored")
+    failed: int = Field(..., description="Number of orders rejected")
+    errors: List[OrderImportErrorSchema] = Field(..., description="One entry per rejected order")
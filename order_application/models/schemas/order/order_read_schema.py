@@ -1,6 +1,6 @@
 ﻿from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 from models.enums import OrderStatus
 from models.schemas.order_item import OrderItemReadSchema
@@ -10,6 +10,7 @@ class OrderReadSchema(BaseModel):
     id: str = Field(..., description="Unique identifier of the order")
     created_at: datetime = Field(..., description="Timestamp when the order was created")
     updated_at: Optional[datetime] = Field(None, description="Timestamp when the order was last updated")
+    version: int = Field(..., description="Version of the order, sent back in If-Match to change it")
     customer_id: str = Field(..., description="ID of the customer who placed the order")
     shipment_id: Optional[str] = Field(None, description="ID of the associated shipment, if any")
     total_amount: Decimal = Field(..., description="Total amount of the order")
@@ -18,3 +19,31 @@ class OrderReadSchema(BaseModel):
 
     class Config:
         json_encoders = {str: lambda v: str(v)}
+
+
+def order_read_payload(order) -> Dict[str, Any]:
+    """An order (entity or read DTO) in the shape of OrderReadSchema, ready for core.serialization.dumps.
+
+    Builds the response body without validating it again; keep it in step with
+    the schema above.
+    """
+    return {
+        "id": order.id,
+        "created_at": order.created_at,
+        "updated_at": order.updated_at,
+        "version": order.version,
+        "customer_id": order.customer_id,
+        "shipment_id": order.shipment_id,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "product_variant_id": item.product_variant_id,
+                "quantity": item.quantity,
+                "unit_price": float(item.unit_price) if item.unit_price is not None else None,
+            }
+            for item in order.items
+        ],
+    }
@@ -4,4 +4,8 @@ from .interfaces.order_repository_interface import OrderRepositoryInterface
 from .address_repository_impl import AddressRepository
 from .interfaces.address_repository_interface import AddressRepositoryInterface
 
-__all__ = ["OrderRepository", "OrderRepositoryInterface", "AddressRepository", "AddressRepositoryInterface"]
+from .outbox_repository_impl import OutboxRepository
+from .interfaces.outbox_repository_interface import OutboxRepositoryInterface
+
+__all__ = ["OrderRepository", "OrderRepositoryInterface", "AddressRepository", "AddressRepositoryInterface",
+           "OutboxRepository", "OutboxRepositoryInterface"]
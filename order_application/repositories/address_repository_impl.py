@@ -1,12 +1,20 @@
 ﻿from typing import List, Optional
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm.exc import StaleDataError
 from models.entities import Address
 from repositories.interfaces import AddressRepositoryInterface
+from core.concurrency import ConcurrencyConflictError, check_version
+from core.tracing import trace_methods
 
 
+@trace_methods
 class AddressRepository(AddressRepositoryInterface):
 
+    # Enough to tell whether an address changed, without loading it.
+    _VERSION_COLUMNS = (Address.id, Address.version)
+
     def __init__(self, session_factory):
         self._session_factory = session_factory
 
@@ -14,15 +22,19 @@ class AddressRepository(AddressRepositoryInterface):
         if entity is None:
             raise ValueError("Record reference cannot be null.")
 
+        # Ids and timestamps are generated client-side, so nothing needs reading back.
         session.add(entity)
         await session.commit()
-        await session.refresh(entity)
         return entity
 
     async def GetAllAsync(self, session: AsyncSession) -> List[Address]:
         result = await session.execute(select(Address))
         return result.scalars().all()
 
+    async def GetAllVersionsAsync(self, session: AsyncSession) -> List[Row]:
+        result = await session.execute(select(*self._VERSION_COLUMNS))
+        return result.all()
+
     async def GetByIdAsync(self, id: str, session: AsyncSession) -> Optional[Address]:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
@@ -32,6 +44,15 @@ class AddressRepository(AddressRepositoryInterface):
         )
         return result.scalars().first()
 
+    async def GetVersionAsync(self, id: str, session: AsyncSession) -> Optional[Row]:
+        if not id:
+            raise ValueError("Record identifier cannot be empty.")
+
+        result = await session.execute(
+            select(*self._VERSION_COLUMNS).where(Address.id == id)
+        )
+        return result.first()
+
     async def GetByCustomerIdAsync(self, customer_id: str, session: AsyncSession) -> Optional[Address]:
         if not customer_id:
             raise ValueError("Reference identifier cannot be empty.")
@@ -41,18 +62,29 @@ class AddressRepository(AddressRepositoryInterface):
         )
         return result.scalars().first()
 
+    async def GetByCustomerIdsAsync(self, customer_ids: List[str], session: AsyncSession) -> List[Address]:
+        if not customer_ids:
+            return []
+
+        result = await session.execute(
+            select(Address).where(Address.customer_id.in_(customer_ids))
+        )
+        return result.scalars().all()
+
     async def UpdateAsync(self, updated: Address, session: AsyncSession) -> bool:
         if updated is None:
             raise ValueError("Record data cannot be null.")
 
-        existing = await self.GetByIdAsync(updated.id, session=session)
-        if existing is None:
-            return False
+        # Loaded through this session: the unit of work already tracks its changes.
+        if updated not in session:
+            existing = await self.GetByIdAsync(updated.id, session=session)
+            if existing is None:
+                return False
 
-        await session.commit()
+        await self._commit(session)
         return True
 
-    async def DeleteAsync(self, id: str, session: AsyncSession) -> bool:
+    async def DeleteAsync(self, id: str, session: AsyncSession, expected_version: Optional[int] = None) -> bool:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
 
@@ -60,6 +92,15 @@ class AddressRepository(AddressRepositoryInterface):
         if existing is None:
             return False
 
+        check_version(existing, expected_version)
         await session.delete(existing)
-        await session.commit()
+        await self._commit(session)
         return True
+
+    @staticmethod
+    async def _commit(session: AsyncSession) -> None:
+        try:
+            await session.commit()
+        except StaleDataError as e:
+            await session.rollback()
+            raise ConcurrencyConflictError("The address was changed by another request; read it again and retry.") from e
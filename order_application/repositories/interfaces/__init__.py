@@ -1,4 +1,5 @@
 from .order_repository_interface import OrderRepositoryInterface
 from .address_repository_interface import AddressRepositoryInterface
+from .outbox_repository_interface import OutboxRepositoryInterface
 
-__all__ = ["OrderRepositoryInterface", "AddressRepositoryInterface"]
+__all__ = ["OrderRepositoryInterface", "AddressRepositoryInterface", "OutboxRepositoryInterface"]
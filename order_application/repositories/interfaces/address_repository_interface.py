@@ -2,13 +2,15 @@
 from typing import List, Optional
 
 
+from sqlalchemy.engine import Row
+
 from models.entities.address import Address
 
 
 class AddressRepositoryInterface(ABC):
     @abstractmethod
     async def AddAsync(self, address: Address) -> Address:
-        """Add a new Address entity to the database."""
+        """Add a new Address entity to the database without reloading it."""
         pass
 
     @abstractmethod
@@ -16,22 +18,37 @@ class AddressRepositoryInterface(ABC):
         """Retrieve all Address entities."""
         pass
 
+    @abstractmethod
+    async def GetAllVersionsAsync(self) -> List[Row]:
+        """Retrieve only the (id, version) of every address."""
+        pass
+
     @abstractmethod
     async def GetByIdAsync(self, id: str) -> Optional[Address]:
         """Retrieve a single Address entity by its ID."""
         pass
 
+    @abstractmethod
+    async def GetVersionAsync(self, id: str) -> Optional[Row]:
+        """Retrieve only the (id, version) of an address, or None if it does not exist."""
+        pass
+
     @abstractmethod
     async def GetByCustomerIdAsync(self, customer_id: str) -> Optional[Address]:
         """Retrive a single Address entity by its customer_id field"""
         pass
 
+    @abstractmethod
+    async def GetByCustomerIdsAsync(self, customer_ids: List[str]) -> List[Address]:
+        """Retrieve the Address entities of several customers in a single query."""
+        pass
+
     @abstractmethod
     async def UpdateAsync(self, address: Address) -> bool:
-        """Update an existing Address entity. Returns True if successful."""
+        """Update an existing Address entity, re-reading it only if the session does not track it. Returns True if successful. Raises ConcurrencyConflictError if it changed since it was read."""
         pass
 
     @abstractmethod
-    async def DeleteAsync(self, id: str) -> bool:
-        """Delete an Address entity by its ID. Returns True if successful."""
+    async def DeleteAsync(self, id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete an Address entity by its ID, optionally only at the given version. Returns True if successful."""
         pass
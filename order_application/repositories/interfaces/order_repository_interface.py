@@ -1,19 +1,63 @@
 ﻿from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 
+from sqlalchemy.engine import Row
+
+from core.concurrency import ConcurrencyConflictError
 from models.entities.order import Order
+from models.enums import OrderStatus
 
 
 class OrderRepositoryInterface(ABC):
     @abstractmethod
     async def AddAsync(self, address: Order) -> Order:
-        """Add a new Order entity to the database."""
+        """Add a new Order entity to the database. The committed entity is returned as-is, without a reload."""
+        pass
+
+    @abstractmethod
+    async def BulkInsertAsync(self, orders: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> None:
+        """Insert order and order item rows with multi-row INSERTs in a single transaction."""
+        pass
+
+    @abstractmethod
+    async def GetPageAsync(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Order]:
+        """Retrieve up to `limit` Order entities ordered by (created_at, id), starting after the given keyset position."""
         pass
 
     @abstractmethod
-    async def GetAllAsync(self) -> List[Order]:
-        """Retrieve all Order entities."""
+    async def GetPageVersionsAsync(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Row]:
+        """Like GetPageAsync, but only the (id, version) of each order, without items."""
+        pass
+
+    @abstractmethod
+    def StreamAsync(
+        self,
+        chunk_size: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> AsyncIterator[Order]:
+        """Iterate over matching Order entities in keyset order, fetching `chunk_size` rows at a time."""
         pass
 
     @abstractmethod
@@ -21,12 +65,39 @@ class OrderRepositoryInterface(ABC):
         """Retrieve a single Order entity by its ID."""
         pass
 
+    @abstractmethod
+    async def GetVersionAsync(self, id: str) -> Optional[Row]:
+        """Retrieve only the (id, version) of an order, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    async def GetByIdsAsync(self, ids: List[str]) -> List[Order]:
+        """Retrieve the Order entities with the given IDs in a single query; unknown IDs are skipped."""
+        pass
+
     @abstractmethod
     async def UpdateAsync(self, address: Order) -> bool:
-        """Update an existing Order entity. Returns True if successful."""
+        """Update an existing Order entity, reusing the session's instance when it is already loaded. Returns the updated entity, or None if it does not exist. Raises ConcurrencyConflictError if it changed since it was read."""
+        pass
+
+    @abstractmethod
+    async def UpdateManyAsync(
+        self, entities: List[Order], apply: Optional[Callable[[Order], Awaitable[None]]] = None
+    ) -> Dict[str, ConcurrencyConflictError]:
+        """Update several Order entities loaded through the same session, each in its own savepoint after `apply` makes its changes. Orders that changed since they were read are rolled back and returned by id with their error; the rest are committed."""
+        pass
+
+    @abstractmethod
+    async def LockManyAsync(self, entities: List[Order]) -> Dict[str, ConcurrencyConflictError]:
+        """Write a version bump for each Order entity loaded through the same session, without committing, so none can change until the session's transaction ends. Orders that changed since they were read are returned by id with their error."""
+        pass
+
+    @abstractmethod
+    async def AssignShipmentsAsync(self, shipment_ids: Dict[str, str]) -> None:
+        """Set the shipment ID of each given order, whatever version it is at; committed by the caller."""
         pass
 
     @abstractmethod
-    async def DeleteAsync(self, id: str) -> bool:
-        """Delete an Order entity by its ID. Returns True if successful."""
+    async def DeleteAsync(self, id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete an Order entity by its ID, optionally only at the given version. Returns True if successful."""
         pass
@@ -0,0 +1,22 @@
+﻿from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List
+
+from models.entities import OutboxMessage
+
+
+class OutboxRepositoryInterface(ABC):
+    @abstractmethod
+    async def EnqueueAsync(self, message: OutboxMessage) -> OutboxMessage:
+        """Stage a message in the caller's transaction; it is stored when the caller commits."""
+        pass
+
+    @abstractmethod
+    async def ClaimBatchAsync(self, limit: int, now: datetime) -> List[OutboxMessage]:
+        """Retrieve up to `limit` pending messages that are due, oldest first, locking them where supported. Messages queued behind an older pending message of the same aggregate that is not due are skipped."""
+        pass
+
+    @abstractmethod
+    async def CountByStatusAsync(self) -> dict:
+        """Count messages per status."""
+        pass
@@ -1,12 +1,26 @@
-﻿from typing import List, Optional
+﻿from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from models.entities import Order
+from sqlalchemy.orm.exc import StaleDataError
+from models.entities import Order, OrderItem
+from models.enums import OrderStatus
 from repositories.interfaces import OrderRepositoryInterface
+from core.concurrency import ConcurrencyConflictError, check_version
+from core.tracing import trace_methods
 from datetime import datetime, timezone
 
+# Bound parameters per multi-row INSERT; stays under SQLite's 32766 variable limit.
+BULK_INSERT_MAX_PARAMETERS = 30000
+
+
+@trace_methods
 class OrderRepository(OrderRepositoryInterface):
 
+    # Enough to tell whether an order changed, without loading it or its items.
+    _VERSION_COLUMNS = (Order.id, Order.version)
+
     def __init__(self, session_factory):
         self._session_factory = session_factory
 
@@ -16,13 +30,89 @@ class OrderRepository(OrderRepositoryInterface):
 
         session.add(entity)
         await session.commit()
-        await session.refresh(entity)
+        # Sessions keep their state after commit (expire_on_commit=False), so the
+        # entity and its items are already current without a reload.
         return entity
 
-    async def GetAllAsync(self, session: AsyncSession) -> List[Order]:
-        result = await session.execute(select(Order))
+    async def BulkInsertAsync(
+        self,
+        orders: List[Dict[str, Any]],
+        items: List[Dict[str, Any]],
+        session: AsyncSession,
+    ) -> None:
+        if not orders:
+            return
+
+        try:
+            for table, rows in ((Order.__table__, orders), (OrderItem.__table__, items)):
+                batch_size = max(1, BULK_INSERT_MAX_PARAMETERS // len(table.columns))
+                for start in range(0, len(rows), batch_size):
+                    await session.execute(insert(table).values(rows[start:start + batch_size]))
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+    async def GetPageAsync(
+        self,
+        limit: int,
+        session: AsyncSession,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Order]:
+        if limit < 1:
+            raise ValueError("Page size must be at least one.")
+
+        query = self._build_page_query(after, customer_id, status, created_from, created_to)
+        result = await session.execute(query.limit(limit))
         return result.scalars().all()
 
+    async def GetPageVersionsAsync(
+        self,
+        limit: int,
+        session: AsyncSession,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> List[Row]:
+        if limit < 1:
+            raise ValueError("Page size must be at least one.")
+
+        query = self._build_page_query(
+            after, customer_id, status, created_from, created_to, columns=self._VERSION_COLUMNS
+        )
+        result = await session.execute(query.limit(limit))
+        return result.all()
+
+    async def StreamAsync(
+        self,
+        chunk_size: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        customer_id: Optional[str] = None,
+        status: Optional[OrderStatus] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> AsyncIterator[Order]:
+        # Streams outlive the request-scoped session, so they own a session of their own.
+        async with self._session_factory() as session:
+            while True:
+                page = await self.GetPageAsync(
+                    chunk_size, session, after, customer_id, status, created_from, created_to
+                )
+                for entity in page:
+                    yield entity
+
+                if len(page) < chunk_size:
+                    break
+
+                after = (page[-1].created_at, page[-1].id)
+                session.expunge_all()
+
     async def GetByIdAsync(self, id: str, session: AsyncSession) -> Optional[Order]:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
@@ -32,24 +122,96 @@ class OrderRepository(OrderRepositoryInterface):
         )
         return result.scalars().first()
 
+    async def GetVersionAsync(self, id: str, session: AsyncSession) -> Optional[Row]:
+        if not id:
+            raise ValueError("Record identifier cannot be empty.")
+
+        result = await session.execute(
+            select(*self._VERSION_COLUMNS).where(Order.id == id)
+        )
+        return result.first()
+
+    async def GetByIdsAsync(self, ids: List[str], session: AsyncSession) -> List[Order]:
+        if not ids:
+            return []
+
+        result = await session.execute(
+            select(Order).where(Order.id.in_(ids))
+        )
+        return result.scalars().all()
+
     async def UpdateAsync(self, updated: Order, session: AsyncSession) -> Order | None:
         if updated is None:
             raise ValueError("Record data cannot be null.")
 
-        existing = await self.GetByIdAsync(updated.id, session=session)
-        if existing is None:
-            return None
+        if updated in session:
+            # Loaded through this session: the unit of work already tracks its changes.
+            existing = updated
+        else:
+            existing = await self.GetByIdAsync(updated.id, session=session)
+            if existing is None:
+                return None
 
-        existing.shipment_id = updated.shipment_id
-        existing.items = updated.items
+            existing.shipment_id = updated.shipment_id
+            existing.status = updated.status
+            existing.items = updated.items
 
         existing.updated_at = datetime.utcnow()
 
-        await session.commit()
-        await session.refresh(existing)
+        # The flush writes only the dirty columns; nothing is read back.
+        await self._commit(session)
         return existing
 
-    async def DeleteAsync(self, id: str, session: AsyncSession) -> bool:
+    async def UpdateManyAsync(
+        self,
+        entities: List[Order],
+        session: AsyncSession,
+        apply: Optional[Callable[[Order], Awaitable[None]]] = None,
+    ) -> Dict[str, ConcurrencyConflictError]:
+        conflicts = await self._flush_each(entities, session, apply)
+        await self._commit(session)
+        return conflicts
+
+    async def LockManyAsync(self, entities: List[Order], session: AsyncSession) -> Dict[str, ConcurrencyConflictError]:
+        # The version bump is a write, so the rows stay locked until the caller's transaction ends.
+        return await self._flush_each(entities, session)
+
+    async def _flush_each(
+        self,
+        entities: List[Order],
+        session: AsyncSession,
+        apply: Optional[Callable[[Order], Awaitable[None]]] = None,
+    ) -> Dict[str, ConcurrencyConflictError]:
+        now = datetime.utcnow()
+        conflicts: Dict[str, ConcurrencyConflictError] = {}
+        for entity in entities:
+            # Read before the savepoint: rolling one back expires the entity.
+            order_id = entity.id
+            # One savepoint per order, so an order that changed since it was read is
+            # rolled back alone, along with whatever `apply` added for it.
+            try:
+                async with session.begin_nested():
+                    if apply is not None:
+                        await apply(entity)
+                    entity.updated_at = now
+                    await session.flush()
+            except StaleDataError:
+                conflicts[order_id] = self._conflict()
+        return conflicts
+
+    async def AssignShipmentsAsync(self, shipment_ids: Dict[str, str], session: AsyncSession) -> None:
+        # Not checked against the version read: no request writes shipment_id, so
+        # the dispatcher must neither lose to nor fail a concurrent update. The
+        # version is still bumped, as the order's representation changes.
+        for order_id, shipment_id in shipment_ids.items():
+            await session.execute(
+                update(Order)
+                .where(Order.id == order_id)
+                .values(shipment_id=shipment_id, version=Order.version + 1, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+
+    async def DeleteAsync(self, id: str, session: AsyncSession, expected_version: Optional[int] = None) -> bool:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
 
@@ -57,6 +219,37 @@ class OrderRepository(OrderRepositoryInterface):
         if existing is None:
             return False
 
+        check_version(existing, expected_version)
         await session.delete(existing)
-        await session.commit()
+        await self._commit(session)
         return True
+
+    @staticmethod
+    async def _commit(session: AsyncSession) -> None:
+        # Versioned UPDATEs and DELETEs match no row once another writer got there first.
+        try:
+            await session.commit()
+        except StaleDataError as e:
+            await session.rollback()
+            raise OrderRepository._conflict() from e
+
+    @staticmethod
+    def _conflict() -> ConcurrencyConflictError:
+        return ConcurrencyConflictError("The order was changed by another request; read it again and retry.")
+
+    @staticmethod
+    def _build_page_query(after, customer_id, status, created_from, created_to, columns=None):
+        query = select(*columns) if columns else select(Order)
+
+        if customer_id:
+            query = query.where(Order.customer_id == customer_id)
+        if status is not None:
+            query = query.where(Order.status == status)
+        if created_from is not None:
+            query = query.where(Order.created_at >= created_from)
+        if created_to is not None:
+            query = query.where(Order.created_at < created_to)
+        if after is not None:
+            query = query.where(tuple_(Order.created_at, Order.id) > tuple_(*after))
+
+        return query.order_by(Order.created_at, Order.id)
@@ -0,0 +1,56 @@
+﻿from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import exists, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+from models.entities import OutboxMessage
+from models.enums import OutboxStatus
+from repositories.interfaces import OutboxRepositoryInterface
+from core.tracing import trace_methods
+
+
+@trace_methods
+class OutboxRepository(OutboxRepositoryInterface):
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    async def EnqueueAsync(self, message: OutboxMessage, session: AsyncSession) -> OutboxMessage:
+        if message is None:
+            raise ValueError("Record reference cannot be null.")
+
+        # No commit: the message must land in the same transaction as the change it describes.
+        session.add(message)
+        return message
+
+    async def ClaimBatchAsync(self, limit: int, now: datetime, session: AsyncSession) -> List[OutboxMessage]:
+        if limit < 1:
+            raise ValueError("Batch size must be at least one.")
+
+        # A message waits while an older one of its aggregate is pending but not
+        # due, i.e. backing off after a failure, so effects keep their order
+        # across batches. Claiming oldest first keeps it within a batch.
+        older = aliased(OutboxMessage)
+        held = exists().where(
+            older.aggregate_id == OutboxMessage.aggregate_id,
+            older.status == OutboxStatus.PENDING.value,
+            older.available_at > now,
+            older.created_at < OutboxMessage.created_at,
+        )
+        query = (
+            select(OutboxMessage)
+            .where(OutboxMessage.status == OutboxStatus.PENDING.value, OutboxMessage.available_at <= now, ~held)
+            .order_by(OutboxMessage.created_at)
+            .limit(limit)
+            # Lets several dispatchers share the table on PostgreSQL; ignored by SQLite.
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def CountByStatusAsync(self, session: AsyncSession) -> Dict[str, int]:
+        result = await session.execute(
+            select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+        )
+        return {status: count for status, count in result.all()}
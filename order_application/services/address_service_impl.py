@@ -1,5 +1,6 @@
 ﻿from datetime import datetime, timezone
 from typing import List, Optional
+from sqlalchemy.engine import Row
 import uuid
 from models.dtos.address import AddressCreateDTO
 from models.dtos.address import AddressReadDTO
@@ -7,8 +8,11 @@ from models.dtos.address import AddressUpdateDTO
 from models.entities import Address
 from repositories.interfaces import AddressRepositoryInterface
 from services.interfaces import AddressServiceInterface
+from core.concurrency import check_version
+from core.tracing import trace_methods
 
 
+@trace_methods
 class AddressService(AddressServiceInterface):
 
     def __init__(self, repository: AddressRepositoryInterface):
@@ -28,7 +32,8 @@ class AddressService(AddressServiceInterface):
             state=dto.state,
             postal_code=dto.postal_code,
             country=dto.country,
-            created_at=datetime.now(timezone.utc)
+            created_at=datetime.now(timezone.utc),
+            version=1
         )
 
         await self._repository.AddAsync(entity, session=session)
@@ -42,7 +47,8 @@ class AddressService(AddressServiceInterface):
             postal_code=entity.postal_code,
             country=entity.country,
             created_at=entity.created_at,
-            updated_at=entity.updated_at
+            updated_at=entity.updated_at,
+            version=entity.version
         )
 
     async def GetAllAsync(self, session) -> List[AddressReadDTO]:
@@ -59,11 +65,15 @@ class AddressService(AddressServiceInterface):
                 postal_code=e.postal_code,
                 country=e.country,
                 created_at=e.created_at,
-                updated_at=e.updated_at
+                updated_at=e.updated_at,
+                version=e.version
             )
             for e in entities
         ]
 
+    async def GetAllVersionsAsync(self, session) -> List[Row]:
+        return await self._repository.GetAllVersionsAsync(session=session)
+
     async def GetByIdAsync(self, id: str, session) -> Optional[AddressReadDTO]:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
@@ -72,19 +82,17 @@ class AddressService(AddressServiceInterface):
         if entity is None:
             return None
 
-        return AddressReadDTO(
-            id=entity.id,
-            customer_id=entity.customer_id,
-            street=entity.street,
-            city=entity.city,
-            state=entity.state,
-            postal_code=entity.postal_code,
-            country=entity.country,
-            created_at=entity.created_at,
-            updated_at=entity.updated_at
-        )
+        return self._to_read_dto(entity)
+
+    async def GetVersionAsync(self, id: str, session) -> Optional[Row]:
+        if not id:
+            raise ValueError("Record identifier cannot be empty.")
+
+        return await self._repository.GetVersionAsync(id, session=session)
 
-    async def UpdateAsync(self, id: str, dto: AddressUpdateDTO, session) -> bool:
+    async def UpdateAsync(
+        self, id: str, dto: AddressUpdateDTO, session, expected_version: Optional[int] = None
+    ) -> Optional[AddressReadDTO]:
         if dto is None or not id:
             raise ValueError("Record data cannot be null or missing an identifier.")
         if isinstance(dto, dict):
@@ -92,7 +100,9 @@ class AddressService(AddressServiceInterface):
 
         existing = await self._repository.GetByIdAsync(id, session=session)
         if existing is None:
-            return False
+            return None
+
+        check_version(existing, expected_version)
 
         if dto.street is not None:
             existing.street = dto.street
@@ -108,9 +118,27 @@ class AddressService(AddressServiceInterface):
         existing.updated_at = datetime.now(timezone.utc)
 
         await self._repository.UpdateAsync(existing, session=session)
-        return True
+        return self._to_read_dto(existing)
 
-    async def DeleteAsync(self, id: str, session) -> bool:
+    async def DeleteAsync(self, id: str, session, expected_version: Optional[int] = None) -> bool:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
-        return await self._repository.DeleteAsync(id, session=session)
+        return await self._repository.DeleteAsync(id, session=session, expected_version=expected_version)
+
+
+    # ---------------- Private helpers ----------------
+
+    @staticmethod
+    def _to_read_dto(entity: Address) -> AddressReadDTO:
+        return AddressReadDTO(
+            id=entity.id,
+            customer_id=entity.customer_id,
+            street=entity.street,
+            city=entity.city,
+            state=entity.state,
+            postal_code=entity.postal_code,
+            country=entity.country,
+            created_at=entity.created_at,
+            updated_at=entity.updated_at,
+            version=entity.version
+        )
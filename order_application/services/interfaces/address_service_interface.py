@@ -1,6 +1,7 @@
 ﻿from abc import ABC, abstractmethod
 from typing import List, Optional
 
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.dtos.address import (
@@ -22,17 +23,29 @@ class AddressServiceInterface(ABC):
         """Retrieve all addresses."""
         pass
 
+    @abstractmethod
+    async def GetAllVersionsAsync(self, session: AsyncSession) -> List[Row]:
+        """Retrieve the id and version of every address, enough to tell whether the list changed."""
+        pass
+
     @abstractmethod
     async def GetByIdAsync(self, id: str, session: AsyncSession) -> Optional[AddressReadDTO]:
         """Retrieve a single address by its ID."""
         pass
 
     @abstractmethod
-    async def UpdateAsync(self, id: str, dto: AddressUpdateDTO, session: AsyncSession) -> bool:
-        """Update an existing address. Returns True if successful."""
+    async def GetVersionAsync(self, id: str, session: AsyncSession) -> Optional[Row]:
+        """Retrieve the id and version of an address, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    async def UpdateAsync(
+        self, id: str, dto: AddressUpdateDTO, session: AsyncSession, expected_version: Optional[int] = None
+    ) -> Optional[AddressReadDTO]:
+        """Update an existing address, optionally only at the given version. Returns the updated address, or None if it does not exist."""
         pass
 
     @abstractmethod
-    async def DeleteAsync(self, id: str, session: AsyncSession) -> bool:
-        """Delete an address by its ID. Returns True if successful."""
+    async def DeleteAsync(self, id: str, session: AsyncSession, expected_version: Optional[int] = None) -> bool:
+        """Delete an address by its ID, optionally only at the given version. Returns True if successful."""
         pass
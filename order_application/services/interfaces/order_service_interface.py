@@ -1,12 +1,18 @@
 ﻿from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
 
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.dtos.order.order_create_dto import OrderCreateDTO
 from models.dtos.order.order_read_dto import OrderReadDTO
 from models.dtos.order.order_update_dto import OrderUpdateDTO
 from models.dtos.order.order_patch_dto import OrderPatchDTO
+from models.dtos.order.order_filter_dto import OrderFilterDTO
+from models.dtos.order.order_import_result_dto import OrderImportResultDTO
+from models.dtos.order.order_batch_patch_dto import OrderBatchPatchDTO
+from models.dtos.order.order_batch_patch_result_dto import OrderBatchPatchResultDTO
+from core.bulk_import import ImportRecord
 
 
 class OrderServiceInterface(ABC):
@@ -17,8 +23,45 @@ class OrderServiceInterface(ABC):
         pass
 
     @abstractmethod
-    async def GetAllAsync(self, session: AsyncSession) -> List[OrderReadDTO]:
-        """Retrieve all records."""
+    async def ImportAsync(
+        self,
+        records: AsyncIterable[ImportRecord],
+        session: AsyncSession,
+        chunk_size: int = 1000
+    ) -> OrderImportResultDTO:
+        """Validate and store parsed order records in chunks, reporting rejected rows instead of aborting."""
+        pass
+
+    @abstractmethod
+    async def GetPageAsync(
+        self,
+        limit: int,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> Tuple[List[OrderReadDTO], Optional[str]]:
+        """Retrieve one keyset page of records and the cursor of the next page, if any."""
+        pass
+
+    @abstractmethod
+    async def GetPageVersionsAsync(
+        self,
+        limit: int,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> Tuple[List[Row], bool]:
+        """Retrieve the id and version of the records GetPageAsync would return, and whether another page follows."""
+        pass
+
+    @abstractmethod
+    def StreamAsync(
+        self,
+        chunk_size: int,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> AsyncIterator[OrderReadDTO]:
+        """Iterate over all matching records without materialising them as a list."""
         pass
 
     @abstractmethod
@@ -27,16 +70,30 @@ class OrderServiceInterface(ABC):
         pass
 
     @abstractmethod
-    async def UpdateAsync(self, id: str, dto: OrderUpdateDTO, session: AsyncSession) -> bool:
-        """Update an existing record. Returns True if successful."""
+    async def GetVersionAsync(self, id: str, session: AsyncSession) -> Optional[Row]:
+        """Retrieve the id and version of a record, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    async def UpdateAsync(
+        self, id: str, dto: OrderUpdateDTO, session: AsyncSession, expected_version: Optional[int] = None
+    ) -> bool:
+        """Update an existing record, optionally only at the given version. Returns True if successful."""
+        pass
+
+    @abstractmethod
+    async def DeleteAsync(self, id: str, session: AsyncSession, expected_version: Optional[int] = None) -> bool:
+        """Delete a record by its identifier, optionally only at the given version. Returns True if successful."""
         pass
 
     @abstractmethod
-    async def DeleteAsync(self, id: str, session: AsyncSession) -> bool:
-        """Delete a record by its identifier. Returns True if successful."""
+    async def PatchAsync(
+        self, id: str, dto: OrderPatchDTO, session: AsyncSession, expected_version: Optional[int] = None
+    ) -> Optional[OrderReadDTO]:
+        """Patches a record by its identifier, optionally only at the given version. Returns the updated record, or None if it does not exist."""
         pass
 
     @abstractmethod
-    async def PatchAsync(self, id: str, dto: OrderPatchDTO, session: AsyncSession) -> bool:
-        """Patches a record by its identifier. Returns True if successful."""
+    async def BatchPatchAsync(self, dto: OrderBatchPatchDTO, session: AsyncSession) -> OrderBatchPatchResultDTO:
+        """Moves several records to one status; records that cannot move are reported and left unchanged."""
         pass
@@ -1,22 +1,60 @@
-﻿import uuid
+﻿import asyncio
+import logging
+import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DataError, IntegrityError
+from core.bulk_import import ImportRecord
+from core.concurrency import ConcurrencyConflictError, check_version
+from core.pagination import decode_cursor, encode_cursor
 from models.dtos.order import OrderCreateDTO
 from models.dtos.order import OrderReadDTO
 from models.dtos.order import OrderUpdateDTO
 from models.dtos.order import OrderPatchDTO
+from models.dtos.order import OrderFilterDTO
+from models.dtos.order import OrderImportDTO
+from models.dtos.order import OrderImportErrorDTO
+from models.dtos.order import OrderImportResultDTO
+from models.dtos.order import OrderBatchPatchDTO
+from models.dtos.order import OrderBatchPatchErrorDTO
+from models.dtos.order import OrderBatchPatchResultDTO
 from models.dtos.order_item import OrderItemReadDTO
 from models.entities import Order
 from models.entities import OrderItem
+from models.entities import OutboxMessage
 from models.enums import OrderStatus
 from repositories import AddressRepositoryInterface
 from repositories.interfaces import OrderRepositoryInterface
+from repositories.interfaces import OutboxRepositoryInterface
 from services.interfaces import OrderServiceInterface
+from core.tracing import trace_methods
 from clients import ProductServiceClient
 from clients import LogisticsServiceClient
+from clients import StockChange
+from clients import destination_key
+from services.order_side_effects import OrderSideEffects, stock_payload
+from services.order_side_effects import STOCK_RELEASE, STOCK_REDUCE, SHIPMENT_CREATE, SHIPMENT_CANCEL
 
 
+logger = logging.getLogger("order_service.import")
+stock_logger = logging.getLogger("order_service.stock")
+
+# Errors a row's own data can cause; anything else aborts the import.
+IMPORT_ROW_ERRORS = (IntegrityError, DataError)
+
+ALLOWED_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.IN_TRANSIT, OrderStatus.CANCELLED},
+    OrderStatus.IN_TRANSIT: {OrderStatus.COMPLETED, OrderStatus.CANCELLED},
+    OrderStatus.COMPLETED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+
+@trace_methods
 class OrderService(OrderServiceInterface):
 
     def __init__(
@@ -24,12 +62,22 @@ class OrderService(OrderServiceInterface):
         repository: OrderRepositoryInterface,
         address_repository: AddressRepositoryInterface,
         product_client: ProductServiceClient,
-        logistics_client: LogisticsServiceClient
+        logistics_client: LogisticsServiceClient,
+        max_concurrency: int = 10,
+        outbox_repository: Optional[OutboxRepositoryInterface] = None
     ):
+        if max_concurrency < 1:
+            raise ValueError("Maximum concurrency must be at least one.")
+
         self._repository = repository
         self._address_repository = address_repository
         self._product_client = product_client
         self._logistics_client = logistics_client
+        self._max_concurrency = max_concurrency
+        # With an outbox, status-change side effects are committed with the order
+        # and applied by the OutboxDispatcher; without one they run inline.
+        self._outbox_repository = outbox_repository
+        self._side_effects = OrderSideEffects(product_client, logistics_client)
 
 
     async def CreateAsync(self, dto: OrderCreateDTO, session) -> OrderReadDTO:
@@ -39,29 +87,14 @@ class OrderService(OrderServiceInterface):
         if isinstance(dto, dict):
             dto = OrderCreateDTO(**dto)
 
-        for item in dto.items:
-            if item.product_variant_id:
-                product_data = await self._product_client.get_variant(item.product_variant_id)
-
-                if not product_data:
-                    raise RuntimeError(f"Product Variant {item.product_variant_id} not found.")
-
-                item.unit_price = Decimal(product_data["price"])
-                await self._product_client.reserve_variant_stock(item.product_variant_id, item.quantity)
-
-            else:
-                product_data = await self._product_client.get_product(item.product_id)
-
-                if not product_data:
-                    raise RuntimeError(f"Product {item.product_id} not found.")
-
-                item.unit_price = Decimal(product_data["price"])
-                await self._product_client.reserve_product_stock(item.product_id, item.quantity)
+        await self._resolve_prices(dto.items)
+        await self._product_client.modify_stock_many("reserve", self._stock_changes(dto.items))
 
         entity = Order(
             id=str(uuid.uuid4()),
             customer_id=str(dto.customer_id),
             created_at=datetime.now(timezone.utc),
+            version=1,
             status=OrderStatus.PENDING,
             items=[
                 OrderItem(
@@ -78,42 +111,134 @@ class OrderService(OrderServiceInterface):
             Decimal(item.unit_price) * item.quantity for item in entity.items
         )
 
-        await self._repository.AddAsync(entity, session=session)
+        try:
+            await self._repository.AddAsync(entity, session=session)
+        except Exception:
+            await self._release_stock_quietly(entity.id, self._stock_changes(dto.items))
+            raise
 
-        return OrderReadDTO(
-            id=entity.id,
-            created_at=entity.created_at,
-            customer_id=entity.customer_id,
-            shipment_id=entity.shipment_id,
-            total_amount=entity.total_amount,
-            status=entity.status,
-            items=[
-                OrderItemReadDTO(
-                    id=i.id,
-                    product_id=i.product_id,
-                    product_variant_id=i.product_variant_id,
-                    quantity=i.quantity,
-                    unit_price=i.unit_price,
-                    total_price=i.unit_price * i.quantity
+        return self._to_read_dto(entity)
+
+
+    async def ImportAsync(
+        self,
+        records: AsyncIterable[ImportRecord],
+        session,
+        chunk_size: int = 1000
+    ) -> OrderImportResultDTO:
+        """Store historical orders as given; prices are not looked up and stock is not reserved."""
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least one.")
+
+        result = OrderImportResultDTO()
+        chunk: List[Tuple[int, OrderImportDTO]] = []
+
+        async for record in records:
+            result.received += 1
+            order_id = record.data.get("id") if record.data else None
+            if record.error:
+                self._reject(result, record.row, order_id, record.error)
+                continue
+
+            try:
+                chunk.append((record.row, OrderImportDTO.model_validate(record.data)))
+            except ValidationError as e:
+                message = "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
                 )
-                for i in entity.items
-            ]
-        )
+                self._reject(result, record.row, order_id, message)
+                continue
 
+            if len(chunk) >= chunk_size:
+                await self._import_chunk(chunk, session, result)
+                chunk = []
 
-    async def GetAllAsync(self, session) -> List[OrderReadDTO]:
-        entities = await self._repository.GetAllAsync(session=session)
+        if chunk:
+            await self._import_chunk(chunk, session, result)
 
-        if not entities:
-            return []
+        result.errors.sort(key=lambda error: error.row)
+        return result
 
-        return [
-            OrderReadDTO.from_orm(e) for e in entities
-        ]
+    async def GetPageAsync(
+        self,
+        limit: int,
+        session,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> Tuple[List[OrderReadDTO], Optional[str]]:
+        if limit < 1:
+            raise ValueError("Page size must be at least one.")
+
+        after = decode_cursor(cursor) if cursor else None
+        filters = filters or OrderFilterDTO()
+
+        # Fetch one extra row to find out whether another page follows.
+        entities = await self._repository.GetPageAsync(
+            limit + 1,
+            session=session,
+            after=after,
+            customer_id=filters.customer_id,
+            status=filters.status,
+            created_from=filters.created_from,
+            created_to=filters.created_to,
+        )
 
+        page = entities[:limit]
+        next_cursor = None
+        if len(entities) > limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
 
+        return [self._to_read_dto(e) for e in page], next_cursor
 
+    async def GetPageVersionsAsync(
+        self,
+        limit: int,
+        session,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> Tuple[List[Row], bool]:
+        if limit < 1:
+            raise ValueError("Page size must be at least one.")
+
+        after = decode_cursor(cursor) if cursor else None
+        filters = filters or OrderFilterDTO()
+
+        versions = await self._repository.GetPageVersionsAsync(
+            limit + 1,
+            session=session,
+            after=after,
+            customer_id=filters.customer_id,
+            status=filters.status,
+            created_from=filters.created_from,
+            created_to=filters.created_to,
+        )
+        return versions[:limit], len(versions) > limit
 
+    def StreamAsync(
+        self,
+        chunk_size: int,
+        cursor: Optional[str] = None,
+        filters: Optional[OrderFilterDTO] = None
+    ) -> AsyncIterator[OrderReadDTO]:
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least one.")
+
+        # Decoded eagerly so an invalid cursor is reported before streaming starts.
+        after = decode_cursor(cursor) if cursor else None
+        filters = filters or OrderFilterDTO()
+
+        async def stream():
+            async for entity in self._repository.StreamAsync(
+                chunk_size,
+                after=after,
+                customer_id=filters.customer_id,
+                status=filters.status,
+                created_from=filters.created_from,
+                created_to=filters.created_to,
+            ):
+                yield self._to_read_dto(entity)
+
+        return stream()
 
     async def GetByIdAsync(self, id: str, session) -> Optional[OrderReadDTO]:
         if not id:
@@ -124,27 +249,17 @@ class OrderService(OrderServiceInterface):
         if entity is None:
             return None
 
-        return OrderReadDTO(
-            id=entity.id,
-            created_at=entity.created_at,
-            customer_id=entity.customer_id,
-            shipment_id=entity.shipment_id,
-            total_amount=entity.total_amount,
-            status=entity.status,
-            items=[
-                OrderItemReadDTO(
-                    id=item.id,
-                    product_id=item.product_id,
-                    product_variant_id=item.product_variant_id,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price,
-                    total_price=item.unit_price * item.quantity
-                )
-                for item in entity.items
-            ]
-        )
+        return self._to_read_dto(entity)
 
-    async def UpdateAsync(self, id: str, dto: OrderUpdateDTO, session) -> OrderReadDTO:
+    async def GetVersionAsync(self, id: str, session) -> Optional[Row]:
+        if not id:
+            raise ValueError("Record identifier cannot be empty.")
+
+        return await self._repository.GetVersionAsync(id, session=session)
+
+    async def UpdateAsync(
+        self, id: str, dto: OrderUpdateDTO, session, expected_version: Optional[int] = None
+    ) -> OrderReadDTO:
         if isinstance(dto, dict):
             dto = OrderUpdateDTO(**dto)
 
@@ -155,12 +270,16 @@ class OrderService(OrderServiceInterface):
         if existing is None:
             return None
 
+        check_version(existing, expected_version)
+
         if existing.status in [OrderStatus.PROCESSING, OrderStatus.IN_TRANSIT]:
             raise ValueError("Order can no longer be updated once it is processing or in transit.")
 
         if existing.status in [OrderStatus.COMPLETED, OrderStatus.CANCELLED]:
             raise ValueError("Order cannot be modified once completed or cancelLed.")
 
+        reservations = []
+        releases = []
         if dto.items is not None:
             for dto_item in dto.items:
                 if dto_item.quantity <= 0:
@@ -174,42 +293,40 @@ class OrderService(OrderServiceInterface):
                 # Compute quantity delta
                 delta_quantity = dto_item.quantity - entity_item.quantity
                 entity_item.quantity = dto_item.quantity
+                entity_item.unit_price = await self._fetch_price(entity_item)
 
-                if entity_item.product_variant_id:
-                    product_data = await self._product_client.get_variant(entity_item.product_variant_id)
-                    if not product_data:
-                        raise RuntimeError(f"Product Variant {entity_item.product_variant_id} not found.")
-                    entity_item.unit_price = Decimal(product_data["price"])
-
-                    if delta_quantity > 0:
-                        await self._product_client.reserve_variant_stock(entity_item.product_variant_id, delta_quantity)
-                    elif delta_quantity < 0:
-                        await self._product_client.release_variant_stock(entity_item.product_variant_id, -delta_quantity)
-
-                else:
-                    product_data = await self._product_client.get_product(entity_item.product_id)
-                    if not product_data:
-                        raise RuntimeError(f"Product {entity_item.product_id} not found.")
-                    entity_item.unit_price = Decimal(product_data["price"])
-
-                    if delta_quantity > 0:
-                        await self._product_client.reserve_product_stock(entity_item.product_id, delta_quantity)
-                    elif delta_quantity < 0:
-                        await self._product_client.release_product_stock(entity_item.product_id, -delta_quantity)
+                if delta_quantity > 0:
+                    reservations.append(StockChange(entity_item.product_id, entity_item.product_variant_id, delta_quantity))
+                elif delta_quantity < 0:
+                    releases.append(StockChange(entity_item.product_id, entity_item.product_variant_id, -delta_quantity))
 
+            await self._product_client.modify_stock_many("reserve", reservations)
+            try:
+                await self._product_client.modify_stock_many("release", releases)
+            except Exception:
+                await self._release_stock_quietly(existing.id, reservations)
+                raise
 
         existing.updated_at = datetime.now(timezone.utc)
 
-        await self._repository.UpdateAsync(existing, session=session)
+        try:
+            await self._repository.UpdateAsync(existing, session=session)
+        except ConcurrencyConflictError:
+            # The other writer's quantities stand, so undo the stock moved for ours.
+            await self._release_stock_quietly(existing.id, reservations)
+            await self._modify_stock_quietly(existing.id, "reserve", releases)
+            raise
         return existing
 
 
-    async def DeleteAsync(self, id: str, session) -> bool:
+    async def DeleteAsync(self, id: str, session, expected_version: Optional[int] = None) -> bool:
         if not id:
             raise ValueError("Record identifier cannot be empty.")
-        return await self._repository.DeleteAsync(id, session=session)
+        return await self._repository.DeleteAsync(id, session=session, expected_version=expected_version)
 
-    async def PatchAsync(self, id: str, dto: OrderPatchDTO, session) -> bool:
+    async def PatchAsync(
+        self, id: str, dto: OrderPatchDTO, session, expected_version: Optional[int] = None
+    ) -> Optional[OrderReadDTO]:
         if isinstance(dto, dict):
             dto = OrderPatchDTO(**dto)
 
@@ -218,96 +335,392 @@ class OrderService(OrderServiceInterface):
 
         existing = await self._repository.GetByIdAsync(id, session=session)
         if existing is None:
-            return False
-
-        if dto.status is not None:
-            allowed_transitions = {
-                OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
-                OrderStatus.PROCESSING: {OrderStatus.IN_TRANSIT, OrderStatus.CANCELLED},
-                OrderStatus.IN_TRANSIT: {OrderStatus.COMPLETED, OrderStatus.CANCELLED},
-                OrderStatus.COMPLETED: set(),   
-                OrderStatus.CANCELLED: set(),
-            }
+            return None
 
-            current_status = existing.status
-            new_status = dto.status
+        check_version(existing, expected_version)
 
-            if new_status not in allowed_transitions.get(current_status, set()):
-                raise ValueError(
-                    f"Inappropriate status transition: {current_status.value} to {new_status.value}"
-                )
+        if dto.status is not None:
+            new_status = OrderStatus(dto.status)
+            self._check_transition(existing.status, new_status)
 
-            if new_status == OrderStatus.CANCELLED:
-                for item in existing.items:
-                    if item.product_variant_id:
-                        await self._product_client.release_variant_stock(item.product_variant_id, item.quantity)
-                    else:
-                        await self._product_client.release_product_stock(item.product_id, item.quantity)
-
-                if existing.shipment_id:
-                    shipment_update_payload = {
-                        "shipment_id": existing.shipment_id,
-                        "status": "Cancelled"
-                    }
-                    await self._logistics_client.update_shipment(**shipment_update_payload)
-
-            elif new_status == OrderStatus.COMPLETED:
-                for item in existing.items:
-                    if item.product_variant_id:
-                        await self._product_client.reduce_variant_stock(item.product_variant_id, item.quantity)
-                    else:
-                        await self._product_client.reduce_product_stock(item.product_id, item.quantity)
-
-            elif new_status == OrderStatus.IN_TRANSIT:
-                if not existing.shipment_id:
-                    raise ValueError("Cannot move to IN_TRANSIT: shipment does not exist.")
-
-                shipment_status_response = await self._logistics_client.get_shipment(existing.shipment_id)
-                if not shipment_status_response or shipment_status_response.get("status") != "InTransit":
-                    raise ValueError("Shipment is not yet dispatched; cannot move order to IN_TRANSIT.")
-
-                existing.status = OrderStatus.IN_TRANSIT
-
-
-            elif new_status == OrderStatus.PROCESSING:
-
-                if not existing.shipment_id:
-                    address_entity = await self._address_repository.GetByCustomerIdAsync(
-                        existing.customer_id, session=session
-                    )
-                    if not address_entity:
-                        raise ValueError(f"No address found for customer {existing.customer_id}")
-
-                    availability_payload = {
-                        "street": address_entity.street,
-                        "city": address_entity.city,
-                        "state": address_entity.state,
-                        "postalCode": address_entity.postal_code,
-                        "country": address_entity.country
-                    }
-
-                    availability_response = await self._logistics_client.check_availability(**availability_payload)
-                    if not availability_response or not availability_response.get("valid", False):
-                        raise ValueError("Destination is not serviceable for shipping.")
-
-                    shipment_payload = {
-                        "order_id": str(existing.id),
-                        "status": "Pending",
-                        "dispatchDate": None,
-                        "carrier": "DefaultCarrier",
-                        "serviceLevel": "Standard",
-                        **availability_payload
-                    }
-
-                    shipment_response = await self._logistics_client.create_shipment(**shipment_payload)
-                    if not shipment_response or not shipment_response.get("id"):
-                        raise RuntimeError("Shipment creation failed, order not saved.")
-
-                    existing.shipment_id = shipment_response["id"]
+            destination = None
+            if new_status == OrderStatus.PROCESSING and not existing.shipment_id:
+                destination = await self._serviceable_destination(existing.customer_id, session)
 
+            effects = await self._plan_transition(existing, new_status, destination)
+            if self._outbox_repository is None:
+                await self._lock_for_inline_effects(existing, session)
+            await self._apply_side_effects(existing, effects, session)
             existing.status = new_status
 
         existing.updated_at = datetime.now(timezone.utc)
 
         await self._repository.UpdateAsync(existing, session=session)
-        return True
+        return self._to_read_dto(existing)
+
+    async def BatchPatchAsync(self, dto: OrderBatchPatchDTO, session) -> OrderBatchPatchResultDTO:
+        if isinstance(dto, dict):
+            dto = OrderBatchPatchDTO(**dto)
+
+        if dto is None:
+            raise ValueError("Record data cannot be null.")
+
+        order_ids = list(dict.fromkeys(dto.order_ids))
+        new_status = OrderStatus(dto.status)
+        result = OrderBatchPatchResultDTO(received=len(order_ids))
+
+        orders = {order.id: order for order in await self._repository.GetByIdsAsync(order_ids, session=session)}
+
+        candidates = []
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is None:
+                self._reject_transition(result, order_id, "Record not found")
+                continue
+            try:
+                self._check_transition(order.status, new_status)
+            except ValueError as e:
+                self._reject_transition(result, order_id, str(e))
+                continue
+            candidates.append(order)
+
+        destinations = {}
+        if new_status == OrderStatus.PROCESSING:
+            destinations = await self._serviceable_destinations(
+                [order for order in candidates if not order.shipment_id], session
+            )
+
+        async def plan(order: Order):
+            destination = destinations.get(order.id)
+            if isinstance(destination, BaseException):
+                raise destination
+            return await self._plan_transition(order, new_status, destination)
+
+        plans = await self._gather_bounded([lambda order=order: plan(order) for order in candidates])
+
+        ready = []
+        for order, effects in zip(candidates, plans):
+            if isinstance(effects, BaseException):
+                self._reject_transition(result, order.id, str(effects))
+            else:
+                ready.append((order, effects))
+
+        if self._outbox_repository is None:
+            # Locked first, so orders that changed since they were read never reach the upstream services.
+            ready_ids = [order.id for order, _ in ready]
+            conflicts = await self._repository.LockManyAsync([order for order, _ in ready], session=session)
+            for order_id in conflicts:
+                self._reject_transition(result, order_id, str(conflicts[order_id]))
+            ready = [entry for order_id, entry in zip(ready_ids, ready) if order_id not in conflicts]
+
+            # Inline effects only call upstream services, so orders can go in parallel.
+            outcomes = await self._gather_bounded(
+                [lambda order=order, effects=effects: self._apply_side_effects(order, effects, session)
+                 for order, effects in ready]
+            )
+        else:
+            # Enqueued with each order's update below.
+            outcomes = [None] * len(ready)
+
+        staged = {}
+        for (order, effects), outcome in zip(ready, outcomes):
+            if isinstance(outcome, BaseException):
+                self._reject_transition(result, order.id, str(outcome))
+            else:
+                staged[order.id] = (order, effects)
+
+        async def transition(order: Order):
+            if self._outbox_repository is not None:
+                # Inside the order's savepoint, so a conflict drops its messages too.
+                await self._apply_side_effects(order, staged[order.id][1], session)
+            order.status = new_status
+
+        updated = []
+        if staged:
+            conflicts = await self._repository.UpdateManyAsync(
+                [order for order, _ in staged.values()], session=session, apply=transition
+            )
+            for order_id, (order, _) in staged.items():
+                if order_id in conflicts:
+                    self._reject_transition(result, order_id, str(conflicts[order_id]))
+                else:
+                    updated.append(order)
+
+        position = {order_id: index for index, order_id in enumerate(order_ids)}
+        result.errors.sort(key=lambda error: position[error.order_id])
+        result.updated = [self._to_read_dto(order) for order in updated]
+        return result
+
+
+    # ---------------- Private helpers ----------------
+
+    @staticmethod
+    def _to_read_dto(entity: Order) -> OrderReadDTO:
+        # The entity's columns already have the DTO's types, so nothing is validated again.
+        return OrderReadDTO.model_construct(
+            id=entity.id,
+            created_at=entity.created_at,
+            updated_at=entity.updated_at,
+            version=entity.version,
+            customer_id=entity.customer_id,
+            shipment_id=entity.shipment_id,
+            total_amount=entity.total_amount,
+            status=entity.status,
+            items=[
+                OrderItemReadDTO.model_construct(
+                    id=item.id,
+                    product_id=item.product_id,
+                    product_variant_id=item.product_variant_id,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    total_price=item.unit_price * item.quantity
+                )
+                for item in entity.items
+            ]
+        )
+
+    @staticmethod
+    def _check_transition(current_status: OrderStatus, new_status: OrderStatus) -> None:
+        if new_status not in ALLOWED_STATUS_TRANSITIONS.get(current_status, set()):
+            raise ValueError(
+                f"Inappropriate status transition: {current_status.value} to {new_status.value}"
+            )
+
+    async def _plan_transition(
+        self, order: Order, new_status: OrderStatus, destination: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Validates the transition against upstream state and returns the side effects it needs, in order.
+
+        `destination` is the checked shipping address, required when moving an
+        order without a shipment to PROCESSING.
+        """
+        if new_status == OrderStatus.CANCELLED:
+            effects = [(STOCK_RELEASE, stock_payload(self._stock_changes(order.items)))]
+
+            # A shipment may still be on its way through the outbox, so past
+            # PENDING the handler checks for one when it runs.
+            if order.shipment_id or order.status != OrderStatus.PENDING:
+                effects.append((SHIPMENT_CANCEL, {}))
+            return effects
+
+        if new_status == OrderStatus.COMPLETED:
+            return [(STOCK_REDUCE, stock_payload(self._stock_changes(order.items)))]
+
+        if new_status == OrderStatus.IN_TRANSIT:
+            if not order.shipment_id:
+                raise ValueError("Cannot move to IN_TRANSIT: shipment does not exist.")
+
+            shipment_status_response = await self._logistics_client.get_shipment(order.shipment_id)
+            if not shipment_status_response or shipment_status_response.get("status") != "InTransit":
+                raise ValueError("Shipment is not yet dispatched; cannot move order to IN_TRANSIT.")
+            return []
+
+        if new_status == OrderStatus.PROCESSING and not order.shipment_id:
+            shipment_payload = {
+                "order_id": str(order.id),
+                "status": "Pending",
+                "dispatchDate": None,
+                "carrier": "DefaultCarrier",
+                "serviceLevel": "Standard",
+                **destination
+            }
+            return [(SHIPMENT_CREATE, shipment_payload)]
+
+        return []
+
+    @staticmethod
+    def _destination(address) -> Dict[str, Any]:
+        return {
+            "street": address.street,
+            "city": address.city,
+            "state": address.state,
+            "postalCode": address.postal_code,
+            "country": address.country
+        }
+
+    async def _check_serviceable(self, destination: Dict[str, Any]) -> None:
+        availability_response = await self._logistics_client.check_availability(**destination)
+        if not availability_response or not availability_response.get("valid", False):
+            raise ValueError("Destination is not serviceable for shipping.")
+
+    async def _serviceable_destination(self, customer_id: str, session) -> Dict[str, Any]:
+        address_entity = await self._address_repository.GetByCustomerIdAsync(customer_id, session=session)
+        if not address_entity:
+            raise ValueError(f"No address found for customer {customer_id}")
+
+        destination = self._destination(address_entity)
+        await self._check_serviceable(destination)
+        return destination
+
+    async def _serviceable_destinations(self, orders: List[Order], session) -> Dict[str, Any]:
+        """Maps each order id to its checked destination, or to the error that rules it out.
+
+        Addresses come from one query, and each distinct address is checked once
+        for the whole batch however many orders ship to it.
+        """
+        customer_ids = sorted({order.customer_id for order in orders})
+        addresses = {}
+        for address in await self._address_repository.GetByCustomerIdsAsync(customer_ids, session=session):
+            addresses.setdefault(address.customer_id, address)
+
+        destinations = {}
+        groups: Dict[tuple, Tuple[Dict[str, Any], List[Order]]] = {}
+        for order in orders:
+            address = addresses.get(order.customer_id)
+            if address is None:
+                destinations[order.id] = ValueError(f"No address found for customer {order.customer_id}")
+                continue
+
+            destination = self._destination(address)
+            groups.setdefault(destination_key(**destination), (destination, []))[1].append(order)
+
+        checks = await self._gather_bounded(
+            [lambda destination=destination: self._check_serviceable(destination) for destination, _ in groups.values()]
+        )
+        for (destination, members), check in zip(groups.values(), checks):
+            for order in members:
+                destinations[order.id] = check if isinstance(check, BaseException) else destination
+        return destinations
+
+    async def _apply_side_effects(self, order: Order, effects: List[Tuple[str, dict]], session) -> None:
+        for event_type, payload in effects:
+            await self._apply_side_effect(order, event_type, payload, session)
+
+    async def _lock_for_inline_effects(self, order: Order, session) -> None:
+        # Inline effects cannot be rolled back, so a lost race must surface before they run.
+        order_id = order.id
+        conflicts = await self._repository.LockManyAsync([order], session=session)
+        if order_id in conflicts:
+            raise conflicts[order_id]
+
+    @staticmethod
+    def _reject_transition(result: OrderBatchPatchResultDTO, order_id: str, error: str) -> None:
+        result.failed += 1
+        result.errors.append(OrderBatchPatchErrorDTO(order_id=order_id, error=error))
+
+    async def _apply_side_effect(self, order: Order, event_type: str, payload: dict, session) -> None:
+        if self._outbox_repository is None:
+            await self._side_effects.apply(event_type, payload, order)
+            return
+
+        now = datetime.now(timezone.utc)
+        message = OutboxMessage(
+            aggregate_id=order.id,
+            event_type=event_type,
+            payload=payload,
+            created_at=now,
+            available_at=now,
+        )
+        await self._outbox_repository.EnqueueAsync(message, session=session)
+
+    async def _gather_bounded(self, calls) -> list:
+        """Runs the given coroutine factories with at most max_concurrency in flight.
+
+        Results are returned in call order; failures are returned as exceptions
+        instead of being raised, so callers can tell which calls succeeded.
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def run(call):
+            async with semaphore:
+                return await call()
+
+        return await asyncio.gather(*(run(call) for call in calls), return_exceptions=True)
+
+    async def _fetch_price(self, item) -> Decimal:
+        if item.product_variant_id:
+            product_data = await self._product_client.get_variant(item.product_variant_id)
+            if not product_data:
+                raise RuntimeError(f"Product Variant {item.product_variant_id} not found.")
+        else:
+            product_data = await self._product_client.get_product(item.product_id)
+            if not product_data:
+                raise RuntimeError(f"Product {item.product_id} not found.")
+
+        return Decimal(product_data["price"])
+
+    async def _resolve_prices(self, items) -> None:
+        results = await self._gather_bounded(
+            [lambda item=item: self._fetch_price(item) for item in items]
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        for item, price in zip(items, results):
+            item.unit_price = price
+
+    async def _import_chunk(self, chunk: List[Tuple[int, OrderImportDTO]], session, result: OrderImportResultDTO) -> None:
+        rows = [self._import_rows(dto) for _, dto in chunk]
+        try:
+            await self._repository.BulkInsertAsync(
+                [order for order, _ in rows], [item for _, items in rows for item in items], session=session
+            )
+            result.imported += len(rows)
+            return
+        except IMPORT_ROW_ERRORS as e:
+            logger.warning(
+                "Import chunk of rows %s-%s was rejected, retrying row by row: %s",
+                chunk[0][0], chunk[-1][0], getattr(e, "orig", None) or e,
+            )
+
+        # The chunk was rolled back; insert its orders one by one to find the offending ones.
+        for (row, _), (order, items) in zip(chunk, rows):
+            try:
+                await self._repository.BulkInsertAsync([order], items, session=session)
+                result.imported += 1
+            except IMPORT_ROW_ERRORS as e:
+                self._reject(result, row, order["id"], str(getattr(e, "orig", None) or e))
+
+    @staticmethod
+    def _import_rows(dto: OrderImportDTO) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        order_id = dto.id or str(uuid.uuid4())
+        order = {
+            "id": order_id,
+            "created_at": dto.created_at or datetime.now(timezone.utc),
+            "updated_at": dto.updated_at,
+            "customer_id": dto.customer_id,
+            "shipment_id": dto.shipment_id,
+            "total_amount": dto.total_amount,
+            "status": dto.status,
+        }
+        items = [
+            {
+                "id": item.id or str(uuid.uuid4()),
+                "order_id": order_id,
+                "product_id": item.product_id,
+                "product_variant_id": item.product_variant_id,
+                "quantity": item.quantity,
+                "unit_price": float(item.unit_price),
+            }
+            for item in dto.items
+        ]
+        return order, items
+
+    @staticmethod
+    def _reject(result: OrderImportResultDTO, row: int, order_id: Optional[str], error: str) -> None:
+        result.failed += 1
+        result.errors.append(OrderImportErrorDTO(row=row, order_id=order_id, error=error))
+
+    @staticmethod
+    def _stock_changes(items) -> List[StockChange]:
+        return [StockChange(item.product_id, item.product_variant_id, item.quantity) for item in items]
+
+    async def _release_stock_quietly(self, order_id: str, changes: List[StockChange]) -> None:
+        await self._modify_stock_quietly(order_id, "release", changes)
+
+    async def _modify_stock_quietly(self, order_id: str, action: str, changes: List[StockChange]) -> None:
+        # Best effort: a failed compensation must not mask the error that triggered it,
+        # but the stock it leaves behind has to be fixed by hand, so it is logged.
+        try:
+            await self._product_client.modify_stock_many(action, changes)
+        except Exception:
+            product_ids = [change.product_variant_id or change.product_id for change in changes]
+            stock_logger.exception(
+                "Could not %s stock for order %s to compensate a failed write; products: %s",
+                action,
+                order_id,
+                ", ".join(product_ids),
+                extra={"order_id": order_id, "action": action, "product_ids": product_ids},
+            )
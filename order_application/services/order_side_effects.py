@@ -0,0 +1,65 @@
+﻿from typing import Any, Dict, List, Optional
+
+from clients import LogisticsServiceClient, ProductServiceClient, StockChange
+from models.entities import Order
+from models.enums import OrderStatus
+
+
+STOCK_RELEASE = "stock.release"
+STOCK_REDUCE = "stock.reduce"
+SHIPMENT_CREATE = "shipment.create"
+SHIPMENT_CANCEL = "shipment.cancel"
+
+
+def stock_payload(changes: List[StockChange]) -> Dict[str, Any]:
+    return {"changes": [change._asdict() for change in changes]}
+
+
+class OrderSideEffects:
+    """Applies the upstream effects of an order status change.
+
+    Runs inline when no outbox is configured and from the outbox dispatcher
+    otherwise. Shipment handlers re-read the order, so a delayed message acts
+    on its current state rather than the state it was recorded in.
+    """
+
+    def __init__(self, product_client: ProductServiceClient, logistics_client: LogisticsServiceClient):
+        self._product_client = product_client
+        self._logistics_client = logistics_client
+        self._handlers = {
+            STOCK_RELEASE: self._release_stock,
+            STOCK_REDUCE: self._reduce_stock,
+            SHIPMENT_CREATE: self._create_shipment,
+            SHIPMENT_CANCEL: self._cancel_shipment,
+        }
+
+    async def apply(self, event_type: str, payload: Dict[str, Any], order: Optional[Order]) -> None:
+        handler = self._handlers.get(event_type)
+        if handler is None:
+            raise ValueError(f"Unknown side effect '{event_type}'.")
+        await handler(payload, order)
+
+    # ---------------- Handlers ----------------
+
+    async def _release_stock(self, payload: Dict[str, Any], order: Optional[Order]) -> None:
+        await self._product_client.modify_stock_many("release", [StockChange(**c) for c in payload["changes"]])
+
+    async def _reduce_stock(self, payload: Dict[str, Any], order: Optional[Order]) -> None:
+        await self._product_client.modify_stock_many("reduce", [StockChange(**c) for c in payload["changes"]])
+
+    async def _create_shipment(self, payload: Dict[str, Any], order: Optional[Order]) -> None:
+        # Already shipped, or cancelled while the message was waiting.
+        if order is None or order.shipment_id or order.status == OrderStatus.CANCELLED:
+            return
+
+        shipment_response = await self._logistics_client.create_shipment(**payload)
+        if not shipment_response or not shipment_response.get("id"):
+            raise RuntimeError("Shipment creation failed, order not saved.")
+
+        order.shipment_id = shipment_response["id"]
+
+    async def _cancel_shipment(self, payload: Dict[str, Any], order: Optional[Order]) -> None:
+        if order is None or not order.shipment_id:
+            return
+
+        await self._logistics_client.update_shipment(shipment_id=order.shipment_id, status="Cancelled")
@@ -0,0 +1,144 @@
+﻿import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from clients import RetryPolicy
+from core.tracing import tracer
+from repositories.interfaces import OrderRepositoryInterface, OutboxRepositoryInterface
+from models.entities import Order, OutboxMessage
+from models.enums import OutboxStatus
+from services.order_side_effects import OrderSideEffects
+
+
+logger = logging.getLogger("order_service.outbox")
+
+
+class OutboxDispatcher:
+    """Background worker that drains the outbox in batches.
+
+    Delivery is at least once: a message whose effect was applied upstream but
+    whose status update was lost to a crash is applied again. Messages of
+    different orders are applied concurrently, those of one order in sequence.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        outbox_repository: OutboxRepositoryInterface,
+        order_repository: OrderRepositoryInterface,
+        side_effects: OrderSideEffects,
+        batch_size: int = 100,
+        max_concurrency: int = 10,
+        poll_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_policy: RetryPolicy = RetryPolicy(base_delay=1, max_delay=300),
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least one.")
+        if max_concurrency < 1:
+            raise ValueError("Maximum concurrency must be at least one.")
+
+        self._session_factory = session_factory
+        self._outbox_repository = outbox_repository
+        self._order_repository = order_repository
+        self._side_effects = side_effects
+        self._batch_size = batch_size
+        self._max_concurrency = max_concurrency
+        self._poll_interval = poll_interval
+        self._max_attempts = max_attempts
+        self._retry_policy = retry_policy
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+
+    async def DispatchBatchAsync(self) -> int:
+        """Apply one batch of due messages; returns how many were claimed."""
+        async with self._session_factory() as session:
+            now = self._clock()
+            messages = await self._outbox_repository.ClaimBatchAsync(self._batch_size, now, session=session)
+            if not messages:
+                return 0
+
+            # Polling is not traced; a batch with work gets a trace of its own.
+            with tracer.span("OutboxDispatcher.DispatchBatchAsync", attributes={"outbox.messages": len(messages)}):
+                await self._dispatch_batch(messages, now, session)
+
+            await session.commit()
+            return len(messages)
+
+    async def _dispatch_batch(self, messages: List[OutboxMessage], now: datetime, session) -> None:
+        by_order: Dict[str, List[OutboxMessage]] = {}
+        for message in messages:
+            by_order.setdefault(message.aggregate_id, []).append(message)
+
+        # Loaded up front: the session cannot be shared by the concurrent tasks below.
+        orders = {
+            order.id: order
+            for order in await self._order_repository.GetByIdsAsync(list(by_order), session=session)
+        }
+        # Detached, so the handlers' changes never reach a versioned UPDATE that a
+        # concurrent request could make fail; shipment ids are written back below.
+        for order in orders.values():
+            session.expunge(order)
+        shipment_ids = {order.id: order.shipment_id for order in orders.values()}
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def dispatch_order(order_messages: List[OutboxMessage]) -> None:
+            async with semaphore:
+                for message in order_messages:
+                    # After a failure, later messages of the same order wait so effects keep their order.
+                    if not await self._dispatch(message, orders.get(message.aggregate_id), now):
+                        break
+
+        await asyncio.gather(*(dispatch_order(order_messages) for order_messages in by_order.values()))
+
+        assigned = {
+            order.id: order.shipment_id for order in orders.values() if order.shipment_id != shipment_ids[order.id]
+        }
+        if assigned:
+            await self._order_repository.AssignShipmentsAsync(assigned, session=session)
+
+    async def _dispatch(self, message: OutboxMessage, order: Optional[Order], now: datetime) -> bool:
+        message.attempts += 1
+        try:
+            await self._side_effects.apply(message.event_type, message.payload, order)
+        except Exception as e:
+            message.last_error = str(e)[:2000]
+            if message.attempts >= self._max_attempts:
+                message.status = OutboxStatus.FAILED.value
+                logger.error("Outbox message %s (%s) failed for good: %s", message.id, message.event_type, e)
+            else:
+                delay = self._retry_policy.backoff(message.attempts)
+                message.available_at = now + timedelta(seconds=delay)
+            return False
+
+        message.status = OutboxStatus.PROCESSED.value
+        message.processed_at = now
+        return True
+
+    async def run(self) -> None:
+        while True:
+            try:
+                claimed = await self.DispatchBatchAsync()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+
+            # A full batch suggests a backlog, so go again without waiting.
+            if claimed < self._batch_size:
+                await asyncio.sleep(self._poll_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
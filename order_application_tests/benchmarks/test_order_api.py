@@ -0,0 +1,16 @@
+﻿import pytest
+
+from benchmarks.order_api import percentile
+
+
+# region Percentile Function.
+
+@pytest.mark.parametrize("fraction, expected", [(0.50, 50), (0.95, 95), (0.99, 99), (1.0, 100)])
+def test_Percentile_ShouldPickTheNearestRank(fraction, expected):
+    assert percentile(list(range(1, 101)), fraction) == expected
+
+
+def test_Percentile_ShouldReturnZero_WhenThereAreNoValues():
+    assert percentile([], 0.95) == 0.0
+
+# endregion
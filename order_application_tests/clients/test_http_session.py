@@ -0,0 +1,106 @@
+﻿import asyncio
+import pytest
+from aiohttp import web
+from aiohttp import test_utils
+
+from clients.http_session import HttpClientSettings, create_client_session, pool_stats
+
+
+# region CreateClientSession Method.
+
+@pytest.mark.asyncio
+async def test_CreateClientSession_ShouldApplyPoolSettings():
+    # Arrange
+    settings = HttpClientSettings(pool_limit=7, pool_limit_per_host=3, keepalive_timeout=12, dns_cache_ttl=60)
+
+    # Act
+    session = create_client_session(settings)
+
+    # Assert
+    try:
+        assert session.connector.limit == 7
+        assert session.connector.limit_per_host == 3
+        assert session.connector.use_dns_cache is True
+    finally:
+        await session.close()
+
+
+def test_TimeoutFor_ShouldCombineTotalAndConnectTimeouts():
+    # Arrange
+    settings = HttpClientSettings(connect_timeout=2)
+
+    # Act
+    timeout = settings.timeout_for(15)
+
+    # Assert
+    assert timeout.total == 15
+    assert timeout.connect == 2
+
+# endregion
+
+
+# region PoolStats Method.
+
+def test_PoolStats_ShouldReportClosed_WhenSessionIsMissing():
+    assert pool_stats(None) == {"open": False}
+
+
+@pytest.mark.asyncio
+async def test_PoolStats_ShouldTrackInUseAndIdleConnections():
+    # Arrange
+    release = asyncio.Event()
+    entered = asyncio.Event()
+
+    async def slow(request):
+        entered.set()
+        await release.wait()
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/slow", slow)
+    server = test_utils.TestServer(app)
+    await server.start_server()
+    session = create_client_session(HttpClientSettings(pool_limit=4))
+
+    try:
+        # Act
+        request = asyncio.create_task(session.get(server.make_url("/slow")))
+        await entered.wait()
+        during = pool_stats(session)
+        release.set()
+        response = await request
+        await response.read()
+        response.release()
+        after = pool_stats(session)
+
+        # Assert
+        assert during["in_use"] == 1
+        assert during["utilization"] == 0.25
+        assert after["in_use"] == 0
+        assert after["idle"] == 1
+    finally:
+        await session.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_PoolStats_ShouldReportUnknownCounts_WhenConnectorInternalsChange(monkeypatch):
+    # Arrange
+    session = create_client_session(HttpClientSettings(pool_limit=4))
+    monkeypatch.delattr(session.connector, "_acquired")
+    monkeypatch.setattr(session.connector, "_conns", [], raising=False)
+
+    try:
+        # Act
+        stats = pool_stats(session)
+
+        # Assert
+        assert stats["in_use"] is None
+        assert stats["idle"] is None
+        assert stats["utilization"] is None
+        assert stats["limit"] == 4
+    finally:
+        monkeypatch.undo()
+        await session.close()
+
+# endregion
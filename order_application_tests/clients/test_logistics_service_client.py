@@ -0,0 +1,124 @@
+﻿import pytest
+from unittest.mock import AsyncMock
+
+from clients.logistics_service_client import LogisticsServiceClient, destination_key
+from core.cache import AsyncTTLCache
+from order_application_tests.fake_clock import FakeClock
+
+
+ADDRESS = {"street": "Rua A, 1", "city": "Curitiba", "state": "PR", "postalCode": "80000-000", "country": "Brasil"}
+
+
+def availability_cache(clock, ttl_seconds=3600, negative_ttl_seconds=60):
+    return AsyncTTLCache(
+        ttl_seconds,
+        max_entries=10,
+        clock=clock,
+        ttl_for=lambda result: ttl_seconds if result.get("valid") else negative_ttl_seconds,
+    )
+
+
+# region CheckAvailability Method.
+
+@pytest.mark.asyncio
+async def test_CheckAvailability_ShouldFetchOnce_ForTheSameNormalisedAddress():
+    # Arrange
+    client = LogisticsServiceClient("http://logistics/api", availability_cache=availability_cache(FakeClock()))
+    client._fetch_availability = AsyncMock(return_value={"valid": True})
+    respelled = {**ADDRESS, "street": "  rua a,   1 ", "city": "CURITIBA"}
+
+    # Act
+    first = await client.check_availability(**ADDRESS)
+    second = await client.check_availability(**respelled)
+
+    # Assert
+    assert first == second == {"valid": True}
+    client._fetch_availability.assert_awaited_once()
+    assert client.cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_CheckAvailability_ShouldCacheUnserviceableDestinations_ForTheNegativeTTL():
+    # Arrange
+    clock = FakeClock()
+    client = LogisticsServiceClient("http://logistics/api", availability_cache=availability_cache(clock))
+    client._fetch_availability = AsyncMock(side_effect=[{"valid": False}, {"valid": True}])
+
+    # Act
+    first = await client.check_availability(**ADDRESS)
+    clock.now = 30
+    cached = await client.check_availability(**ADDRESS)
+    clock.now = 61
+    refreshed = await client.check_availability(**ADDRESS)
+
+    # Assert
+    assert first == cached == {"valid": False}
+    assert refreshed == {"valid": True}
+    assert client._fetch_availability.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_CheckAvailability_ShouldNotCacheFailures():
+    # Arrange
+    client = LogisticsServiceClient("http://logistics/api", availability_cache=availability_cache(FakeClock()))
+    client._fetch_availability = AsyncMock(side_effect=[RuntimeError("Server error"), {"valid": True}])
+
+    # Act
+    with pytest.raises(RuntimeError):
+        await client.check_availability(**ADDRESS)
+    result = await client.check_availability(**ADDRESS)
+
+    # Assert
+    assert result == {"valid": True}
+
+
+@pytest.mark.asyncio
+async def test_CheckAvailability_ShouldFetchEveryTime_WhenCacheIsDisabled():
+    # Arrange
+    client = LogisticsServiceClient("http://logistics/api")
+    client._fetch_availability = AsyncMock(return_value={"valid": True})
+
+    # Act
+    await client.check_availability(**ADDRESS)
+    await client.check_availability(**ADDRESS)
+
+    # Assert
+    assert client._fetch_availability.await_count == 2
+    assert client.cache_stats() is None
+    assert client.clear_cache() is None
+
+# endregion
+
+
+# region ClearCache Method.
+
+@pytest.mark.asyncio
+async def test_ClearCache_ShouldForceTheNextCheckUpstream():
+    # Arrange
+    client = LogisticsServiceClient("http://logistics/api", availability_cache=availability_cache(FakeClock()))
+    client._fetch_availability = AsyncMock(return_value={"valid": True})
+    await client.check_availability(**ADDRESS)
+
+    # Act
+    cleared = client.clear_cache()
+    await client.check_availability(**ADDRESS)
+
+    # Assert
+    assert cleared == 1
+    assert client._fetch_availability.await_count == 2
+
+# endregion
+
+
+# region DestinationKey Function.
+
+def test_DestinationKey_ShouldIgnoreCaseAndSpacing():
+    assert destination_key(**ADDRESS) == destination_key(
+        street="RUA A,  1", city=" curitiba", state="pr", postalCode="80000-000", country="BRASIL "
+    )
+
+
+def test_DestinationKey_ShouldTellDifferentStreetsApart():
+    assert destination_key(**ADDRESS) != destination_key(**{**ADDRESS, "street": "Rua B, 1"})
+
+# endregion
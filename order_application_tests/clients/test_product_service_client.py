@@ -0,0 +1,208 @@
+﻿import logging
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp import test_utils
+from unittest.mock import AsyncMock
+
+from clients.product_service_client import ProductServiceClient, StockChange
+from core.cache import AsyncTTLCache
+
+
+# region GetProduct Method.
+
+@pytest.mark.asyncio
+async def test_GetProduct_ShouldFetchOnce_WhenCacheIsEnabled():
+    # Arrange
+    client = ProductServiceClient("http://products/api", cache=AsyncTTLCache(ttl_seconds=60, max_entries=10))
+    client._fetch_product = AsyncMock(return_value={"price": "10.00"})
+
+    # Act
+    first = await client.get_product("p1")
+    second = await client.get_product("p1")
+
+    # Assert
+    assert first == second == {"price": "10.00"}
+    client._fetch_product.assert_awaited_once_with("p1")
+    assert client.cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_GetProduct_ShouldFetchEveryTime_WhenCacheIsDisabled():
+    # Arrange
+    client = ProductServiceClient("http://products/api")
+    client._fetch_product = AsyncMock(return_value={"price": "10.00"})
+
+    # Act
+    await client.get_product("p1")
+    await client.get_product("p1")
+
+    # Assert
+    assert client._fetch_product.await_count == 2
+    assert client.cache_stats() is None
+
+
+@pytest.mark.asyncio
+async def test_GetVariant_ShouldNotShareEntries_WithProductsOfTheSameId():
+    # Arrange
+    client = ProductServiceClient("http://products/api", cache=AsyncTTLCache(ttl_seconds=60, max_entries=10))
+    client._fetch_product = AsyncMock(return_value={"price": "10.00"})
+    client._fetch_variant = AsyncMock(return_value={"price": "12.00"})
+
+    # Act
+    product = await client.get_product("same-id")
+    variant = await client.get_variant("same-id")
+
+    # Assert
+    assert product["price"] == "10.00"
+    assert variant["price"] == "12.00"
+
+# endregion
+
+
+# region ModifyStockMany Method.
+
+class StubProductService:
+    def __init__(self, batch_supported: bool, failing_ids=()):
+        self.batch_supported = batch_supported
+        self.failing_ids = set(failing_ids)
+        self.requests = []
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_patch("/api/stock/{action}", self.batch)
+        app.router.add_patch("/api/products/{id}/{action}", self.single)
+        app.router.add_patch("/api/product-variants/{id}/{action}", self.single)
+        return app
+
+    async def batch(self, request: web.Request) -> web.Response:
+        self.requests.append(("batch", request.match_info["action"], await request.json()))
+        if not self.batch_supported:
+            return web.Response(status=404)
+        return web.json_response({})
+
+    async def single(self, request: web.Request) -> web.Response:
+        self.requests.append((request.match_info["id"], request.match_info["action"], await request.json()))
+        if request.match_info["id"] in self.failing_ids:
+            return web.Response(status=409, text="Insufficient stock")
+        return web.json_response({})
+
+
+@pytest_asyncio.fixture
+async def stub_product_service():
+    servers = []
+
+    async def start(**kwargs):
+        stub = StubProductService(**kwargs)
+        server = test_utils.TestServer(stub.build_app())
+        await server.start_server()
+        servers.append(server)
+        return stub, str(server.make_url("/api"))
+
+    yield start
+
+    for server in servers:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_ModifyStockMany_ShouldSendOneRequest_WhenBatchIsSupported(stub_product_service):
+    # Arrange
+    stub, base_url = await stub_product_service(batch_supported=True)
+    changes = [StockChange("p1", None, 2), StockChange("p2", "v2", 1)]
+
+    # Act
+    async with ProductServiceClient(base_url) as client:
+        await client.modify_stock_many("reserve", changes)
+
+    # Assert
+    assert stub.requests == [("batch", "reserve", {"items": [
+        {"productId": "p1", "productVariantId": None, "quantity": 2},
+        {"productId": "p2", "productVariantId": "v2", "quantity": 1},
+    ]})]
+
+
+@pytest.mark.asyncio
+async def test_ModifyStockMany_ShouldFallBackToSingleCalls_WhenBatchIsNotSupported(stub_product_service):
+    # Arrange
+    stub, base_url = await stub_product_service(batch_supported=False)
+    changes = [StockChange("p1", None, 2), StockChange("p2", "v2", 1)]
+
+    # Act
+    async with ProductServiceClient(base_url) as client:
+        await client.modify_stock_many("reduce", changes)
+        await client.modify_stock_many("reduce", changes)
+
+    # Assert
+    batch_requests = [r for r in stub.requests if r[0] == "batch"]
+    single_requests = sorted(r for r in stub.requests if r[0] != "batch")
+    assert len(batch_requests) == 1
+    assert single_requests == sorted([
+        ("p1", "reduce", {"quantity": 2}),
+        ("v2", "reduce", {"quantity": 1}),
+    ] * 2)
+
+
+@pytest.mark.asyncio
+async def test_ModifyStockMany_ShouldReleaseAppliedReservations_WhenASingleCallFails(stub_product_service):
+    # Arrange
+    stub, base_url = await stub_product_service(batch_supported=False, failing_ids={"p2"})
+    changes = [StockChange("p1", None, 2), StockChange("p2", None, 1)]
+
+    # Act
+    async with ProductServiceClient(base_url, batch_stock=False) as client:
+        with pytest.raises(RuntimeError):
+            await client.modify_stock_many("reserve", changes)
+
+    # Assert
+    assert ("p1", "release", {"quantity": 2}) in stub.requests
+    assert ("p2", "release", {"quantity": 1}) not in stub.requests
+    assert all(r[0] != "batch" for r in stub.requests)
+
+
+@pytest.mark.asyncio
+async def test_ModifyStockMany_ShouldLogReleasesThatFail_WhenUndoingReservations(caplog):
+    # Arrange
+    client = ProductServiceClient("http://products/api", batch_stock=False)
+    failing_urls = {"http://products/api/products/p2/reserve", "http://products/api/products/p1/release"}
+
+    async def modify_stock(url, quantity):
+        if url in failing_urls:
+            raise RuntimeError(f"{url} failed")
+
+    client._modify_stock = AsyncMock(side_effect=modify_stock)
+
+    # Act
+    with caplog.at_level(logging.ERROR, logger="order_service.product_client"):
+        with pytest.raises(RuntimeError, match="p2/reserve"):
+            await client.modify_stock_many("reserve", [StockChange("p1", None, 2), StockChange("p2", None, 1)])
+
+    # Assert
+    [record] = caplog.records
+    assert (record.product_id, record.quantity) == ("p1", 2)
+    assert "p1/release" in str(record.exc_info[1])
+
+
+@pytest.mark.asyncio
+async def test_ModifyStockMany_ShouldProbeBatchAgain_AfterTheProbeInterval(stub_product_service):
+    # Arrange
+    stub, base_url = await stub_product_service(batch_supported=False)
+    changes = [StockChange("p1", None, 2)]
+    now = [0.0]
+
+    # Act
+    async with ProductServiceClient(base_url, batch_probe_interval=60, clock=lambda: now[0]) as client:
+        await client.modify_stock_many("reserve", changes)
+        now[0] = 59
+        await client.modify_stock_many("reserve", changes)
+
+        # The endpoint was only missing for a while, e.g. during a deployment.
+        stub.batch_supported = True
+        now[0] = 60
+        await client.modify_stock_many("reserve", changes)
+        await client.modify_stock_many("reserve", changes)
+
+    # Assert
+    assert [r[0] for r in stub.requests] == ["batch", "p1", "p1", "batch", "batch"]
+
+# endregion
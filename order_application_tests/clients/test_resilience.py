@@ -0,0 +1,241 @@
+﻿import asyncio
+import pytest
+from aiohttp import web
+from aiohttp import test_utils
+
+from clients.logistics_service_client import LogisticsServiceClient
+from clients.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilienceLayer,
+    RetryPolicy,
+    UpstreamServiceError,
+    resilient,
+)
+from core.metrics import UPSTREAM_REQUEST_DURATION, UPSTREAM_REQUEST_ERRORS
+from order_application_tests.fake_clock import FakeClock
+
+
+class Upstream:
+    """Fails with the queued errors first, then answers "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+async def no_sleep(delay: float) -> None:
+    pass
+
+
+def build_layer(clock=None, max_attempts=3, failure_threshold=5, reset_timeout=30) -> ResilienceLayer:
+    return ResilienceLayer(
+        retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=0.01, max_delay=0.05),
+        failure_threshold=failure_threshold,
+        reset_timeout=reset_timeout,
+        clock=clock or FakeClock(),
+        sleep=no_sleep,
+    )
+
+
+# region RetryPolicy Backoff Method.
+
+def test_Backoff_ShouldStayWithinTheExponentialCap_ForEveryAttempt():
+    # Arrange
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0)
+
+    # Act
+    delays = [policy.backoff(attempt) for attempt in range(1, 8) for _ in range(50)]
+
+    # Assert
+    assert all(0 <= delay <= 1.0 for delay in delays)
+    assert all(policy.backoff(1) <= 0.1 for _ in range(50))
+
+# endregion
+
+
+# region ResilienceLayer Call Method.
+
+@pytest.mark.asyncio
+async def test_Call_ShouldRetryTransientErrors_WhenOperationIsIdempotent():
+    # Arrange
+    layer = build_layer()
+    upstream = Upstream(UpstreamServiceError("busy", 503), asyncio.TimeoutError())
+
+    # Act
+    result = await layer.call("product.get_product", upstream, idempotent=True)
+
+    # Assert
+    assert result == "ok"
+    assert upstream.calls == 3
+    assert layer.breaker("product.get_product").state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldNotRetry_WhenOperationIsNotIdempotent():
+    # Arrange
+    layer = build_layer()
+    upstream = Upstream(UpstreamServiceError("busy", 503))
+
+    # Act & Assert
+    with pytest.raises(UpstreamServiceError):
+        await layer.call("product.modify_stock", upstream, idempotent=False)
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldNotRetry_WhenErrorIsNotTransient():
+    # Arrange
+    layer = build_layer()
+    upstream = Upstream(ValueError("not found"), UpstreamServiceError("conflict", 409))
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        await layer.call("product.get_product", upstream, idempotent=True)
+    with pytest.raises(UpstreamServiceError):
+        await layer.call("product.get_product", upstream, idempotent=True)
+    assert upstream.calls == 2
+    assert layer.breaker("product.get_product").stats()["consecutive_failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldFailFast_WhenCircuitIsOpen():
+    # Arrange
+    layer = build_layer(max_attempts=1, failure_threshold=2)
+    upstream = Upstream(*[UpstreamServiceError("down", 502)] * 2)
+    for _ in range(2):
+        with pytest.raises(UpstreamServiceError):
+            await layer.call("logistics.get_shipment", upstream, idempotent=True)
+
+    # Act & Assert
+    with pytest.raises(CircuitOpenError):
+        await layer.call("logistics.get_shipment", upstream, idempotent=True)
+    assert upstream.calls == 2
+    assert layer.breaker_states()["logistics.get_shipment"]["state"] == CircuitBreaker.OPEN
+    assert layer.breaker_states()["logistics.get_shipment"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldKeepOtherEndpointsClosed_WhenOneCircuitOpens():
+    # Arrange
+    layer = build_layer(max_attempts=1, failure_threshold=1)
+    with pytest.raises(UpstreamServiceError):
+        await layer.call("logistics.get_shipment", Upstream(UpstreamServiceError("down", 502)), idempotent=True)
+
+    # Act
+    result = await layer.call("logistics.check_availability", Upstream(), idempotent=True)
+
+    # Assert
+    assert result == "ok"
+    assert layer.breaker("logistics.get_shipment").state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldCloseCircuit_WhenHalfOpenProbeSucceeds():
+    # Arrange
+    clock = FakeClock()
+    layer = build_layer(clock=clock, max_attempts=1, failure_threshold=1, reset_timeout=10)
+    with pytest.raises(UpstreamServiceError):
+        await layer.call("product.get_variant", Upstream(UpstreamServiceError("down", 500)), idempotent=True)
+    clock.now = 10
+
+    # Act
+    result = await layer.call("product.get_variant", Upstream(), idempotent=True)
+
+    # Assert
+    assert result == "ok"
+    assert layer.breaker("product.get_variant").state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_Call_ShouldReopenCircuit_WhenHalfOpenProbeFails():
+    # Arrange
+    clock = FakeClock()
+    layer = build_layer(clock=clock, max_attempts=1, failure_threshold=3, reset_timeout=10)
+    for _ in range(3):
+        with pytest.raises(UpstreamServiceError):
+            await layer.call("product.get_variant", Upstream(UpstreamServiceError("down", 500)), idempotent=True)
+    clock.now = 10
+
+    # Act
+    with pytest.raises(UpstreamServiceError):
+        await layer.call("product.get_variant", Upstream(UpstreamServiceError("down", 500)), idempotent=True)
+
+    # Assert
+    assert layer.breaker("product.get_variant").state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        await layer.call("product.get_variant", Upstream(), idempotent=True)
+
+# endregion
+
+
+# region LogisticsServiceClient GetShipment Method.
+
+@pytest.mark.asyncio
+async def test_GetShipment_ShouldRetry_WhenUpstreamIsTemporarilyUnavailable():
+    # Arrange
+    attempts = []
+
+    async def get_shipment(request: web.Request) -> web.Response:
+        attempts.append(request.match_info["id"])
+        if len(attempts) < 3:
+            return web.Response(status=503, text="Unavailable")
+        return web.json_response({"id": request.match_info["id"], "status": "Shipped"})
+
+    app = web.Application()
+    app.router.add_get("/api/shipments/{id}", get_shipment)
+    server = test_utils.TestServer(app)
+    await server.start_server()
+
+    # Act
+    try:
+        async with LogisticsServiceClient(str(server.make_url("/api")), resilience=build_layer()) as client:
+            shipment = await client.get_shipment("s1")
+            states = client.circuit_states()
+    finally:
+        await server.close()
+
+    # Assert
+    assert shipment == {"id": "s1", "status": "Shipped"}
+    assert attempts == ["s1"] * 3
+    assert states["logistics.get_shipment"]["state"] == CircuitBreaker.CLOSED
+
+# endregion
+
+
+# region Resilient Decorator Metrics.
+
+class MeteredClient:
+    SERVICE_NAME = "metered"
+
+    def __init__(self, upstream: Upstream):
+        self._resilience = build_layer(max_attempts=2)
+        self._upstream = upstream
+
+    @resilient("fetch", idempotent=True)
+    async def fetch(self):
+        return await self._upstream()
+
+
+@pytest.mark.asyncio
+async def test_Resilient_ShouldRecordLatencyAndErrors_PerUpstreamMethod():
+    # Arrange
+    client = MeteredClient(Upstream(UpstreamServiceError("Unavailable", 503), UpstreamServiceError("Unavailable", 503)))
+
+    # Act
+    with pytest.raises(UpstreamServiceError):
+        await client.fetch()
+    await client.fetch()
+
+    # Assert
+    assert UPSTREAM_REQUEST_DURATION.count(service="metered", method="fetch", outcome="error") == 1
+    assert UPSTREAM_REQUEST_DURATION.count(service="metered", method="fetch", outcome="success") == 1
+    assert UPSTREAM_REQUEST_ERRORS.value(service="metered", method="fetch", error="UpstreamServiceError") == 1
+
+# endregion
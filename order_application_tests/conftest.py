@@ -1,6 +1,11 @@
 # tests/conftest.py
 import sys
 import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import pytest
 from unittest.mock import AsyncMock, MagicMock
 from httpx import AsyncClient, ASGITransport
 from asgiref.wsgi import WsgiToAsgi
@@ -65,3 +70,53 @@ async def client_with_mocked_order_service():
         base_url="http://test"
     ) as client:
         yield client, mock_service
+
+
+
+# --- Throwaway database for integration tests ---
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_postgres(data_dir: str):
+    """Start a private PostgreSQL cluster; returns its URL, or None when Postgres or asyncpg is unavailable."""
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    try:
+        import asyncpg  # noqa: F401
+    except ImportError:
+        return None
+    if not initdb or not pg_ctl:
+        return None
+
+    port = _free_port()
+    try:
+        subprocess.run([initdb, "-D", data_dir, "-U", "postgres", "--auth=trust"], check=True, capture_output=True)
+        subprocess.run(
+            [pg_ctl, "-D", data_dir, "-w", "-l", os.path.join(data_dir, "server.log"),
+             "-o", f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1 -c fsync=off", "start"],
+            check=True, capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"postgresql+asyncpg://postgres@127.0.0.1:{port}/postgres"
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    """TEST_DATABASE_URL if set, else a throwaway Postgres, else a temporary SQLite file."""
+    if os.getenv("TEST_DATABASE_URL"):
+        yield os.environ["TEST_DATABASE_URL"]
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="order-tests-")
+    postgres_dir = os.path.join(work_dir, "postgres")
+    url = _start_postgres(postgres_dir)
+    try:
+        yield url or f"sqlite+aiosqlite:///{os.path.join(work_dir, 'orders.db')}"
+    finally:
+        if url:
+            subprocess.run([shutil.which("pg_ctl"), "-D", postgres_dir, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
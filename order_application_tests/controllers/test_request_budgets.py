@@ -0,0 +1,345 @@
+﻿import json
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from controllers import address_router, order_router
+from core.database import DatabaseRegistry
+from data import upgrade_database
+from models.entities import Address, OrderItem
+from models.entities.order import Order
+from models.enums import OrderStatus
+from repositories import AddressRepository, OrderRepository, OutboxRepository
+from services import AddressService, OrderService
+
+from order_application_tests.request_budget import assert_within_budget, measure_request
+
+# Budgets on peak traced memory are several times what a request takes today:
+# loose enough for other Python versions, tight enough to catch a route that
+# starts loading whole tables or building responses in a loop.
+
+
+@pytest_asyncio.fixture
+async def api(tmp_path):
+    database = DatabaseRegistry(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, echo=False).start()
+    await upgrade_database(database.engine)
+    async with database.session_factory() as session:
+        for customer in ("c1", "c2"):
+            session.add(Address(id=f"a-{customer}", customer_id=customer, street="Rua A, 1", city="Curitiba",
+                                state="PR", postal_code="80000-000", country="Brasil"))
+        for position in range(1, 5):
+            session.add(Order(
+                id=f"o{position}", customer_id="c1", created_at=datetime(2025, 1, position, tzinfo=timezone.utc),
+                status=OrderStatus.PENDING, total_amount=Decimal("20.00"),
+                items=[OrderItem(id=f"i{position}", product_id="p1", quantity=2, unit_price=10.0)],
+            ))
+        await session.commit()
+
+    product_client = AsyncMock()
+    product_client.get_product.return_value = {"price": "10.00"}
+    order_repository = OrderRepository(database.session_factory)
+    address_repository = AddressRepository(database.session_factory)
+
+    app = FastAPI()
+    app.include_router(order_router)
+    app.include_router(address_router)
+    app.state.database = database
+    app.state.address_service = AddressService(address_repository)
+    app.state.order_service = OrderService(
+        order_repository,
+        address_repository,
+        product_client,
+        AsyncMock(),
+        outbox_repository=OutboxRepository(database.session_factory),
+    )
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client, database.engine
+    await database.dispose()
+
+
+def order_payload(customer_id="c1"):
+    return {"customer_id": customer_id, "items": [{"product_id": "p1", "quantity": 1}]}
+
+
+def address_payload(customer_id):
+    return {"customer_id": customer_id, "street": "Rua B, 2", "city": "Curitiba", "state": "PR",
+            "postal_code": "80000-000", "country": "Brasil"}
+
+
+# Each test first sends an unmeasured request to the same route, so that the
+# measured one does not pay for compiling its statements.
+
+# region Order Endpoints.
+
+@pytest.mark.asyncio
+async def test_GetById_ShouldLoadOrderAndItems_InTwoStatements(api):
+    client, engine = api
+    await client.get("/api/orders/o2")
+
+    cost = await measure_request(client, engine, "GET", "/api/orders/o1")
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=2, peak_kib=200)
+
+
+@pytest.mark.asyncio
+async def test_GetAll_ShouldLoadPageAndItems_InTwoStatements(api):
+    client, engine = api
+    await client.get("/api/orders/", params={"limit": 1})
+
+    cost = await measure_request(client, engine, "GET", "/api/orders/", params={"limit": 50})
+
+    assert cost.response.status_code == 200
+    assert len(cost.response.json()) == 4
+    assert_within_budget(cost, queries=2, peak_kib=250)
+
+
+@pytest.mark.asyncio
+async def test_Create_ShouldInsertWithoutReloading(api):
+    client, engine = api
+    await client.post("/api/orders/", json=order_payload())
+
+    cost = await measure_request(client, engine, "POST", "/api/orders/", json=order_payload())
+
+    assert cost.response.status_code == 201
+    assert_within_budget(cost, queries=2, peak_kib=200)
+
+
+@pytest.mark.asyncio
+async def test_Import_ShouldWriteEachChunkAtOnce(api):
+    client, engine = api
+    headers = {"content-type": "application/x-ndjson"}
+    lines = [json.dumps({"customer_id": "c1", "items": [{"product_id": "p1", "quantity": 1, "unit_price": "10.00"}]})] * 20
+    await client.post("/api/orders/import", content=lines[0] + "\n", headers=headers)
+
+    cost = await measure_request(client, engine, "POST", "/api/orders/import", content="\n".join(lines), headers=headers)
+
+    assert cost.response.status_code == 200
+    assert cost.response.json()["imported"] == 20
+    assert_within_budget(cost, queries=2, peak_kib=500)
+
+
+@pytest.mark.asyncio
+async def test_Import_ShouldAnswer400_WithoutWriting_WhenCsvHeaderLacksRequiredColumns(api):
+    client, engine = api
+
+    cost = await measure_request(
+        client, engine, "POST", "/api/orders/import",
+        content="order_id,customer_id\no1,c1\n", headers={"content-type": "text/csv"},
+    )
+
+    assert cost.response.status_code == 400
+    assert "product_id" in cost.response.json()["detail"]
+    assert_within_budget(cost, queries=0, peak_kib=200)
+
+
+@pytest.mark.asyncio
+async def test_PatchStatus_ShouldWriteOnlyTheOrderAndItsOutboxMessage(api):
+    client, engine = api
+    await client.patch("/api/orders/o2/status", json={"status": "Cancelled"})
+
+    cost = await measure_request(client, engine, "PATCH", "/api/orders/o1/status", json={"status": "Cancelled"})
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=4, peak_kib=200)
+
+
+@pytest.mark.asyncio
+async def test_Update_ShouldFlushOnlyDirtyColumns(api):
+    client, engine = api
+    await client.put("/api/orders/o2", json={"items": [{"id": "i2", "quantity": 3}]})
+
+    cost = await measure_request(client, engine, "PUT", "/api/orders/o1", json={"items": [{"id": "i1", "quantity": 3}]})
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=4, peak_kib=200)
+
+
+@pytest.mark.asyncio
+async def test_PatchStatusBatch_ShouldLoadAllOrdersAtOnce_AndCommitOnce(api):
+    client, engine = api
+    await client.post("/api/orders/status:batch", json={"order_ids": ["o4"], "status": "Cancelled"})
+
+    cost = await measure_request(
+        client, engine, "POST", "/api/orders/status:batch", json={"order_ids": ["o1", "o2", "o3"], "status": "Cancelled"}
+    )
+
+    assert cost.response.status_code == 200
+    assert [order["id"] for order in cost.response.json()["updated"]] == ["o1", "o2", "o3"]
+    # Each order is written in its own savepoint (SAVEPOINT, UPDATE, outbox INSERT, RELEASE),
+    # so one that lost a race is rolled back alone; all of them still share the one commit.
+    assert_within_budget(cost, queries=14, peak_kib=350)
+
+
+@pytest.mark.asyncio
+async def test_Delete_ShouldRemoveItemsAndOrder_InFourStatements(api):
+    client, engine = api
+    await client.delete("/api/orders/o2")
+
+    cost = await measure_request(client, engine, "DELETE", "/api/orders/o1")
+
+    assert cost.response.status_code == 204
+    assert_within_budget(cost, queries=4, peak_kib=200)
+
+# endregion
+
+
+# region Address Endpoints.
+
+@pytest.mark.asyncio
+async def test_CreateAddress_ShouldInsertWithoutReloading(api):
+    client, engine = api
+    await client.post("/api/addresses/", json=address_payload("c3"))
+
+    cost = await measure_request(client, engine, "POST", "/api/addresses/", json=address_payload("c4"))
+
+    assert cost.response.status_code == 201
+    assert_within_budget(cost, queries=1, peak_kib=150)
+
+
+@pytest.mark.asyncio
+async def test_GetAllAddresses_ShouldLoadThemInOneStatement(api):
+    client, engine = api
+    await client.get("/api/addresses/")
+
+    cost = await measure_request(client, engine, "GET", "/api/addresses/")
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=1, peak_kib=150)
+
+
+@pytest.mark.asyncio
+async def test_GetAddressById_ShouldLoadItInOneStatement(api):
+    client, engine = api
+    await client.get("/api/addresses/a-c2")
+
+    cost = await measure_request(client, engine, "GET", "/api/addresses/a-c1")
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=1, peak_kib=150)
+
+
+@pytest.mark.asyncio
+async def test_UpdateAddress_ShouldReadItOnce(api):
+    client, engine = api
+    await client.put("/api/addresses/a-c2", json={"city": "Londrina"})
+
+    cost = await measure_request(client, engine, "PUT", "/api/addresses/a-c1", json={"city": "Londrina"})
+
+    assert cost.response.status_code == 200
+    assert_within_budget(cost, queries=2, peak_kib=150)
+
+
+@pytest.mark.asyncio
+async def test_DeleteAddress_ShouldReadAndDelete_InTwoStatements(api):
+    client, engine = api
+    await client.delete("/api/addresses/a-c2")
+
+    cost = await measure_request(client, engine, "DELETE", "/api/addresses/a-c1")
+
+    assert cost.response.status_code == 204
+    assert_within_budget(cost, queries=2, peak_kib=150)
+
+# endregion
+
+
+# region Conditional Reads.
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["/api/orders/o1", "/api/orders/?limit=2", "/api/addresses/a-c1", "/api/addresses/"])
+async def test_ConditionalGet_ShouldAnswer304_FromOneVersionQuery(api, url):
+    client, engine = api
+    etag = (await client.get(url)).headers["etag"]
+
+    cost = await measure_request(client, engine, "GET", url, headers={"if-none-match": etag})
+
+    assert cost.response.status_code == 304
+    assert cost.response.headers["etag"] == etag
+    assert cost.response.headers["cache-control"] == "private, no-cache"
+    assert_within_budget(cost, queries=1, peak_kib=100)
+
+
+@pytest.mark.asyncio
+async def test_ConditionalGet_ShouldReturnOrder_WhenItChangedSinceTheTag(api):
+    client, engine = api
+    etag = (await client.get("/api/orders/o1")).headers["etag"]
+    list_etag = (await client.get("/api/orders/")).headers["etag"]
+    await client.patch("/api/orders/o1/status", json={"status": "Cancelled"})
+
+    response = await client.get("/api/orders/o1", headers={"if-none-match": etag})
+    list_response = await client.get("/api/orders/", headers={"if-none-match": list_etag})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Cancelled"
+    assert response.headers["etag"] != etag
+    assert list_response.status_code == 200
+    assert list_response.headers["etag"] != list_etag
+
+# endregion
+
+
+# region Conditional Writes.
+
+@pytest.mark.asyncio
+async def test_ConditionalPatch_ShouldApplyAndReturnTheNewTag_WhenIfMatchIsCurrent(api):
+    client, engine = api
+    etag = (await client.get("/api/orders/o1")).headers["etag"]
+
+    response = await client.patch("/api/orders/o1/status", json={"status": "Cancelled"}, headers={"if-match": etag})
+
+    assert (etag, response.status_code) == ('"1"', 200)
+    assert response.headers["etag"] == '"2"'
+    assert response.json()["version"] == 2
+    assert (await client.get("/api/orders/o1")).headers["etag"] == '"2"'
+
+
+@pytest.mark.asyncio
+async def test_ConditionalPatch_ShouldAnswer412_WithoutWriting_WhenIfMatchIsStale(api):
+    client, engine = api
+    await client.patch("/api/orders/o2/status", json={"status": "Cancelled"}, headers={"if-match": '"1"'})
+
+    cost = await measure_request(
+        client, engine, "PATCH", "/api/orders/o2/status", json={"status": "Cancelled"}, headers={"if-match": '"1"'}
+    )
+
+    assert cost.response.status_code == 412
+    assert_within_budget(cost, queries=2, peak_kib=150)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method, url, body", [
+    ("PUT", "/api/orders/o1", {"items": [{"id": "i1", "quantity": 3}]}),
+    ("DELETE", "/api/orders/o1", None),
+    ("PUT", "/api/addresses/a-c1", {"street": "Rua C, 3"}),
+    ("DELETE", "/api/addresses/a-c1", None),
+])
+async def test_ConditionalWrite_ShouldAnswer412_WhenIfMatchIsStaleOrMalformed(api, method, url, body):
+    client, engine = api
+
+    for if_match in ('"2"', "not-a-version"):
+        response = await client.request(method, url, json=body, headers={"if-match": if_match})
+        assert response.status_code == 412, if_match
+
+    assert (await client.get(url)).headers["etag"] == '"1"'
+
+
+@pytest.mark.asyncio
+async def test_ConditionalPut_ShouldBumpTheAddressVersion_WhenIfMatchIsCurrent(api):
+    client, engine = api
+
+    response = await client.put("/api/addresses/a-c1", json={"street": "Rua C, 3"}, headers={"if-match": '"1"'})
+    stale = await client.put("/api/addresses/a-c1", json={"street": "Rua D, 4"}, headers={"if-match": '"1"'})
+
+    assert (response.status_code, stale.status_code) == (200, 412)
+    assert response.headers["etag"] == '"2"'
+    assert (response.json()["street"], response.json()["version"]) == ("Rua C, 3", 2)
+    address = (await client.get("/api/addresses/a-c1")).json()
+    assert (address["street"], address["version"]) == ("Rua C, 3", 2)
+
+# endregion
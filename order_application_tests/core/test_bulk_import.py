@@ -0,0 +1,66 @@
+﻿import pytest
+
+from core.bulk_import import ImportRecord, parse_csv, parse_ndjson
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+# region ParseNdjson Method.
+
+@pytest.mark.asyncio
+async def test_ParseNdjson_ShouldYieldOneRecordPerLine_WhenLinesSpanChunks():
+    # Arrange
+    chunks = stream(b'{"id": "o1"}\n{"id"', b': "o2"}\n\n[1, 2]\nnot json')
+
+    # Act
+    records = await collect(parse_ndjson(chunks))
+
+    # Assert
+    assert records[:2] == [ImportRecord(1, {"id": "o1"}), ImportRecord(2, {"id": "o2"})]
+    assert [(record.row, record.data) for record in records[2:]] == [(4, None), (5, None)]
+    assert all(record.error for record in records[2:])
+
+# endregion
+
+
+# region ParseCsv Method.
+
+@pytest.mark.asyncio
+async def test_ParseCsv_ShouldGroupConsecutiveLines_ByOrderId():
+    # Arrange
+    chunks = stream(
+        b"order_id,customer_id,status,product_id,quantity,unit_price\r\n"
+        b"o1,c1,Completed,p1,1,2.50\r\n"
+        b'o1,c1,Completed,"p2",3,1.00\r\n'
+        b"o2,c2,,p1,1,2.50\r\n"
+    )
+
+    # Act
+    records = await collect(parse_csv(chunks))
+
+    # Assert
+    assert records == [
+        ImportRecord(2, {"id": "o1", "customer_id": "c1", "status": "Completed", "items": [
+            {"product_id": "p1", "quantity": "1", "unit_price": "2.50"},
+            {"product_id": "p2", "quantity": "3", "unit_price": "1.00"},
+        ]}),
+        ImportRecord(4, {"id": "o2", "customer_id": "c2", "items": [
+            {"product_id": "p1", "quantity": "1", "unit_price": "2.50"},
+        ]}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ParseCsv_ShouldRaiseValueError_WhenRequiredColumnsAreMissing():
+    # Act / Assert
+    with pytest.raises(ValueError, match="product_id"):
+        await collect(parse_csv(stream(b"order_id,customer_id\no1,c1\n")))
+
+# endregion
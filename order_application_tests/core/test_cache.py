@@ -0,0 +1,189 @@
+﻿import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from core.cache import AsyncTTLCache
+from order_application_tests.fake_clock import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+# region GetOrLoad Method.
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldServeFromCache_WhenEntryIsFresh(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    loader = AsyncMock(return_value={"price": "10.00"})
+
+    # Act
+    first = await cache.get_or_load("sku", loader)
+    clock.now = 9
+    second = await cache.get_or_load("sku", loader)
+
+    # Assert
+    assert first == second == {"price": "10.00"}
+    loader.assert_awaited_once()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldReload_WhenEntryHasExpired(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    loader = AsyncMock(side_effect=[{"price": "10.00"}, {"price": "12.00"}])
+
+    # Act
+    await cache.get_or_load("sku", loader)
+    clock.now = 10
+    result = await cache.get_or_load("sku", loader)
+
+    # Assert
+    assert result == {"price": "12.00"}
+    assert loader.await_count == 2
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldEvictLeastRecentlyUsed_WhenFull(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=2, clock=clock)
+    loader = AsyncMock(return_value=1)
+
+    # Act
+    await cache.get_or_load("a", loader)
+    await cache.get_or_load("b", loader)
+    await cache.get_or_load("a", loader)
+    await cache.get_or_load("c", loader)
+    await cache.get_or_load("a", loader)
+
+    # Assert
+    assert loader.await_count == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.invalidate("b") is False
+
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldCoalesceConcurrentMisses_ForTheSameKey(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    # Act
+    tasks = [asyncio.create_task(cache.get_or_load("sku", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    # Assert
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldNotCacheFailures_AndShouldShareThemWithWaiters(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    release = asyncio.Event()
+
+    async def failing_loader():
+        await release.wait()
+        raise RuntimeError("upstream failure")
+
+    # Act
+    tasks = [asyncio.create_task(cache.get_or_load("sku", failing_loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    recovered = await cache.get_or_load("sku", AsyncMock(return_value="value"))
+
+    # Assert
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert recovered == "value"
+
+
+@pytest.mark.asyncio
+async def test_GetOrLoad_ShouldRetryLoad_WhenLoadingCallerIsCancelled(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    never = asyncio.Event()
+
+    async def hanging_loader():
+        await never.wait()
+
+    leader = asyncio.create_task(cache.get_or_load("sku", hanging_loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_load("sku", AsyncMock(return_value="value")))
+    await asyncio.sleep(0)
+
+    # Act
+    leader.cancel()
+    result = await follower
+
+    # Assert
+    assert result == "value"
+
+# endregion
+
+
+# region Set Method.
+
+@pytest.mark.asyncio
+async def test_Set_ShouldUsePerValueTTL_WhenTtlForIsGiven(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=100, max_entries=10, clock=clock, ttl_for=lambda value: 100 if value else 5)
+    cache.set("good", True)
+    cache.set("bad", False)
+
+    # Act
+    clock.now = 6
+    good = await cache.get_or_load("good", AsyncMock(return_value="reloaded"))
+    bad = await cache.get_or_load("bad", AsyncMock(return_value="reloaded"))
+
+    # Assert
+    assert good is True
+    assert bad == "reloaded"
+    assert cache.expirations == 1
+
+
+def test_Set_ShouldNotStoreValue_WhenItsTTLIsZero(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=100, max_entries=10, clock=clock, ttl_for=lambda value: 0)
+
+    # Act
+    cache.set("sku", "value")
+
+    # Assert
+    assert len(cache) == 0
+
+# endregion
+
+
+# region Clear Method.
+
+def test_Clear_ShouldReturnNumberOfEntriesDropped(clock):
+    # Arrange
+    cache = AsyncTTLCache(ttl_seconds=10, max_entries=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Act
+    cleared = cache.clear()
+
+    # Assert
+    assert cleared == 2
+    assert len(cache) == 0
+
+# endregion
@@ -0,0 +1,71 @@
+﻿import pytest
+from types import SimpleNamespace
+
+from core.database import DatabaseRegistry
+from core.dependencies import get_database
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return DatabaseRegistry(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, echo=False)
+
+
+# region DatabaseRegistry.
+
+def test_Engine_ShouldRaiseRuntimeError_WhenRegistryIsNotStarted(registry):
+    # Act / Assert
+    with pytest.raises(RuntimeError):
+        registry.engine
+
+
+@pytest.mark.asyncio
+async def test_Start_ShouldReuseTheSameEngine_WhenCalledTwice(registry):
+    # Act
+    engine = registry.start().engine
+    again = registry.start().engine
+
+    # Assert
+    assert engine is again
+    assert registry.session_factory.kw["bind"] is engine
+    await registry.dispose()
+
+
+@pytest.mark.asyncio
+async def test_PoolStats_ShouldCountCheckedOutConnections(registry):
+    # Arrange
+    registry.start()
+
+    # Act
+    async with registry.engine.connect():
+        busy = registry.pool_stats()
+    idle = registry.pool_stats()
+    await registry.dispose()
+
+    # Assert
+    assert busy["checked_out"] == 1
+    assert idle["checked_out"] == 0
+    assert idle["checked_in"] == 1
+    assert idle["max_overflow"] is None
+
+# endregion
+
+
+# region GetDatabase Dependency.
+
+@pytest.mark.asyncio
+async def test_GetDatabase_ShouldDrawSessionsFromTheLifespanRegistry(registry):
+    # Arrange
+    engine = registry.start().engine
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(database=registry)))
+
+    # Act
+    dependency = get_database(request)
+    session = await dependency.__anext__()
+    bind = session.bind
+    await dependency.aclose()
+    await registry.dispose()
+
+    # Assert
+    assert bind is engine
+
+# endregion
@@ -0,0 +1,88 @@
+﻿from types import SimpleNamespace
+
+import pytest
+
+from core.concurrency import PreconditionFailedError
+from core.etag import cache_headers, entity_tag, etag_matches, not_modified, parse_if_match, version_tag
+
+
+def record(id, version=1):
+    return SimpleNamespace(id=id, version=version)
+
+
+# region entity_tag Function.
+
+def test_EntityTag_ShouldBeWeakAndStable_ForTheSameRecords():
+    # Act
+    first = entity_tag([record("a"), record("b")])
+    second = entity_tag([record("b"), record("a")])
+
+    # Assert
+    assert first == second
+    assert first.startswith('W/"') and first.endswith('"')
+
+
+def test_EntityTag_ShouldChange_WhenARecordIsUpdated():
+    assert entity_tag([record("a")]) != entity_tag([record("a", version=2)])
+
+
+def test_EntityTag_ShouldChange_WhenARecordIsAddedOrExtraValuesDiffer():
+    assert entity_tag([record("a")]) != entity_tag([record("a"), record("b")])
+    assert entity_tag([record("a")], True) != entity_tag([record("a")], False)
+
+
+# endregion
+
+
+# region parse_if_match Function.
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("*", None),
+    ('"3"', 3),
+    ('W/"3"', 3),
+    (version_tag(7), 7),
+])
+def test_ParseIfMatch_ShouldReturnTheVersion_WhenHeaderIsAVersionTag(header, expected):
+    assert parse_if_match(header) == expected
+
+
+@pytest.mark.parametrize("header", ['W/"abc"', '"1", "2"', ""])
+def test_ParseIfMatch_ShouldRaisePreconditionFailed_WhenHeaderIsNotAVersionTag(header):
+    with pytest.raises(PreconditionFailedError):
+        parse_if_match(header)
+
+# endregion
+
+
+# region etag_matches Function.
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('"other", W/"abc"', True),
+    ("*", True),
+    ('W/"abcd"', False),
+])
+def test_EtagMatches_ShouldCompareWeakly(header, expected):
+    assert etag_matches(header, 'W/"abc"') is expected
+
+# endregion
+
+
+# region not_modified Function.
+
+def test_NotModified_ShouldReturnEmpty304_WithCacheHeaders():
+    # Act
+    response = not_modified('W/"abc"', "private, no-cache")
+
+    # Assert
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert cache_headers('W/"abc"', "no-store") == {"ETag": 'W/"abc"', "Cache-Control": "no-store"}
+
+# endregion
@@ -0,0 +1,138 @@
+﻿import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+
+from core.database import DatabaseRegistry
+from core.metrics import Counter, Gauge, Histogram, MetricsMiddleware, MetricsRegistry, UNMATCHED_ROUTE
+
+
+# region MetricsRegistry Render Method.
+
+def test_Render_ShouldWriteCountersInTextFormat_WithEscapedLabels():
+    # Arrange
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs run.", ("queue",))
+    counter.inc(queue='say "hi"')
+    counter.inc(2, queue='say "hi"')
+
+    # Act
+    rendered = registry.render()
+
+    # Assert
+    assert rendered == (
+        "# HELP jobs_total Jobs run.\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{queue="say \\"hi\\""} 3\n'
+    )
+
+
+def test_Render_ShouldWriteCumulativeBuckets_ForHistograms():
+    # Arrange
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value)
+
+    # Act
+    lines = registry.render().splitlines()
+
+    # Assert
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 4.05",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_Register_ShouldRaiseValueError_WhenNameIsTaken():
+    registry = MetricsRegistry()
+    registry.gauge("queue_depth", "Depth.")
+
+    with pytest.raises(ValueError):
+        registry.counter("queue_depth", "Depth again.")
+
+# endregion
+
+
+# region Metric Labels.
+
+def test_Inc_ShouldRaiseValueError_WhenLabelsDoNotMatch():
+    counter = Counter("jobs_total", "Jobs run.", ("queue",))
+
+    with pytest.raises(ValueError):
+        counter.inc(worker="w1")
+
+
+def test_Inc_ShouldRaiseValueError_WhenCounterWouldDecrease():
+    counter = Counter("jobs_total", "Jobs run.")
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+# endregion
+
+
+# region MetricsMiddleware.
+
+def build_app(duration, in_flight):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, duration=duration, in_flight=in_flight)
+
+    @app.get("/orders/{id}")
+    async def get_order(id: str):
+        if id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": id, "in_flight": in_flight.value()}
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_Middleware_ShouldLabelRequestsByRouteTemplateAndStatus():
+    # Arrange
+    duration = Histogram("http_request_duration_seconds", "Latency.", ("method", "route", "status"))
+    in_flight = Gauge("http_requests_in_flight", "In flight.")
+    transport = ASGITransport(app=build_app(duration, in_flight))
+
+    # Act
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        served = await client.get("/orders/o1")
+        await client.get("/orders/o2")
+        await client.get("/orders/missing")
+        await client.get("/unknown/path")
+
+    # Assert
+    assert served.json()["in_flight"] == 1
+    assert duration.count(method="GET", route="/orders/{id}", status="200") == 2
+    assert duration.count(method="GET", route="/orders/{id}", status="404") == 1
+    assert duration.count(method="GET", route=UNMATCHED_ROUTE, status="404") == 1
+    assert in_flight.value() == 0
+
+# endregion
+
+
+# region Pool Connection Hold Timing.
+
+@pytest.mark.asyncio
+async def test_ConnectionHoldHistogram_ShouldObserveEveryConnectionReturnedToThePool(tmp_path):
+    # Arrange
+    hold = Histogram("db_pool_connection_hold_seconds", "Hold.")
+    database = DatabaseRegistry(
+        f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, connection_hold_histogram=hold, echo=False
+    ).start()
+
+    # Act
+    try:
+        for _ in range(3):
+            async with database.engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+    finally:
+        await database.dispose()
+
+    # Assert
+    assert hold.count() == 3
+
+# endregion
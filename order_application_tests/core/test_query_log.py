@@ -0,0 +1,92 @@
+﻿import logging
+import pytest
+from sqlalchemy import text
+
+from core.database import create_database_engine
+from core.query_log import LatencyHistogram, SlowQueryLogger, fingerprint
+
+
+# region Fingerprint Method.
+
+def test_Fingerprint_ShouldIgnoreLiteralValues_WhenStatementsDifferOnlyInValues():
+    # Act
+    first = fingerprint("SELECT * FROM orders WHERE customer_id = 'a' AND total_amount > 10 LIMIT 5")
+    second = fingerprint("SELECT *  FROM orders\nWHERE customer_id = 'b' AND total_amount > 2.5 LIMIT 50")
+
+    # Assert
+    assert first == second == "SELECT * FROM orders WHERE customer_id = ? AND total_amount > ? LIMIT ?"
+
+
+def test_Fingerprint_ShouldCollapseInLists_WhenListLengthsDiffer():
+    # Act
+    first = fingerprint("SELECT * FROM order_items WHERE order_items.order_id IN (?, ?)")
+    second = fingerprint("SELECT * FROM order_items WHERE order_items.order_id IN (?, ?, ?, ?)")
+
+    # Assert
+    assert first == second
+    assert "IN (?...)" in first
+
+# endregion
+
+
+# region LatencyHistogram Observe Method.
+
+def test_Observe_ShouldCountDurationsPerBucket():
+    # Arrange
+    histogram = LatencyHistogram(buckets_ms=(1, 10))
+
+    # Act
+    for duration in (0.5, 1, 4, 50):
+        histogram.observe(duration)
+
+    # Assert
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"le_1": 2, "le_10": 1, "inf": 1}
+    assert snapshot["count"] == 4
+    assert snapshot["max_ms"] == 50
+
+# endregion
+
+
+# region SlowQueryLogger.
+
+def test_Observe_ShouldLogOnlyStatementsOverTheThreshold(caplog):
+    # Arrange
+    query_logger = SlowQueryLogger(threshold_ms=100)
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger="order_service.slow_query"):
+        query_logger.observe("SELECT * FROM orders WHERE id = ?", 5, 1)
+        query_logger.observe("SELECT * FROM orders WHERE id = ?", 250, 1)
+
+    # Assert
+    assert len(caplog.records) == 1
+    record = caplog.records[0]
+    assert record.duration_ms == 250
+    assert record.fingerprint == "SELECT * FROM orders WHERE id = ?"
+    assert record.rowcount == 1
+    assert query_logger.stats()["SELECT * FROM orders WHERE id = ?"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_Install_ShouldRecordEveryStatement_OfTheEngine(tmp_path):
+    # Arrange
+    query_logger = SlowQueryLogger(threshold_ms=-1)
+    engine = create_database_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", echo=False, sqlite_pragmas=None, query_logger=query_logger
+    )
+
+    # Act
+    async with engine.connect() as conn:
+        for value in range(3):
+            await conn.execute(text("SELECT :value"), {"value": value})
+        with pytest.raises(Exception):
+            await conn.execute(text("SELECT * FROM missing_table"))
+    await engine.dispose()
+
+    # Assert
+    stats = query_logger.stats()
+    assert stats["SELECT ?"]["count"] == 3
+    assert "SELECT * FROM missing_table" not in stats
+
+# endregion
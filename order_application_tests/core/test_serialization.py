@@ -0,0 +1,88 @@
+﻿import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from core.serialization import ORJSONResponse, dumps
+from models.entities import OrderItem
+from models.entities.order import Order
+from models.enums import OrderStatus
+from models.schemas.order import OrderReadSchema, order_read_payload
+from services.order_service_impl import OrderService
+
+
+def make_order(created_at, unit_price=Decimal("10.50"), items=2):
+    return Order(
+        id="o1",
+        customer_id="c1",
+        created_at=created_at,
+        updated_at=None,
+        version=1,
+        shipment_id="s1",
+        status=OrderStatus.PROCESSING,
+        total_amount=Decimal("21.00"),
+        items=[
+            OrderItem(id=f"i{n}", product_id=f"p{n}", product_variant_id=None, quantity=n, unit_price=unit_price)
+            for n in range(1, items + 1)
+        ],
+    )
+
+
+# region dumps Function.
+
+def test_Dumps_ShouldWriteDecimalsAsStrings_AndUtcAsZ():
+    # Act
+    body = dumps({
+        "amount": Decimal("259.90"),
+        "at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "status": OrderStatus.PENDING,
+    })
+
+    # Assert
+    assert body == b'{"amount":"259.90","at":"2025-01-02T03:04:05Z","status":"Pending"}'
+
+
+def test_Dumps_ShouldRaiseTypeError_WhenValueIsNotSerializable():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_ORJSONResponse_ShouldRenderWithDumps():
+    response = ORJSONResponse({"amount": Decimal("1.10")}, status_code=201)
+
+    assert response.body == b'{"amount":"1.10"}'
+    assert response.headers["content-type"] == "application/json"
+    assert response.status_code == 201
+
+# endregion
+
+
+# region order_read_payload Function.
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2025, 3, 1, 12, 30, 15, 123456),
+    datetime(2025, 3, 1, 12, 30, 15, tzinfo=timezone.utc),
+])
+def test_OrderReadPayload_ShouldMatchOrderReadSchemaJson(created_at):
+    # Arrange
+    dto = OrderService._to_read_dto(make_order(created_at))
+
+    # Act
+    body = dumps(order_read_payload(dto))
+
+    # Assert
+    assert body == OrderReadSchema.model_validate(dto.model_dump()).model_dump_json().encode()
+
+
+def test_OrderReadPayload_ShouldKeepMissingUnitPriceAsNull():
+    # Arrange
+    order = make_order(datetime(2025, 3, 1), unit_price=None, items=1)
+
+    # Act
+    payload = json.loads(dumps(order_read_payload(order)))
+
+    # Assert
+    assert payload["items"] == [{"id": "i1", "product_id": "p1", "product_variant_id": None, "quantity": 1, "unit_price": None}]
+
+# endregion
@@ -0,0 +1,23 @@
+﻿from core.startup import StartupTimer
+from order_application_tests.fake_clock import FakeClock
+
+
+# region StartupTimer.
+
+def test_Report_ShouldListEveryPhase_WithItsDuration():
+    # Arrange
+    clock = FakeClock()
+    timer = StartupTimer(clock=clock)
+
+    # Act
+    with timer.phase("migrations"):
+        clock.now += 0.25
+    with timer.phase("seed"):
+        clock.now += 0.5
+    timer.finish()
+    clock.now += 10
+
+    # Assert
+    assert timer.report() == {"phases_ms": {"migrations": 250.0, "seed": 500.0}, "total_ms": 750.0}
+
+# endregion
@@ -0,0 +1,308 @@
+﻿import json
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from core.tracing import (
+    CLIENT,
+    SERVER,
+    STATUS_ERROR,
+    FileSpanExporter,
+    SpanContext,
+    Tracer,
+    TracingMiddleware,
+    client_trace_config,
+    parse_traceparent,
+    trace_methods,
+    tracer,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    async def export(self, spans):
+        self.spans.extend(spans)
+
+    async def close(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def exporter():
+    exporter = ListExporter()
+    tracer.configure(exporter)
+    yield exporter
+    await tracer.stop()
+
+
+# region parse_traceparent Function.
+
+def test_ParseTraceparent_ShouldReturnContext_WhenHeaderIsValid():
+    # Act
+    context = parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+
+    # Assert
+    assert context == SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    assert context.traceparent() == "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.mark.parametrize("value", [
+    None,
+    "",
+    "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7",
+    "00-00000000000000000000000000000000-00f067aa0ba902b7-01",
+    "00-4bf92f3577b34da6a3ce929d0e0e4736-0000000000000000-01",
+    "00-not-hex-01",
+])
+def test_ParseTraceparent_ShouldReturnNone_WhenHeaderIsInvalid(value):
+    assert parse_traceparent(value) is None
+
+# endregion
+
+
+# region Tracer.
+
+@pytest.mark.asyncio
+async def test_Span_ShouldRecordNothing_WhenTracerIsNotConfigured():
+    # Arrange
+    local = Tracer()
+
+    # Act
+    with local.span("work") as span:
+        pass
+
+    # Assert
+    assert span is None
+    assert await local.flush() == 0
+    assert local.stats() == {"enabled": False, "queued": 0, "exported": 0, "dropped": 0}
+
+
+@pytest.mark.asyncio
+async def test_Span_ShouldNestChildrenUnderTheCurrentSpan():
+    # Arrange
+    exporter = ListExporter()
+    local = Tracer()
+    local.configure(exporter)
+
+    # Act
+    with local.span("parent") as parent:
+        with local.span("child") as child:
+            pass
+    await local.flush()
+
+    # Assert
+    names = [span["name"] for span in exporter.spans]
+    assert names == ["child", "parent"]
+    assert child.context.trace_id == parent.context.trace_id
+    assert exporter.spans[0]["parentSpanId"] == parent.context.span_id
+    assert "parentSpanId" not in exporter.spans[1]
+    assert local.current_span() is None
+
+
+@pytest.mark.asyncio
+async def test_Span_ShouldRecordError_WhenBlockRaises():
+    # Arrange
+    exporter = ListExporter()
+    local = Tracer()
+    local.configure(exporter)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with local.span("work"):
+            raise RuntimeError("boom")
+    await local.flush()
+
+    # Assert
+    assert exporter.spans[0]["status"] == {"code": STATUS_ERROR, "message": "boom"}
+
+
+@pytest.mark.asyncio
+async def test_EndSpan_ShouldDropOldestSpans_WhenQueueIsFull():
+    # Arrange
+    exporter = ListExporter()
+    local = Tracer()
+    local.configure(exporter, max_queue_size=2)
+
+    # Act
+    for name in ("a", "b", "c"):
+        with local.span(name):
+            pass
+    await local.flush()
+
+    # Assert
+    assert [span["name"] for span in exporter.spans] == ["b", "c"]
+    assert local.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_Flush_ShouldNotExport_WhenTraceIsNotSampled():
+    # Arrange
+    exporter = ListExporter()
+    local = Tracer()
+    local.configure(exporter, sample_ratio=0)
+
+    # Act
+    with local.span("work") as span:
+        pass
+
+    # Assert
+    assert span.context.sampled is False
+    assert await local.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_Flush_ShouldAppendOneJsonLinePerSpan_WithFileExporter(tmp_path):
+    # Arrange
+    path = tmp_path / "traces" / "spans.jsonl"
+    local = Tracer()
+    local.configure(FileSpanExporter(str(path)))
+    with local.span("first", attributes={"order.id": "o1"}):
+        pass
+    with local.span("second"):
+        pass
+
+    # Act
+    exported = await local.flush()
+
+    # Assert
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert exported == 2
+    assert [line["name"] for line in lines] == ["first", "second"]
+    assert lines[0]["attributes"] == [{"key": "order.id", "value": {"stringValue": "o1"}}]
+
+# endregion
+
+
+# region trace_methods Decorator.
+
+@trace_methods
+class FakeRepository:
+    async def GetAsync(self, value):
+        return value
+
+    async def StreamAsync(self):
+        for value in (1, 2):
+            yield value
+
+    async def _PrivateAsync(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_TraceMethods_ShouldRecordSpans_OnlyInsideATrace(exporter):
+    # Arrange
+    repository = FakeRepository()
+
+    # Act
+    await repository.GetAsync("outside")
+    with tracer.span("request") as request:
+        assert await repository.GetAsync("inside") == "inside"
+        assert [value async for value in repository.StreamAsync()] == [1, 2]
+        await repository._PrivateAsync()
+    await tracer.flush()
+
+    # Assert
+    names = [span["name"] for span in exporter.spans]
+    assert names == ["FakeRepository.GetAsync", "FakeRepository.StreamAsync", "request"]
+    assert all(span["parentSpanId"] == request.context.span_id for span in exporter.spans[:2])
+
+# endregion
+
+
+# region TracingMiddleware.
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/api/orders/{id}")
+    async def get_order(id: str):
+        return {"id": id, "traceparent": tracer.current_span().context.traceparent()}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_TracingMiddleware_ShouldContinueIncomingTrace_AndNameSpanAfterRoute(exporter):
+    # Arrange
+    incoming = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+    # Act
+    async with AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test") as client:
+        response = await client.get("/api/orders/o1", headers={"traceparent": incoming})
+    await tracer.flush()
+
+    # Assert
+    span = exporter.spans[0]
+    assert response.status_code == 200
+    assert span["name"] == "GET /api/orders/{id}"
+    assert span["kind"] == SERVER
+    assert span["traceId"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert span["parentSpanId"] == "00f067aa0ba902b7"
+    assert response.json()["traceparent"] == f"00-{span['traceId']}-{span['spanId']}-01"
+
+
+@pytest.mark.asyncio
+async def test_TracingMiddleware_ShouldMarkSpanAsError_WhenRequestFails(exporter):
+    # Act
+    transport = ASGITransport(app=make_app(), raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/boom")
+    await tracer.flush()
+
+    # Assert
+    assert response.status_code == 500
+    assert exporter.spans[0]["status"]["code"] == STATUS_ERROR
+
+# endregion
+
+
+# region client_trace_config Function.
+
+@pytest.mark.asyncio
+async def test_ClientTraceConfig_ShouldInjectTraceparent_OnlyInsideATrace(exporter):
+    # Arrange
+    received = []
+
+    async def handler(request):
+        received.append(request.headers.get("traceparent"))
+        return web.json_response({})
+
+    server = web.Application()
+    server.router.add_get("/ping", handler)
+    runner = web.AppRunner(server)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    # Act
+    try:
+        async with aiohttp.ClientSession(trace_configs=[client_trace_config()]) as session:
+            async with session.get(f"http://127.0.0.1:{port}/ping"):
+                pass
+            with tracer.span("request"):
+                async with session.get(f"http://127.0.0.1:{port}/ping"):
+                    pass
+    finally:
+        await runner.cleanup()
+    await tracer.flush()
+
+    # Assert
+    client_span = exporter.spans[0]
+    assert received[0] is None
+    assert received[1] == f"00-{client_span['traceId']}-{client_span['spanId']}-01"
+    assert client_span["kind"] == CLIENT
+    assert client_span["name"] == "HTTP GET"
+
+# endregion
@@ -0,0 +1,139 @@
+﻿import pytest
+import pytest_asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from core.database import DatabaseSettings, SqlitePragmas, create_database_engine, engine_options, ensure_storage
+from data.migrations import upgrade_database
+from models.entities import Base, OrderItem
+from models.entities.order import Order
+from models.enums.order_status import OrderStatus
+from repositories.order_repository_impl import OrderRepository
+
+
+@pytest_asyncio.fixture
+async def migrated_engine(database_url):
+    engine = create_database_engine(database_url, echo=False)
+    await upgrade_database(engine)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    await engine.dispose()
+
+
+# region EngineOptions Method.
+
+def test_EngineOptions_ShouldConfigurePoolAndStatementCache_WhenBackendIsPostgres():
+    # Arrange
+    settings = DatabaseSettings(pool_size=7, max_overflow=3, pool_pre_ping=False, statement_cache_size=0)
+
+    # Act
+    options = engine_options("postgresql+asyncpg://user:secret@db:5432/orders", settings)
+
+    # Assert
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"] == {"prepared_statement_cache_size": 0}
+
+
+def test_EngineOptions_ShouldKeepDefaults_WhenBackendIsSqlite():
+    # Act
+    options = engine_options("sqlite+aiosqlite:///:memory:", DatabaseSettings(pool_size=7))
+
+    # Assert
+    assert options == {}
+
+
+def test_EnsureStorage_ShouldCreateParentDirectory_WhenBackendIsSqlite(tmp_path):
+    # Arrange
+    database_file = tmp_path / "storage" / "orders.db"
+
+    # Act
+    ensure_storage(f"sqlite+aiosqlite:///{database_file}")
+    ensure_storage("postgresql+asyncpg://user:secret@db:5432/orders")
+
+    # Assert
+    assert database_file.parent.is_dir()
+
+# endregion
+
+
+# region SqlitePragmas.
+
+@pytest.mark.asyncio
+async def test_CreateDatabaseEngine_ShouldApplyPragmas_OnEverySqliteConnection(tmp_path):
+    # Arrange
+    pragmas = SqlitePragmas(synchronous="NORMAL", cache_size=-1024, busy_timeout_ms=1234)
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", echo=False, sqlite_pragmas=pragmas)
+
+    # Act
+    async with engine.connect() as conn:
+        journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+        synchronous = (await conn.exec_driver_sql("PRAGMA synchronous")).scalar()
+        cache_size = (await conn.exec_driver_sql("PRAGMA cache_size")).scalar()
+        busy_timeout = (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar()
+        temp_store = (await conn.exec_driver_sql("PRAGMA temp_store")).scalar()
+    await engine.dispose()
+
+    # Assert
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert cache_size == -1024
+    assert busy_timeout == 1234
+    assert temp_store == 2  # MEMORY
+
+
+@pytest.mark.asyncio
+async def test_CreateDatabaseEngine_ShouldKeepSqliteDefaults_WhenPragmasAreDisabled(tmp_path):
+    # Arrange
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", echo=False, sqlite_pragmas=None)
+
+    # Act
+    async with engine.connect() as conn:
+        journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+    await engine.dispose()
+
+    # Assert
+    assert journal_mode == "delete"
+
+# endregion
+
+
+# region Backend Round Trip.
+
+@pytest.mark.asyncio
+async def test_OrderRepository_ShouldPersistAndPageOrders_OnTheConfiguredBackend(migrated_engine):
+    # Arrange
+    repo = OrderRepository(sessionmaker(bind=migrated_engine, class_=AsyncSession, expire_on_commit=False))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    orders = [
+        Order(
+            id=str(uuid.uuid4()),
+            customer_id="c1",
+            created_at=start + timedelta(minutes=i),
+            status=OrderStatus.PENDING,
+            total_amount=Decimal("10.00"),
+            items=[OrderItem(id=str(uuid.uuid4()), product_id="p1", quantity=1, unit_price=Decimal("10.00"))],
+        )
+        for i in range(3)
+    ]
+
+    # Act
+    async with AsyncSession(migrated_engine, expire_on_commit=False) as session:
+        for order in orders:
+            await repo.AddAsync(order, session=session)
+        first_page = await repo.GetPageAsync(2, session, customer_id="c1")
+        after = (first_page[-1].created_at, first_page[-1].id)
+        second_page = await repo.GetPageAsync(2, session, after=after, customer_id="c1")
+
+    # Assert
+    assert [o.id for o in first_page + second_page] == [o.id for o in orders]
+    assert second_page[0].items[0].unit_price == Decimal("10.00")
+
+# endregion
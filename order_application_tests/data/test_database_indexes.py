@@ -0,0 +1,125 @@
+﻿import pytest
+import uuid
+from datetime import datetime
+from sqlalchemy import MetaData, Table, create_engine, inspect, select
+
+from data.migrations import upgrade_schema
+from models.entities import Address, Base, OrderItem
+from models.entities.order import Order
+from models.enums.order_status import OrderStatus
+from repositories.order_repository_impl import OrderRepository
+
+
+LEGACY_TABLES = {"addresses", "orders", "order_items"}
+
+# Columns added to the legacy tables by later revisions.
+LATER_COLUMNS = {"version"}
+
+
+@pytest.fixture
+def migrated_connection(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    with engine.begin() as connection:
+        upgrade_schema(connection)
+        yield connection
+    engine.dispose()
+
+
+def explain(connection, statement) -> str:
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(
+        value.isoformat(" ") if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+# region Migrations.
+
+def test_Migrations_ShouldCreateEveryIndexDeclaredOnTheEntities(migrated_connection):
+    # Arrange
+    inspector = inspect(migrated_connection)
+
+    # Act / Assert
+    for table in Base.metadata.sorted_tables:
+        declared = {index.name for index in table.indexes}
+        migrated = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert declared == migrated, table.name
+
+
+def test_Migrations_ShouldAdoptSchemasCreatedWithoutMigrations(tmp_path):
+    # Arrange
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        # The tables that existed before migrations were introduced, without indexes.
+        legacy = MetaData()
+        for table in Base.metadata.sorted_tables:
+            if table.name not in LEGACY_TABLES:
+                continue
+            columns = [column._copy() for column in table.columns if column.name not in LATER_COLUMNS]
+            Table(table.name, legacy, *columns).create(connection)
+
+        # Act
+        upgrade_schema(connection)
+
+        # Assert
+        indexes = {index["name"] for index in inspect(connection).get_indexes("orders")}
+        assert "ix_orders_customer_id_created_at_id" in indexes
+        assert "version" in {column["name"] for column in inspect(connection).get_columns("orders")}
+    engine.dispose()
+
+
+def test_Migrations_ShouldSkipUpgrade_WhenSchemaIsAlreadyAtHead(migrated_connection):
+    # Act
+    upgraded = upgrade_schema(migrated_connection)
+
+    # Assert
+    assert upgraded is False
+
+# endregion
+
+
+# region Query Plans.
+
+def test_QueryPlan_ShouldUseIndex_WhenLookingUpAddressByCustomer(migrated_connection):
+    statement = select(Address).where(Address.customer_id == str(uuid.uuid4()))
+
+    assert "USING INDEX ix_addresses_customer_id" in explain(migrated_connection, statement)
+
+
+def test_QueryPlan_ShouldUseIndex_WhenLoadingOrderItems(migrated_connection):
+    statement = select(OrderItem).where(OrderItem.order_id.in_([str(uuid.uuid4()), str(uuid.uuid4())]))
+
+    assert "USING INDEX ix_order_items_order_id" in explain(migrated_connection, statement)
+
+
+def test_QueryPlan_ShouldUseIndex_WhenLookingUpOrderByShipment(migrated_connection):
+    statement = select(Order).where(Order.shipment_id == str(uuid.uuid4()))
+
+    assert "USING INDEX ix_orders_shipment_id" in explain(migrated_connection, statement)
+
+
+@pytest.mark.parametrize(
+    "filters, index_name",
+    [
+        ({}, "ix_orders_created_at_id"),
+        ({"customer_id": "customer"}, "ix_orders_customer_id_created_at_id"),
+        ({"status": OrderStatus.PENDING}, "ix_orders_status_created_at_id"),
+    ],
+)
+def test_QueryPlan_ShouldUseIndexWithoutSorting_WhenPaginatingOrders(migrated_connection, filters, index_name):
+    statement = OrderRepository._build_page_query(
+        after=(datetime(2024, 1, 1), str(uuid.uuid4())),
+        customer_id=filters.get("customer_id"),
+        status=filters.get("status"),
+        created_from=None,
+        created_to=None,
+    ).limit(50)
+
+    plan = explain(migrated_connection, statement)
+
+    assert f"USING INDEX {index_name}" in plan
+    assert "TEMP B-TREE" not in plan
+
+# endregion
@@ -0,0 +1,51 @@
+﻿import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from core.database import DatabaseRegistry
+from data import seed_database_if_empty, upgrade_database
+from data.database_initializer import is_database_seeded
+from models.entities import Address
+from models.entities.order import Order
+
+
+@pytest_asyncio.fixture
+async def migrated_database(tmp_path):
+    database = DatabaseRegistry(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, echo=False).start()
+    await upgrade_database(database.engine)
+    yield database
+    await database.dispose()
+
+
+# region SeedDatabaseIfEmpty Method.
+
+@pytest.mark.asyncio
+async def test_SeedDatabaseIfEmpty_ShouldSeed_WhenDatabaseIsEmpty(migrated_database):
+    # Act
+    seeded = await seed_database_if_empty(migrated_database)
+
+    # Assert
+    assert seeded is True
+    async with migrated_database.session_factory() as session:
+        assert (await session.execute(select(func.count()).select_from(Order))).scalar_one() == 3
+        assert await is_database_seeded(session)
+
+
+@pytest.mark.asyncio
+async def test_SeedDatabaseIfEmpty_ShouldSkip_WhenAnyAddressExists(migrated_database):
+    # Arrange
+    async with migrated_database.session_factory() as session:
+        session.add(Address(
+            customer_id="c1", street="Rua A, 1", city="Curitiba", state="PR", postal_code="80000-000", country="Brasil"
+        ))
+        await session.commit()
+
+    # Act
+    seeded = await seed_database_if_empty(migrated_database)
+
+    # Assert
+    assert seeded is False
+    async with migrated_database.session_factory() as session:
+        assert (await session.execute(select(func.count()).select_from(Order))).scalar_one() == 0
+
+# endregion
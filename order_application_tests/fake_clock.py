@@ -0,0 +1,9 @@
+﻿"""A settable clock for code that takes a `clock` callable instead of reading time itself."""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
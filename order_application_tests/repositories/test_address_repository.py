@@ -41,7 +41,7 @@ async def test_AddAsync_ShouldPersistAndReturnEntity(get_repository):
     assert result == entity
     session_mock.add.assert_called_once_with(entity)
     session_mock.commit.assert_awaited_once()
-    session_mock.refresh.assert_awaited_once_with(entity)
+    session_mock.refresh.assert_not_awaited()
 
 # endregion
 
@@ -187,6 +187,24 @@ async def test_UpdateAsync_ShouldPersistChanges_WhenUpdateSucceeds(get_repositor
     session_mock.commit.assert_awaited_once()
     repo.GetByIdAsync.assert_awaited_once_with(updated.id, session=session_mock)
 
+
+@pytest.mark.asyncio
+async def test_UpdateAsync_ShouldNotReload_WhenEntityIsTrackedBySession(get_repository):
+    # Arrange
+    repo = get_repository
+    session_mock = AsyncMock()
+    session_mock.__contains__ = MagicMock(return_value=True)
+    updated = Address(id=str(uuid.uuid4()))
+    repo.GetByIdAsync = AsyncMock()
+
+    # Act
+    result = await repo.UpdateAsync(updated, session=session_mock)
+
+    # Assert
+    assert result is True
+    repo.GetByIdAsync.assert_not_awaited()
+    session_mock.commit.assert_awaited_once()
+
 # endregion
 
 
@@ -1,8 +1,10 @@
 ﻿import pytest
 import uuid
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 from repositories.order_repository_impl import OrderRepository
 from models.entities.order import Order
+from models.enums.order_status import OrderStatus
 
 
 @pytest.fixture
@@ -41,46 +43,50 @@ async def test_AddAsync_ShouldPersistAndReturnEntity(get_repository):
     assert result == entity
     session_mock.add.assert_called_once_with(entity)
     session_mock.commit.assert_awaited_once()
-    session_mock.refresh.assert_awaited_once_with(entity)
+    session_mock.refresh.assert_not_awaited()
 
 # endregion
 
 
-# region GetAllAsync Method.
+# region GetPageAsync Method.
 
 @pytest.mark.asyncio
-async def test_GetAllAsync_ShouldReturnEmptyList_WhenNoRecords(get_repository):
+async def test_GetPageAsync_ShouldRaiseValueError_WhenLimitIsNotPositive(get_repository):
     # Arrange
     repo = get_repository
     session_mock = AsyncMock()
-    execute_result = MagicMock()
-    execute_result.scalars.return_value.all.return_value = []
-    session_mock.execute.return_value = execute_result
 
-    # Act
-    result = await repo.GetAllAsync(session=session_mock)
+    # Act / Assert
+    with pytest.raises(ValueError):
+        await repo.GetPageAsync(0, session=session_mock)
 
-    # Assert
-    assert result == []
-    session_mock.execute.assert_awaited_once()
+    session_mock.execute.assert_not_called()
 
 
 @pytest.mark.asyncio
-async def test_GetAllAsync_ShouldReturnList_WhenRecordsExist(get_repository):
+async def test_GetPageAsync_ShouldApplyKeysetAndFilters_WhenProvided(get_repository):
     # Arrange
     repo = get_repository
     session_mock = AsyncMock()
-    orders = [Order(id=str(uuid.uuid4())), Order(id=str(uuid.uuid4()))]
+    orders = [Order(id=str(uuid.uuid4()))]
     execute_result = MagicMock()
     execute_result.scalars.return_value.all.return_value = orders
     session_mock.execute.return_value = execute_result
+    after = (datetime(2024, 1, 1), str(uuid.uuid4()))
 
     # Act
-    result = await repo.GetAllAsync(session=session_mock)
+    result = await repo.GetPageAsync(
+        10, session=session_mock, after=after, customer_id="customer", status=OrderStatus.PENDING
+    )
 
     # Assert
     assert result == orders
-    session_mock.execute.assert_awaited_once()
+    query = str(session_mock.execute.await_args.args[0])
+    assert "orders.customer_id = " in query
+    assert "orders.status = " in query
+    assert "(orders.created_at, orders.id) > " in query
+    assert "ORDER BY orders.created_at, orders.id" in query
+    assert "LIMIT" in query
 
 # endregion
 
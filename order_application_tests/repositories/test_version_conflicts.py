@@ -0,0 +1,214 @@
+﻿import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from core.concurrency import ConcurrencyConflictError, PreconditionFailedError
+from core.database import DatabaseRegistry
+from data import upgrade_database
+from sqlalchemy import select
+
+from models.entities import Address, OutboxMessage
+from models.entities.order import Order
+from models.enums import OrderStatus
+from repositories import AddressRepository, OrderRepository, OutboxRepository
+from services import OrderService
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    database = DatabaseRegistry(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, echo=False).start()
+    await upgrade_database(database.engine)
+    async with database.session_factory() as session:
+        session.add(Order(id="o1", customer_id="c1", created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                          status=OrderStatus.PENDING, total_amount=Decimal("1")))
+        session.add(Address(id="a1", customer_id="c1", street="Rua A, 1", city="Curitiba", state="PR",
+                            postal_code="80000-000", country="Brasil"))
+        await session.commit()
+    yield database
+    await database.dispose()
+
+
+async def current(database, entity, id):
+    async with database.session_factory() as session:
+        return await session.get(entity, id)
+
+
+# region Order Versions.
+
+@pytest.mark.asyncio
+async def test_UpdateAsync_ShouldBumpVersion_OnEveryWrite(database):
+    # Arrange
+    repository = OrderRepository(database.session_factory)
+
+    # Act
+    async with database.session_factory() as session:
+        order = await repository.GetByIdAsync("o1", session=session)
+        order.status = OrderStatus.PROCESSING
+        await repository.UpdateAsync(order, session=session)
+
+    # Assert
+    assert order.version == 2
+    assert (await current(database, Order, "o1")).version == 2
+
+
+@pytest.mark.asyncio
+async def test_UpdateAsync_ShouldRaiseConcurrencyConflict_WhenOrderChangedSinceRead(database):
+    # Arrange
+    repository = OrderRepository(database.session_factory)
+    async with database.session_factory() as first, database.session_factory() as second:
+        winner = await repository.GetByIdAsync("o1", session=first)
+        loser = await repository.GetByIdAsync("o1", session=second)
+
+        winner.status = OrderStatus.CANCELLED
+        await repository.UpdateAsync(winner, session=first)
+
+        # Act
+        loser.status = OrderStatus.PROCESSING
+        with pytest.raises(ConcurrencyConflictError):
+            await repository.UpdateAsync(loser, session=second)
+
+    # Assert
+    stored = await current(database, Order, "o1")
+    assert stored.status == OrderStatus.CANCELLED
+    assert stored.version == 2
+
+
+@pytest.mark.asyncio
+async def test_DeleteAsync_ShouldRaisePreconditionFailed_WhenVersionDiffers(database):
+    repository = OrderRepository(database.session_factory)
+
+    async with database.session_factory() as session:
+        with pytest.raises(PreconditionFailedError):
+            await repository.DeleteAsync("o1", session=session, expected_version=2)
+
+    assert await current(database, Order, "o1") is not None
+
+
+@pytest.mark.asyncio
+async def test_AssignShipmentsAsync_ShouldBumpVersion_AndFailStaleWriters(database):
+    # Arrange
+    repository = OrderRepository(database.session_factory)
+    async with database.session_factory() as request, database.session_factory() as dispatcher:
+        order = await repository.GetByIdAsync("o1", session=request)
+
+        # Act
+        await repository.AssignShipmentsAsync({"o1": "s1"}, session=dispatcher)
+        await dispatcher.commit()
+
+        order.status = OrderStatus.CANCELLED
+        with pytest.raises(ConcurrencyConflictError):
+            await repository.UpdateAsync(order, session=request)
+
+    # Assert
+    stored = await current(database, Order, "o1")
+    assert (stored.shipment_id, stored.status, stored.version) == ("s1", OrderStatus.PENDING, 2)
+
+# endregion
+
+
+# region Status Changes Racing Another Writer.
+
+async def seed_orders(database, *order_ids):
+    async with database.session_factory() as session:
+        for order_id in order_ids:
+            session.add(Order(id=order_id, customer_id="c1", created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+                              status=OrderStatus.PENDING, total_amount=Decimal("1")))
+        await session.commit()
+
+
+def change_after_load(database, repository, loader, order_id):
+    """Makes the repository's `loader` let the dispatcher assign a shipment to `order_id` right after it reads."""
+    load = getattr(repository, loader)
+
+    async def load_then_change(ids, session):
+        loaded = await load(ids, session=session)
+        async with database.session_factory() as dispatcher:
+            await repository.AssignShipmentsAsync({order_id: "s2"}, session=dispatcher)
+            await dispatcher.commit()
+        return loaded
+
+    setattr(repository, loader, load_then_change)
+
+
+async def stored_orders(database):
+    async with database.session_factory() as session:
+        return {order.id: order for order in (await session.execute(select(Order))).scalars()}
+
+
+@pytest.mark.asyncio
+async def test_PatchAsync_ShouldRaiseConcurrencyConflict_BeforeCallingUpstream_WhenNoOutboxIsConfigured(database):
+    # Arrange
+    repository = OrderRepository(database.session_factory)
+    change_after_load(database, repository, "GetByIdAsync", "o1")
+    product_client = AsyncMock()
+    service = OrderService(repository, AddressRepository(database.session_factory), product_client, AsyncMock())
+
+    # Act
+    async with database.session_factory() as session:
+        with pytest.raises(ConcurrencyConflictError):
+            await service.PatchAsync("o1", {"status": OrderStatus.CANCELLED}, session=session)
+
+    # Assert
+    product_client.modify_stock_many.assert_not_awaited()
+    stored = (await stored_orders(database))["o1"]
+    assert (stored.status, stored.shipment_id, stored.version) == (OrderStatus.PENDING, "s2", 2)
+
+
+@pytest.mark.asyncio
+async def test_BatchPatchAsync_ShouldReportOnlyTheOrderChangedMeanwhile_AndCommitTheRest(database):
+    # Arrange
+    await seed_orders(database, "o2", "o3")
+    repository = OrderRepository(database.session_factory)
+    change_after_load(database, repository, "GetByIdsAsync", "o2")
+    service = OrderService(repository, AddressRepository(database.session_factory), AsyncMock(), AsyncMock(),
+                           outbox_repository=OutboxRepository(database.session_factory))
+
+    # Act
+    async with database.session_factory() as session:
+        result = await service.BatchPatchAsync(
+            {"order_ids": ["o1", "o2", "o3"], "status": OrderStatus.CANCELLED}, session=session
+        )
+
+    # Assert
+    assert [dto.id for dto in result.updated] == ["o1", "o3"]
+    assert [(error.order_id, error.error) for error in result.errors] == [
+        ("o2", "The order was changed by another request; read it again and retry."),
+    ]
+    assert result.failed == 1
+    stored = await stored_orders(database)
+    async with database.session_factory() as session:
+        messages = (await session.execute(select(OutboxMessage.aggregate_id))).scalars().all()
+    assert {order_id: order.status for order_id, order in stored.items()} == {
+        "o1": OrderStatus.CANCELLED, "o2": OrderStatus.PENDING, "o3": OrderStatus.CANCELLED,
+    }
+    assert (stored["o2"].shipment_id, stored["o2"].version) == ("s2", 2)
+    assert sorted(messages) == ["o1", "o3"]
+
+
+@pytest.mark.asyncio
+async def test_BatchPatchAsync_ShouldSkipUpstreamCalls_ForTheOrderChangedMeanwhile_WhenNoOutboxIsConfigured(database):
+    # Arrange
+    await seed_orders(database, "o2", "o3")
+    repository = OrderRepository(database.session_factory)
+    change_after_load(database, repository, "GetByIdsAsync", "o2")
+    product_client = AsyncMock()
+    service = OrderService(repository, AddressRepository(database.session_factory), product_client, AsyncMock())
+
+    # Act
+    async with database.session_factory() as session:
+        result = await service.BatchPatchAsync(
+            {"order_ids": ["o1", "o2", "o3"], "status": OrderStatus.CANCELLED}, session=session
+        )
+
+    # Assert
+    assert [dto.id for dto in result.updated] == ["o1", "o3"]
+    assert [error.order_id for error in result.errors] == ["o2"]
+    assert product_client.modify_stock_many.await_count == 2
+    stored = await stored_orders(database)
+    assert {order_id: order.status for order_id, order in stored.items()} == {
+        "o1": OrderStatus.CANCELLED, "o2": OrderStatus.PENDING, "o3": OrderStatus.CANCELLED,
+    }
+
+# endregion
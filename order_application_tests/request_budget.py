@@ -0,0 +1,102 @@
+﻿"""Measures what one HTTP request costs: SQL statements issued and memory allocated.
+
+    cost = await measure_request(client, engine, "GET", "/api/orders/o1")
+    assert_within_budget(cost, queries=2, peak_kib=300)
+
+Allocations are traced with tracemalloc, which only sees memory allocated while
+it runs; the peak is relative to the start of the request, so objects built by
+earlier requests do not count against it. Warm a route up with one unmeasured
+request first, or its budget pays for one-off work such as statement compilation.
+"""
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from httpx import AsyncClient, Response
+from sqlalchemy import event
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine) -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
+
+@dataclass
+class AllocationTrace:
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+
+
+@contextmanager
+def trace_allocations() -> Iterator[AllocationTrace]:
+    """Peak and retained traced memory of the block, relative to its start."""
+    trace = AllocationTrace()
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        yield trace
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        trace.peak_bytes = peak - baseline
+        trace.retained_bytes = current - baseline
+
+
+@dataclass
+class RequestCost:
+    response: Response
+    statements: List[str] = field(default_factory=list)
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+
+    @property
+    def queries(self) -> int:
+        return len(self.statements)
+
+    @property
+    def peak_kib(self) -> float:
+        return self.peak_bytes / 1024
+
+    def describe(self) -> str:
+        lines = [
+            f"{self.response.request.method} {self.response.request.url.path} -> {self.response.status_code}: "
+            f"{self.queries} statements, peak {self.peak_kib:.0f} KiB, retained {self.retained_bytes / 1024:.0f} KiB"
+        ]
+        lines.extend(f"  {statement}" for statement in self.statements)
+        return "\n".join(lines)
+
+
+async def measure_request(client: AsyncClient, engine, method: str, url: str, **kwargs) -> RequestCost:
+    with count_queries(engine) as queries, trace_allocations() as allocations:
+        response = await client.request(method, url, **kwargs)
+
+    return RequestCost(response, queries.statements, allocations.peak_bytes, allocations.retained_bytes)
+
+
+def assert_within_budget(cost: RequestCost, queries: int, peak_kib: Optional[float] = None) -> None:
+    """Fail with the statements issued when the request went over either budget."""
+    assert cost.queries <= queries, f"over the budget of {queries} statements\n{cost.describe()}"
+    if peak_kib is not None:
+        assert cost.peak_kib <= peak_kib, f"over the budget of {peak_kib} KiB\n{cost.describe()}"
@@ -100,7 +100,8 @@ async def test_GetAllAsync_ShouldReturnMappedDTOs_WhenRecordsExist(service_with_
         state="NY",
         postal_code="10001",
         country="USA",
-        created_at=datetime.now(timezone.utc)
+        created_at=datetime.now(timezone.utc),
+        version=1
     )
     addr2 = Address(
         id=str(uuid.uuid4()),
@@ -110,7 +111,8 @@ async def test_GetAllAsync_ShouldReturnMappedDTOs_WhenRecordsExist(service_with_
         state="MA",
         postal_code="02118",
         country="USA",
-        created_at=datetime.now(timezone.utc)
+        created_at=datetime.now(timezone.utc),
+        version=1
     )
     repo_mock.GetAllAsync.return_value = [addr1, addr2]
 
@@ -157,7 +159,8 @@ async def test_GetByIdAsync_ShouldReturnMappedDTO_WhenRecordExists(service_with_
         state="NY",
         postal_code="10001",
         country="USA",
-        created_at=datetime.now(timezone.utc)
+        created_at=datetime.now(timezone.utc),
+        version=1
     )
     repo_mock.GetByIdAsync.return_value = entity
 
@@ -289,7 +292,7 @@ async def test_DeleteAsync_ShouldReturnTrue_WhenRecordIsDeleted(service_with_moc
     result = await service.DeleteAsync(address_id, session="session")
 
     assert result is True
-    repo_mock.DeleteAsync.assert_awaited_once_with(address_id, session="session")
+    repo_mock.DeleteAsync.assert_awaited_once_with(address_id, session="session", expected_version=None)
 
 
 @pytest.mark.asyncio
@@ -302,7 +305,7 @@ async def test_DeleteAsync_ShouldReturnFalse_WhenRecordDoesNotExist(service_with
     result = await service.DeleteAsync(address_id, session="session")
 
     assert result is False
-    repo_mock.DeleteAsync.assert_awaited_once_with(address_id, session="session")
+    repo_mock.DeleteAsync.assert_awaited_once_with(address_id, session="session", expected_version=None)
 
 
 @pytest.mark.asyncio
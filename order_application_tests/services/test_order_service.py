@@ -1,13 +1,25 @@
-﻿import pytest
+﻿import asyncio
+import logging
+import pytest
 import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
 from unittest.mock import AsyncMock
+from sqlalchemy.exc import IntegrityError, OperationalError
 
+from core.bulk_import import ImportRecord
+from core.concurrency import ConcurrencyConflictError, PreconditionFailedError
+from core.pagination import InvalidCursorError, decode_cursor
+from clients.product_service_client import StockChange
 from services.order_service_impl import OrderService
+from models.entities.address import Address
 from models.entities.order import Order
+from models.entities.order_item import OrderItem
 from models.dtos.order.order_create_dto import OrderCreateDTO
+from models.dtos.order.order_filter_dto import OrderFilterDTO
+from models.dtos.order.order_read_dto import OrderReadDTO
 from models.dtos.order.order_update_dto import OrderUpdateDTO
+from models.dtos.order_item.order_item_create_dto import OrderItemCreateDTO
 from models.enums.order_status import OrderStatus
 
 
@@ -70,51 +82,463 @@ async def test_CreateAsync_ShouldRaiseException_WhenRepositoryFails(service_with
     assert "Repository failure" in str(exc_info.value)
     repo_mock.AddAsync.assert_awaited_once()
 
+
+@pytest.mark.asyncio
+async def test_CreateAsync_ShouldResolvePricesConcurrently_WithinConcurrencyLimit():
+    repo_mock = AsyncMock()
+    product_client_mock = AsyncMock()
+    service = OrderService(repo_mock, AsyncMock(), product_client_mock, AsyncMock(), max_concurrency=2)
+
+    in_flight = 0
+    peak = 0
+
+    async def get_product(product_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"price": "10.00"}
+
+    product_client_mock.get_product.side_effect = get_product
+    items = [OrderItemCreateDTO(product_id=str(uuid.uuid4()), quantity=1) for _ in range(6)]
+
+    result = await service.CreateAsync(OrderCreateDTO(customer_id=str(uuid.uuid4()), items=items), session="session")
+
+    assert peak == 2
+    assert result.total_amount == Decimal("60.00")
+    product_client_mock.modify_stock_many.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_CreateAsync_ShouldReserveAllItemsInOneCall(service_with_mocks):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+
+    items = [
+        OrderItemCreateDTO(product_id=str(uuid.uuid4()), quantity=1),
+        OrderItemCreateDTO(product_id=str(uuid.uuid4()), product_variant_id=str(uuid.uuid4()), quantity=3),
+    ]
+    product_client_mock.get_product.return_value = {"price": "5.00"}
+    product_client_mock.get_variant.return_value = {"price": "7.00"}
+
+    await service.CreateAsync(OrderCreateDTO(customer_id=str(uuid.uuid4()), items=items), session="session")
+
+    product_client_mock.modify_stock_many.assert_awaited_once_with("reserve", [
+        StockChange(items[0].product_id, None, 1),
+        StockChange(items[1].product_id, items[1].product_variant_id, 3),
+    ])
+    repo_mock.AddAsync.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_CreateAsync_ShouldReleaseReservedStock_WhenRepositoryFails(service_with_mocks):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+
+    items = [OrderItemCreateDTO(product_id=str(uuid.uuid4()), quantity=2)]
+    product_client_mock.get_product.return_value = {"price": "5.00"}
+    repo_mock.AddAsync.side_effect = Exception("Repository failure")
+
+    with pytest.raises(Exception):
+        await service.CreateAsync(OrderCreateDTO(customer_id=str(uuid.uuid4()), items=items), session="session")
+
+    product_client_mock.modify_stock_many.assert_awaited_with("release", [StockChange(items[0].product_id, None, 2)])
+
+
+@pytest.mark.asyncio
+async def test_CreateAsync_ShouldLogTheFailedRelease_WhenCompensationFails(service_with_mocks, caplog):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+
+    items = [OrderItemCreateDTO(product_id=str(uuid.uuid4()), quantity=2)]
+    product_client_mock.get_product.return_value = {"price": "5.00"}
+    product_client_mock.modify_stock_many.side_effect = [None, RuntimeError("Product service down")]
+    repo_mock.AddAsync.side_effect = Exception("Repository failure")
+
+    with caplog.at_level(logging.ERROR, logger="order_service.stock"):
+        with pytest.raises(Exception, match="Repository failure"):
+            await service.CreateAsync(OrderCreateDTO(customer_id=str(uuid.uuid4()), items=items), session="session")
+
+    [record] = caplog.records
+    assert record.action == "release"
+    assert record.product_ids == [items[0].product_id]
+    assert record.exc_info[1].args == ("Product service down",)
+
+
+@pytest.mark.asyncio
+async def test_CreateAsync_ShouldNotReserveStock_WhenAPriceLookupFails(service_with_mocks):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+
+    items = [OrderItemCreateDTO(product_id=str(uuid.uuid4()), quantity=1) for _ in range(3)]
+    product_client_mock.get_product.side_effect = [{"price": "1.00"}, ValueError("Product not found."), {"price": "1.00"}]
+
+    with pytest.raises(ValueError):
+        await service.CreateAsync(OrderCreateDTO(customer_id=str(uuid.uuid4()), items=items), session="session")
+
+    product_client_mock.modify_stock_many.assert_not_called()
+    repo_mock.AddAsync.assert_not_called()
+
 # endregion
 
 
-# region GetAllAsync Method.
+# region ImportAsync Method.
+
+async def as_records(*records):
+    for record in records:
+        yield record
+
+
+def import_record(row, order_id, **overrides):
+    data = {
+        "id": order_id,
+        "customer_id": "c1",
+        "status": "Completed",
+        "items": [{"product_id": "p1", "quantity": 2, "unit_price": "5.25"}],
+    }
+    data.update(overrides)
+    return ImportRecord(row, data)
+
+
+@pytest.mark.asyncio
+async def test_ImportAsync_ShouldInsertEachChunkInOneCall_WhenRecordsAreValid(service_with_mocks):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+    records = as_records(*(import_record(row, f"o{row}") for row in range(1, 6)))
+
+    result = await service.ImportAsync(records, session="session", chunk_size=2)
+
+    assert (result.received, result.imported, result.failed) == (5, 5, 0)
+    assert [len(call.args[0]) for call in repo_mock.BulkInsertAsync.await_args_list] == [2, 2, 1]
+    orders, items = repo_mock.BulkInsertAsync.await_args_list[0].args
+    assert orders[0]["total_amount"] == Decimal("10.50")
+    assert orders[0]["status"] == OrderStatus.COMPLETED
+    assert items[0]["order_id"] == "o1"
+    product_client_mock.modify_stock_many.assert_not_called()
+
 
 @pytest.mark.asyncio
-async def test_GetAllAsync_ShouldReturnEmptyList_WhenNoRecordsExist(service_with_mocks):
+async def test_ImportAsync_ShouldReportInvalidRows_WithoutAbortingTheLoad(service_with_mocks):
     service, repo_mock, _, _, _ = service_with_mocks
+    records = as_records(
+        import_record(1, "o1"),
+        ImportRecord(2, None, "Invalid JSON"),
+        import_record(3, "o3", items=[]),
+        import_record(4, "o4"),
+    )
 
-    repo_mock.GetAllAsync.return_value = None
-    result = await service.GetAllAsync(session="session")
+    result = await service.ImportAsync(records, session="session")
 
-    assert result == []
-    repo_mock.GetAllAsync.assert_awaited_once_with(session="session")
+    assert (result.received, result.imported, result.failed) == (4, 2, 2)
+    assert [(error.row, error.order_id) for error in result.errors] == [(2, None), (3, "o3")]
+    assert "items" in result.errors[1].error
+    repo_mock.BulkInsertAsync.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-async def test_GetAllAsync_ShouldReturnMappedDTOs_WhenRecordsExist(service_with_mocks):
+async def test_ImportAsync_ShouldRetryRowByRow_WhenChunkInsertFails(service_with_mocks):
     service, repo_mock, _, _, _ = service_with_mocks
 
-    order = Order(
-        id=str(uuid.uuid4()),
-        customer_id=str(uuid.uuid4()),
-        created_at=datetime.now(timezone.utc),
-        total_amount=Decimal("10.00"),
-        status=OrderStatus.PENDING,
-        items=[]
+    async def bulk_insert(orders, items, session):
+        if any(order["id"] == "duplicate" for order in orders):
+            raise IntegrityError("INSERT INTO orders", {}, Exception("UNIQUE constraint failed: orders.id"))
+
+    repo_mock.BulkInsertAsync.side_effect = bulk_insert
+    records = as_records(import_record(1, "o1"), import_record(2, "duplicate"), import_record(3, "o3"))
+
+    result = await service.ImportAsync(records, session="session")
+
+    assert (result.imported, result.failed) == (2, 1)
+    assert result.errors[0].row == 2
+    assert result.errors[0].error == "UNIQUE constraint failed: orders.id"
+    assert repo_mock.BulkInsertAsync.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_ImportAsync_ShouldRaise_WithoutRetryingRowByRow_WhenTheDatabaseFails(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+    repo_mock.BulkInsertAsync.side_effect = OperationalError("INSERT INTO orders", {}, Exception("database is locked"))
+    records = as_records(import_record(1, "o1"), import_record(2, "o2"))
+
+    with pytest.raises(OperationalError):
+        await service.ImportAsync(records, session="session")
+
+    repo_mock.BulkInsertAsync.assert_awaited_once()
+
+# endregion
+
+
+# region PatchAsync Method.
+
+@pytest.mark.asyncio
+async def test_PatchAsync_ShouldEnqueueSideEffects_InsteadOfCallingUpstream_WhenOutboxIsConfigured():
+    repo_mock = AsyncMock()
+    outbox_mock = AsyncMock()
+    product_client_mock = AsyncMock()
+    logistics_client_mock = AsyncMock()
+    service = OrderService(
+        repo_mock, AsyncMock(), product_client_mock, logistics_client_mock, outbox_repository=outbox_mock
     )
-    repo_mock.GetAllAsync.return_value = [order]
+    existing = Order(
+        id="o1", customer_id="c1", created_at=datetime.now(timezone.utc), total_amount=Decimal("0"),
+        status=OrderStatus.PROCESSING, shipment_id="s1", items=[],
+    )
+    repo_mock.GetByIdAsync.return_value = existing
 
-    result = await service.GetAllAsync(session="session")
+    result = await service.PatchAsync("o1", {"status": OrderStatus.CANCELLED}, session="session")
 
-    assert len(result) == 1
-    assert result[0].id == order.id
-    repo_mock.GetAllAsync.assert_awaited_once_with(session="session")
+    assert result.status == OrderStatus.CANCELLED
+    assert existing.status == OrderStatus.CANCELLED
+    events = [call.args[0].event_type for call in outbox_mock.EnqueueAsync.await_args_list]
+    assert events == ["stock.release", "shipment.cancel"]
+    assert all(call.kwargs["session"] == "session" for call in outbox_mock.EnqueueAsync.await_args_list)
+    product_client_mock.modify_stock_many.assert_not_called()
+    logistics_client_mock.update_shipment.assert_not_called()
+    repo_mock.UpdateAsync.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-async def test_GetAllAsync_ShouldRaiseException_WhenRepositoryFails(service_with_mocks):
+async def test_PatchAsync_ShouldApplySideEffectsInline_WhenNoOutboxIsConfigured(service_with_mocks):
+    service, repo_mock, _, product_client_mock, logistics_client_mock = service_with_mocks
+    existing = Order(
+        id="o1", customer_id="c1", created_at=datetime.now(timezone.utc), total_amount=Decimal("0"),
+        status=OrderStatus.IN_TRANSIT, shipment_id="s1", items=[],
+    )
+    repo_mock.GetByIdAsync.return_value = existing
+
+    await service.PatchAsync("o1", {"status": OrderStatus.COMPLETED}, session="session")
+
+    product_client_mock.modify_stock_many.assert_awaited_once_with("reduce", [])
+    assert existing.status == OrderStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_PatchAsync_ShouldReturnReadDTO_FromTheUpdatedEntity(service_with_mocks):
     service, repo_mock, _, _, _ = service_with_mocks
+    existing = Order(
+        id="o1", customer_id="c1", created_at=datetime.now(timezone.utc), total_amount=Decimal("20.00"),
+        status=OrderStatus.PENDING, items=[OrderItem(id="i1", product_id="p1", quantity=2, unit_price=10.0)],
+    )
+    repo_mock.GetByIdAsync.return_value = existing
 
-    repo_mock.GetAllAsync.side_effect = Exception("Repository failure")
+    result = await service.PatchAsync("o1", {"status": OrderStatus.CANCELLED}, session="session")
+
+    assert isinstance(result, OrderReadDTO)
+    assert result.status == OrderStatus.CANCELLED
+    assert [item.id for item in result.items] == ["i1"]
+    repo_mock.GetByIdAsync.assert_awaited_once()
 
-    with pytest.raises(Exception):
-        await service.GetAllAsync(session="session")
+
+@pytest.mark.asyncio
+async def test_PatchAsync_ShouldReturnNone_WhenRecordDoesNotExist(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+    repo_mock.GetByIdAsync.return_value = None
+
+    result = await service.PatchAsync("missing", {"status": OrderStatus.CANCELLED}, session="session")
+
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_PatchAsync_ShouldRaisePreconditionFailed_WithoutSideEffects_WhenVersionDiffers(service_with_mocks):
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+    repo_mock.GetByIdAsync.return_value = Order(
+        id="o1", customer_id="c1", created_at=datetime.now(timezone.utc), total_amount=Decimal("0"),
+        status=OrderStatus.PENDING, items=[], version=3,
+    )
+
+    with pytest.raises(PreconditionFailedError):
+        await service.PatchAsync("o1", {"status": OrderStatus.CANCELLED}, session="session", expected_version=2)
+
+    product_client_mock.modify_stock_many.assert_not_called()
+    repo_mock.UpdateAsync.assert_not_called()
+
+# endregion
+
+
+# region BatchPatchAsync Method.
+
+def batch_order(order_id, customer_id="c1", status=OrderStatus.PENDING, shipment_id=None):
+    return Order(
+        id=order_id, customer_id=customer_id, created_at=datetime.now(timezone.utc), total_amount=Decimal("0"),
+        status=status, shipment_id=shipment_id, items=[],
+    )
+
+
+async def update_each(orders, session, apply=None):
+    for order in orders:
+        await apply(order)
+    return {}
+
+
+def batch_address(customer_id, street="Rua A, 1"):
+    return Address(customer_id=customer_id, street=street, city="Curitiba", state="PR",
+                   postal_code="80000-000", country="Brasil")
+
+
+@pytest.mark.asyncio
+async def test_BatchPatchAsync_ShouldCheckEachDestinationOnce_WhenOrdersShareAnAddress():
+    repo_mock = AsyncMock()
+    address_repo_mock = AsyncMock()
+    logistics_client_mock = AsyncMock()
+    outbox_mock = AsyncMock()
+    service = OrderService(repo_mock, address_repo_mock, AsyncMock(), logistics_client_mock, outbox_repository=outbox_mock)
+    repo_mock.GetByIdsAsync.return_value = [batch_order("o1", "c1"), batch_order("o2", "c2"), batch_order("o3", "c3")]
+    address_repo_mock.GetByCustomerIdsAsync.return_value = [
+        batch_address("c1"), batch_address("c2", street=" rua a, 1"), batch_address("c3", street="Rua B, 2"),
+    ]
+    logistics_client_mock.check_availability.return_value = {"valid": True}
+    repo_mock.UpdateManyAsync.side_effect = update_each
+
+    result = await service.BatchPatchAsync(
+        {"order_ids": ["o1", "o2", "o3"], "status": OrderStatus.PROCESSING}, session="session"
+    )
+
+    assert [dto.id for dto in result.updated] == ["o1", "o2", "o3"]
+    assert result.failed == 0
+    assert logistics_client_mock.check_availability.await_count == 2
+    address_repo_mock.GetByCustomerIdsAsync.assert_awaited_once_with(["c1", "c2", "c3"], session="session")
+    address_repo_mock.GetByCustomerIdAsync.assert_not_called()
+    events = [call.args[0].event_type for call in outbox_mock.EnqueueAsync.await_args_list]
+    assert events == ["shipment.create"] * 3
+    repo_mock.UpdateManyAsync.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_BatchPatchAsync_ShouldReportRejectedOrders_InRequestOrder(service_with_mocks):
+    service, repo_mock, address_repo_mock, _, logistics_client_mock = service_with_mocks
+    repo_mock.GetByIdsAsync.return_value = [
+        batch_order("o1", "c1"), batch_order("o2", "c2", status=OrderStatus.COMPLETED), batch_order("o3", "c3"),
+    ]
+    address_repo_mock.GetByCustomerIdsAsync.return_value = [batch_address("c1"), batch_address("c3", street="Rua B, 2")]
+    logistics_client_mock.check_availability.side_effect = (
+        lambda **destination: {"valid": destination["street"] == "Rua A, 1"}
+    )
+    logistics_client_mock.create_shipment.return_value = {"id": "s1"}
+
+    result = await service.BatchPatchAsync(
+        {"order_ids": ["o3", "missing", "o1", "o2", "o1"], "status": OrderStatus.PROCESSING}, session="session"
+    )
+
+    assert result.received == 4
+    assert [dto.id for dto in result.updated] == ["o1"]
+    assert [(error.order_id, error.error) for error in result.errors] == [
+        ("o3", "Destination is not serviceable for shipping."),
+        ("missing", "Record not found"),
+        ("o2", "Inappropriate status transition: Completed to Processing"),
+    ]
+    assert result.failed == 3
+    updated_orders = repo_mock.UpdateManyAsync.await_args.args[0]
+    assert [order.id for order in updated_orders] == ["o1"]
+    assert updated_orders[0].shipment_id == "s1"
+
+
+@pytest.mark.asyncio
+async def test_BatchPatchAsync_ShouldCreateShipmentsWithBoundedConcurrency_WhenNoOutboxIsConfigured():
+    repo_mock = AsyncMock()
+    address_repo_mock = AsyncMock()
+    logistics_client_mock = AsyncMock()
+    service = OrderService(repo_mock, address_repo_mock, AsyncMock(), logistics_client_mock, max_concurrency=3)
+    orders = [batch_order(f"o{i}", f"c{i}") for i in range(10)]
+    repo_mock.GetByIdsAsync.return_value = orders
+    address_repo_mock.GetByCustomerIdsAsync.return_value = [batch_address(order.customer_id) for order in orders]
+    logistics_client_mock.check_availability.return_value = {"valid": True}
+    in_flight = peak = 0
+
+    async def create_shipment(**payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if payload["order_id"] == "o4":
+            raise RuntimeError("Logistics service unavailable.")
+        return {"id": f"s-{payload['order_id']}"}
+
+    logistics_client_mock.create_shipment.side_effect = create_shipment
+
+    result = await service.BatchPatchAsync(
+        {"order_ids": [order.id for order in orders], "status": OrderStatus.PROCESSING}, session="session"
+    )
+
+    assert peak == 3
+    assert logistics_client_mock.check_availability.await_count == 1
+    assert len(result.updated) == 9
+    assert [(error.order_id, error.error) for error in result.errors] == [("o4", "Logistics service unavailable.")]
+    assert orders[4].status == OrderStatus.PENDING
+
+# endregion
+
+
+# region GetPageAsync Method.
+
+@pytest.mark.asyncio
+async def test_GetPageAsync_ShouldReturnNextCursor_WhenMoreRecordsExist(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+
+    orders = [
+        Order(
+            id=str(uuid.uuid4()),
+            customer_id=str(uuid.uuid4()),
+            created_at=datetime(2024, 1, 1, minute=i),
+            total_amount=Decimal("10.00"),
+            status=OrderStatus.PENDING,
+            items=[]
+        )
+        for i in range(3)
+    ]
+    repo_mock.GetPageAsync.return_value = orders
+
+    result, next_cursor = await service.GetPageAsync(2, session="session")
+
+    assert [r.id for r in result] == [orders[0].id, orders[1].id]
+    assert decode_cursor(next_cursor) == (orders[1].created_at, orders[1].id)
+    assert repo_mock.GetPageAsync.await_args.args == (3,)
+
+
+@pytest.mark.asyncio
+async def test_GetPageAsync_ShouldReturnNoCursor_WhenLastPageIsReached(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+
+    repo_mock.GetPageAsync.return_value = []
+
+    result, next_cursor = await service.GetPageAsync(2, session="session")
+
+    assert result == []
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_GetPageAsync_ShouldRaiseInvalidCursorError_WhenCursorIsMalformed(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+
+    with pytest.raises(InvalidCursorError):
+        await service.GetPageAsync(2, session="session", cursor="not-a-cursor")
+
+    repo_mock.GetPageAsync.assert_not_called()
+
+# endregion
+
+
+# region Version Methods.
+
+@pytest.mark.asyncio
+async def test_GetPageVersionsAsync_ShouldTrimExtraRow_AndReportMore(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+    repo_mock.GetPageVersionsAsync.return_value = ["v1", "v2", "v3"]
+
+    versions, has_more = await service.GetPageVersionsAsync(2, session="session", filters=OrderFilterDTO(customer_id="c1"))
+
+    assert versions == ["v1", "v2"]
+    assert has_more is True
+    assert repo_mock.GetPageVersionsAsync.await_args.args == (3,)
+    assert repo_mock.GetPageVersionsAsync.await_args.kwargs["customer_id"] == "c1"
+
+
+@pytest.mark.asyncio
+async def test_GetVersionAsync_ShouldRaiseValueError_WhenIdIsEmpty(service_with_mocks):
+    service, repo_mock, _, _, _ = service_with_mocks
+
+    with pytest.raises(ValueError):
+        await service.GetVersionAsync("", session="session")
+
+    repo_mock.GetVersionAsync.assert_not_called()
 
 # endregion
 
@@ -199,6 +623,35 @@ async def test_UpdateAsync_ShouldRaiseException_WhenRepositoryFails(service_with
     with pytest.raises(Exception):
         await service.UpdateAsync(dto, session="session")
 
+
+@pytest.mark.asyncio
+async def test_UpdateAsync_ShouldUndoStockChanges_WhenOrderChangedConcurrently(service_with_mocks):
+    # Arrange
+    service, repo_mock, _, product_client_mock, _ = service_with_mocks
+    product_client_mock.get_product.return_value = {"price": "10.00"}
+    repo_mock.GetByIdAsync.return_value = Order(
+        id="o1", customer_id="c1", created_at=datetime.now(timezone.utc), total_amount=Decimal("40.00"),
+        status=OrderStatus.PENDING, version=1, items=[
+            OrderItem(id="i1", product_id="p1", quantity=2, unit_price=10.0),
+            OrderItem(id="i2", product_id="p2", quantity=2, unit_price=10.0),
+        ],
+    )
+    repo_mock.UpdateAsync.side_effect = ConcurrencyConflictError("changed")
+    dto = OrderUpdateDTO(items=[{"id": "i1", "quantity": 3}, {"id": "i2", "quantity": 1}])
+
+    # Act
+    with pytest.raises(ConcurrencyConflictError):
+        await service.UpdateAsync("o1", dto, session="session")
+
+    # Assert
+    calls = [call.args for call in product_client_mock.modify_stock_many.await_args_list]
+    assert calls == [
+        ("reserve", [StockChange("p1", None, 1)]),
+        ("release", [StockChange("p2", None, 1)]),
+        ("release", [StockChange("p1", None, 1)]),
+        ("reserve", [StockChange("p2", None, 1)]),
+    ]
+
 # endregion
 
 
@@ -214,7 +667,7 @@ async def test_DeleteAsync_ShouldCallRepository_WithCorrectId(service_with_mocks
     result = await service.DeleteAsync(order_id, session="session")
 
     assert result is True
-    repo_mock.DeleteAsync.assert_awaited_once_with(order_id, session="session")
+    repo_mock.DeleteAsync.assert_awaited_once_with(order_id, session="session", expected_version=None)
 
 
 @pytest.mark.asyncio
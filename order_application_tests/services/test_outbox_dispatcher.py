@@ -0,0 +1,184 @@
+﻿import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from clients import RetryPolicy
+from core.database import DatabaseRegistry
+from data import upgrade_database
+from models.entities import OutboxMessage
+from models.entities.order import Order
+from models.enums import OrderStatus, OutboxStatus
+from repositories import OrderRepository, OutboxRepository
+from services.outbox_dispatcher import OutboxDispatcher
+
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    database = DatabaseRegistry(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}", query_logger=None, echo=False).start()
+    await upgrade_database(database.engine)
+    async with database.session_factory() as session:
+        session.add(Order(id="o1", customer_id="c1", created_at=NOW, status=OrderStatus.CANCELLED, total_amount=Decimal("1")))
+        session.add(Order(id="o2", customer_id="c2", created_at=NOW, status=OrderStatus.CANCELLED, total_amount=Decimal("1")))
+        await session.commit()
+    yield database
+    await database.dispose()
+
+
+def build_dispatcher(
+    database, side_effects, max_attempts=3, retry_policy=RetryPolicy(base_delay=0, max_delay=0), clock=lambda: NOW
+):
+    return OutboxDispatcher(
+        database.session_factory,
+        outbox_repository=OutboxRepository(database.session_factory),
+        order_repository=OrderRepository(database.session_factory),
+        side_effects=side_effects,
+        batch_size=10,
+        max_attempts=max_attempts,
+        retry_policy=retry_policy,
+        clock=clock,
+    )
+
+
+async def enqueue(database, *messages):
+    async with database.session_factory() as session:
+        for position, (aggregate_id, event_type) in enumerate(messages):
+            # Spread creation times so the claim order is the enqueue order.
+            await OutboxRepository(database.session_factory).EnqueueAsync(
+                OutboxMessage(aggregate_id=aggregate_id, event_type=event_type, payload={},
+                              created_at=NOW - timedelta(seconds=len(messages) - position), available_at=NOW),
+                session=session,
+            )
+        await session.commit()
+
+
+async def statuses(database):
+    async with database.session_factory() as session:
+        return await OutboxRepository(database.session_factory).CountByStatusAsync(session=session)
+
+
+# region DispatchBatchAsync Method.
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldMarkMessagesProcessed_WhenSideEffectsSucceed(database):
+    side_effects = AsyncMock()
+    await enqueue(database, ("o1", "stock.release"), ("o2", "stock.reduce"))
+
+    claimed = await build_dispatcher(database, side_effects).DispatchBatchAsync()
+
+    assert claimed == 2
+    assert side_effects.apply.await_count == 2
+    applied_order = side_effects.apply.await_args_list[0].args[2]
+    assert applied_order.id == "o1"
+    assert await statuses(database) == {OutboxStatus.PROCESSED.value: 2}
+
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldHoldLaterMessagesOfTheOrder_WhenOneFails(database):
+    side_effects = AsyncMock()
+    side_effects.apply.side_effect = [RuntimeError("upstream down"), None]
+    await enqueue(database, ("o1", "stock.release"), ("o1", "shipment.cancel"), ("o2", "stock.release"))
+
+    await build_dispatcher(database, side_effects).DispatchBatchAsync()
+
+    assert [call.args[0] for call in side_effects.apply.await_args_list] == ["stock.release", "stock.release"]
+    assert await statuses(database) == {OutboxStatus.PENDING.value: 2, OutboxStatus.PROCESSED.value: 1}
+
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldHoldLaterMessagesOfTheOrder_UntilTheFailedOneIsRetried(database, monkeypatch):
+    # Arrange
+    monkeypatch.setattr("clients.resilience.random.uniform", lambda low, high: high)
+    now = [NOW]
+    side_effects = AsyncMock()
+    side_effects.apply.side_effect = [RuntimeError("upstream down"), None, None]
+    await enqueue(database, ("o1", "stock.release"), ("o1", "shipment.cancel"))
+    dispatcher = build_dispatcher(
+        database, side_effects, retry_policy=RetryPolicy(base_delay=60, max_delay=60), clock=lambda: now[0]
+    )
+
+    # Act
+    claims = [await dispatcher.DispatchBatchAsync()]
+    # The later message is due, but the failed one is still backing off.
+    now[0] = NOW + timedelta(seconds=30)
+    claims.append(await dispatcher.DispatchBatchAsync())
+    now[0] = NOW + timedelta(seconds=60)
+    claims.append(await dispatcher.DispatchBatchAsync())
+
+    # Assert
+    assert claims == [2, 0, 2]
+    assert [call.args[0] for call in side_effects.apply.await_args_list] == [
+        "stock.release", "stock.release", "shipment.cancel"
+    ]
+    assert await statuses(database) == {OutboxStatus.PROCESSED.value: 2}
+
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldGiveUp_AfterMaxAttempts(database):
+    side_effects = AsyncMock()
+    side_effects.apply.side_effect = RuntimeError("upstream down")
+    await enqueue(database, ("o1", "stock.release"))
+    dispatcher = build_dispatcher(database, side_effects, max_attempts=2)
+
+    await dispatcher.DispatchBatchAsync()
+    await dispatcher.DispatchBatchAsync()
+    claimed = await dispatcher.DispatchBatchAsync()
+
+    assert claimed == 0
+    assert await statuses(database) == {OutboxStatus.FAILED.value: 1}
+
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldApplyMessagesOfDifferentOrdersConcurrently(database):
+    in_flight = []
+    both_started = asyncio.Event()
+
+    async def apply(event_type, payload, order):
+        in_flight.append(order.id)
+        if len(in_flight) == 2:
+            both_started.set()
+        # Only returns once the other order's message is in flight too.
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+
+    side_effects = AsyncMock()
+    side_effects.apply.side_effect = apply
+    await enqueue(database, ("o1", "stock.release"), ("o2", "stock.release"))
+
+    await build_dispatcher(database, side_effects).DispatchBatchAsync()
+
+    assert sorted(in_flight) == ["o1", "o2"]
+    assert await statuses(database) == {OutboxStatus.PROCESSED.value: 2}
+
+
+@pytest.mark.asyncio
+async def test_DispatchBatchAsync_ShouldKeepShipmentAndConcurrentUpdate_WhenOrderChangesMeanwhile(database):
+    # Arrange
+    repository = OrderRepository(database.session_factory)
+
+    async def apply(event_type, payload, order):
+        # A request updates the order while the shipment is being created.
+        async with database.session_factory() as session:
+            current = await repository.GetByIdAsync(order.id, session=session)
+            current.customer_id = "c9"
+            await repository.UpdateAsync(current, session=session)
+        order.shipment_id = "s1"
+
+    side_effects = AsyncMock()
+    side_effects.apply.side_effect = apply
+    await enqueue(database, ("o1", "shipment.create"))
+
+    # Act
+    await build_dispatcher(database, side_effects).DispatchBatchAsync()
+
+    # Assert
+    async with database.session_factory() as session:
+        order = await repository.GetByIdAsync("o1", session=session)
+    assert (order.shipment_id, order.customer_id, order.version) == ("s1", "c9", 3)
+    assert await statuses(database) == {OutboxStatus.PROCESSED.value: 1}
+
+# endregion